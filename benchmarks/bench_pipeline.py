@@ -0,0 +1,216 @@
+"""Load generator and per-stage latency benchmark for the full pipeline."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import pathlib
+import random
+import resource
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+STAGE_TURNS = [
+    ("intake", "Patient Jane Doe is here with shortness of breath for 2 days, no history"),
+    ("triage", "Please triage this patient"),
+    ("labs", "Labs are back: CBC within normal limits"),
+    ("briefing", "Please brief the clinician"),
+    ("appointment", "Please book an appointment"),
+]
+
+# Metrics compared against a saved baseline, and which direction is worse.
+REGRESSION_CHECKS = {"p95_s": "higher", "p99_s": "higher", "sessions_per_second": "lower"}
+
+
+def arrival_offsets(pattern: str, sessions: int, rate: float, seed: int = 7) -> List[float]:
+    """Arrival times (seconds from start) for ``sessions`` patients.
+
+    ``constant`` spaces arrivals evenly, ``poisson`` draws exponential gaps,
+    and ``burst`` releases groups of 10 patients at once every ``10 / rate``
+    seconds (a waiting room filling up after a shift change).
+    """
+
+    rng = random.Random(seed)
+    if pattern == "constant":
+        return [i / rate for i in range(sessions)]
+    if pattern == "poisson":
+        offsets, now = [], 0.0
+        for _ in range(sessions):
+            offsets.append(now)
+            now += rng.expovariate(rate)
+        return offsets
+    if pattern == "burst":
+        return [(i // 10) * 10 / rate for i in range(sessions)]
+    raise ValueError(f"unknown arrival pattern {pattern!r}")
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(latencies),
+        "p50_s": round(percentile(latencies, 50), 4),
+        "p95_s": round(percentile(latencies, 95), 4),
+        "p99_s": round(percentile(latencies, 99), 4),
+    }
+
+
+async def run_load(args: argparse.Namespace) -> dict:
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from google.genai import types as genai_types
+
+    from clinicpulse.admission import admission_controller
+    from clinicpulse.agent import root_agent
+    from clinicpulse.config import config
+    from clinicpulse.metrics import metrics
+    from clinicpulse.runner_pool import run_bootstrap
+
+    config.admission_rate_per_s = args.admission_rate
+    admission_controller.cache_clear()
+    metrics.reset()
+    run_bootstrap(args.backend)
+    session_service = InMemorySessionService()
+    runner = Runner(agent=root_agent, app_name="clinicpulse", session_service=session_service)
+
+    stage_latencies: Dict[str, List[float]] = defaultdict(list)
+    session_latencies: List[float] = []
+    errors = 0
+
+    async def patient(index: int, delay: float) -> None:
+        nonlocal errors
+        await asyncio.sleep(delay)
+        session_id = f"load-{index}"
+        await session_service.create_session(
+            app_name="clinicpulse", user_id="load", session_id=session_id
+        )
+        started = time.perf_counter()
+        for stage, text in STAGE_TURNS:
+            turn_started = time.perf_counter()
+            try:
+                async for _ in runner.run_async(
+                    user_id="load",
+                    session_id=session_id,
+                    new_message=genai_types.Content(
+                        role="user", parts=[genai_types.Part.from_text(text=text)]
+                    ),
+                ):
+                    pass
+            except Exception:  # Count and keep generating load.
+                errors += 1
+            stage_latencies[stage].append(time.perf_counter() - turn_started)
+        session_latencies.append(time.perf_counter() - started)
+
+    offsets = arrival_offsets(args.pattern, args.sessions, args.rate, args.seed)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    cpu_before = time.process_time()
+    wall_started = time.perf_counter()
+    await asyncio.gather(*(patient(i, delay) for i, delay in enumerate(offsets)))
+    wall = time.perf_counter() - wall_started
+    cpu = time.process_time() - cpu_before
+    rss_growth_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+    # Time queued for model quota is reported on its own so it is not read
+    # as pipeline latency (it is included in the stage timings above).
+    snapshot = metrics.snapshot()
+    admission_waits = [
+        (value, snapshot[key.replace("_count{", "_sum{")])
+        for key, value in snapshot.items()
+        if key.startswith("admission_wait_seconds_count")
+    ]
+    admitted = sum(count for count, _ in admission_waits)
+    admission_wait = sum(total for _, total in admission_waits) / admitted if admitted else 0.0
+    return {
+        "pattern": args.pattern,
+        "sessions": args.sessions,
+        "rate": args.rate,
+        "latency_ms": args.latency_ms,
+        "admission_rate_per_s": args.admission_rate,
+        "admission_mean_wait_s": round(admission_wait, 4),
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "sessions_per_second": round(args.sessions / wall, 2),
+        "cpu_ms_per_session": round(cpu * 1000 / args.sessions, 3),
+        "rss_kb_per_session": round(rss_growth_kb / args.sessions, 2),
+        "session": summarize(session_latencies),
+        "stages": {stage: summarize(stage_latencies[stage]) for stage, _ in STAGE_TURNS},
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Human-readable regressions of ``report`` relative to ``baseline``."""
+
+    def check(label: str, current: dict, previous: dict) -> List[str]:
+        found = []
+        for key, worse in REGRESSION_CHECKS.items():
+            if key not in current or key not in previous or not previous[key]:
+                continue
+            change = (current[key] - previous[key]) / previous[key]
+            if (worse == "higher" and change > tolerance) or (
+                worse == "lower" and change < -tolerance
+            ):
+                found.append(f"{label}.{key}: {previous[key]} -> {current[key]} ({change:+.0%})")
+        return found
+
+    regressions = check("overall", report, baseline)
+    regressions += check("session", report["session"], baseline.get("session", {}))
+    for stage, stats in report["stages"].items():
+        regressions += check(stage, stats, baseline.get("stages", {}).get(stage, {}))
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=20.0, help="Mean arrivals per second")
+    parser.add_argument("--pattern", choices=["constant", "poisson", "burst"], default="poisson")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Simulated model latency")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="Simulated latency jitter")
+    parser.add_argument(
+        "--backend",
+        default="benchmarks.sim_model:install",
+        help="module:function that installs the model backend ('' for the configured model)",
+    )
+    parser.add_argument(
+        "--admission-rate",
+        type=float,
+        default=0.0,
+        help="Per-process admission limit in model calls/s (default 0: off)",
+    )
+    parser.add_argument("--save-baseline", type=pathlib.Path, default=None)
+    parser.add_argument("--compare", type=pathlib.Path, default=None, help="Baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    os.environ["CLINICPULSE_SIM_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["CLINICPULSE_SIM_JITTER_MS"] = str(args.jitter_ms)
+    os.environ.setdefault("CLINICPULSE_LOG_LEVEL", "WARNING")
+
+    report = asyncio.run(run_load(args))
+    print(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.save_baseline.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text(encoding="utf-8")), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
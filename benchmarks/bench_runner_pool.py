@@ -0,0 +1,76 @@
+"""Throughput of the session-sharded runner pool as worker count grows."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from clinicpulse.runner_pool import RunnerPool
+
+TURNS = [
+    "Patient Jane Doe is here with shortness of breath",
+    "Please triage this patient",
+    "Labs are back",
+    "Please brief the clinician",
+    "Please book an appointment",
+]
+
+
+async def run_once(workers: int, sessions: int, spill_dir: str) -> dict:
+    pool = RunnerPool(
+        workers,
+        bootstrap="benchmarks.sim_model:install",
+        spill_dir=spill_dir,
+    )
+    await pool.start()
+    # Warm every worker so process spawn and imports are not measured.
+    await asyncio.gather(
+        *(pool.send("bench", f"warmup-{i}", TURNS[0]) for i in range(workers * 4))
+    )
+
+    async def patient(index: int) -> int:
+        errors = 0
+        for text in TURNS:
+            result = await pool.send("bench", f"patient-{index}", text)
+            errors += "error" in result
+        return errors
+
+    started = time.perf_counter()
+    errors = sum(await asyncio.gather(*(patient(i) for i in range(sessions))))
+    elapsed = time.perf_counter() - started
+    await pool.close()
+    return {
+        "workers": workers,
+        "sessions": sessions,
+        "turns": sessions * len(TURNS),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "turns_per_second": round(sessions * len(TURNS) / elapsed, 1),
+    }
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    os.environ["CLINICPULSE_SIM_LATENCY_MS"] = str(args.latency_ms)
+    os.environ.setdefault("CLINICPULSE_LOG_LEVEL", "WARNING")
+    baseline = None
+    for workers in args.workers:
+        row = await run_once(workers, args.sessions, args.spill_dir)
+        baseline = baseline or row["turns_per_second"]
+        row["speedup"] = round(row["turns_per_second"] / baseline, 2)
+        print(json.dumps(row))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--spill-dir", default=".clinicpulse/bench-sessions")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
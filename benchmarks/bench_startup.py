@@ -0,0 +1,58 @@
+"""Cold worker spawn benchmark: package import, graph build, first Runner."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import subprocess
+import sys
+import time
+
+_PROBE = """
+import json, time
+t0 = time.perf_counter()
+import clinicpulse
+t1 = time.perf_counter()
+root = clinicpulse.root_agent
+t2 = time.perf_counter()
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+Runner(agent=root, app_name="clinicpulse", session_service=InMemorySessionService())
+t3 = time.perf_counter()
+print(json.dumps({"import_s": t1 - t0, "build_graph_s": t2 - t1, "runner_s": t3 - t2}))
+"""
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    samples = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-c", _PROBE], capture_output=True, text=True, check=True
+        )
+        row = json.loads(completed.stdout.strip().splitlines()[-1])
+        row["process_s"] = time.perf_counter() - started
+        samples.append(row)
+
+    report = {
+        key: {
+            "p50_s": round(_percentile([s[key] for s in samples], 50), 4),
+            "p95_s": round(_percentile([s[key] for s in samples], 95), 4),
+        }
+        for key in ("import_s", "build_graph_s", "runner_s", "process_s")
+    }
+    print(json.dumps({"runs": args.runs, **report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Simulated LLM backend that drives the ClinicPulse pipeline without a model."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import re
+from typing import AsyncGenerator, Dict, List, Optional
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types as genai_types
+
+from clinicpulse.prompts import is_session_context
+
+# Order in which the simulated orchestrator walks the root pipeline.
+PIPELINE = [
+    "intake_loop",
+    "triage_loop",
+    "lab_wait_loop",
+    "clinician_briefing",
+    "appointment_loop",
+]
+
+# Tools the simulated agents call, with deterministic arguments. Tools not
+# listed here (e.g. wait_for_lab_results, which would park the session) are
+# never called.
+TOOL_ARGS: Dict[str, Dict[str, object]] = {
+    "fetch_patient_records": {"patient_id": "P-SIM"},
+    "record_triage_decision": {"patient_id": "P-SIM", "priority_level": "Urgent"},
+    "check_doctor_availability": {"specialty": "general", "urgency_level": "urgent"},
+    "book_appointment": {
+        "patient_id": "P-SIM",
+        "doctor_name": "Dr. Smith",
+        "appointment_datetime": "2025-11-21 10:00",
+    },
+    "send_appointment_confirmation": {
+        "patient_id": "P-SIM",
+        "appointment_details": {"appointment_id": "APT-SIM", "doctor": "Dr. Smith"},
+    },
+}
+
+AGENT_OUTPUTS: Dict[str, object] = {
+    "intake_collector": {
+        "patient_id": "P-SIM",
+        "symptoms": "shortness of breath",
+        "duration": "2 days",
+        "history": "none",
+    },
+    "triage_coordinator": {
+        "patient_id": "P-SIM",
+        "priority_level": "Urgent",
+        "rationale": "Respiratory symptoms for 2 days",
+        "recommended_next_steps": "Chest exam, SpO2",
+    },
+    "lab_requester": {"patient_id": "P-SIM", "lab_summary": "CBC within normal limits"},
+    "clinician_briefing": (
+        "## Risk Flags\nEscalate if SpO2 drops.\n"
+        "## Next Steps\nFollow up on chest exam."
+    ),
+    "appointment_scheduler": {
+        "patient_id": "P-SIM",
+        "appointment_id": "APT-SIM",
+        "doctor": "Dr. Smith",
+        "datetime": "2025-11-21 10:00",
+        "specialty": "general",
+        "urgency_level": "Urgent",
+        "confirmation_sent": False,
+        "confirmation_status": "queued",
+    },
+}
+
+_AGENT_NAME = re.compile(r'Your internal name is "([^"]+)"')
+
+
+def _system_text(llm_request: LlmRequest) -> str:
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    if instruction is None:
+        return ""
+    if isinstance(instruction, str):
+        return instruction
+    return "".join(part.text or "" for part in instruction.parts or [])
+
+
+def _function_calls(contents: List[genai_types.Content], name: str) -> List[genai_types.FunctionCall]:
+    return [
+        part.function_call
+        for content in contents
+        for part in content.parts or []
+        if part.function_call and part.function_call.name == name
+    ]
+
+
+class SimulatedLlm(BaseLlm):
+    """Scripted stand-in for Gemini with configurable per-call latency.
+
+    The model name encodes the latency: ``sim/40`` sleeps 40 ms per call and
+    ``sim/40~10`` adds up to ±10 ms of uniform jitter.
+    """
+
+    model: str = "sim/0"
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r"sim/.*"]
+
+    def sample_latency_s(self) -> float:
+        mean, _, jitter = self.model.split("/", 1)[1].partition("~")
+        latency_ms = float(mean or 0) + random.uniform(-1, 1) * float(jitter or 0)
+        return max(0.0, latency_ms) / 1000
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        await asyncio.sleep(self.sample_latency_s())
+        content = self.respond(llm_request)
+        yield LlmResponse(
+            content=content,
+            usage_metadata=genai_types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=_estimate_tokens(llm_request),
+                candidates_token_count=sum(
+                    len(part.text or "") // 4 + 1 for part in content.parts
+                ),
+            ),
+        )
+
+    def respond(self, llm_request: LlmRequest) -> genai_types.Content:
+        match = _AGENT_NAME.search(_system_text(llm_request))
+        agent_name = match.group(1) if match else ""
+        # The trailing [Session context] turn is not part of the conversation.
+        contents = [c for c in llm_request.contents or [] if not is_session_context(c)]
+        last = contents[-1] if contents else None
+        answered_tools = bool(
+            last and any(part.function_response for part in last.parts or [])
+        )
+
+        if agent_name == "clinicpulse_ai":
+            done = {call.args.get("agent_name") for call in _function_calls(contents, "transfer_to_agent")}
+            remaining = [stage for stage in PIPELINE if stage not in done]
+            if remaining and not answered_tools:
+                return _model_content(
+                    function_calls=[("transfer_to_agent", {"agent_name": remaining[0]})]
+                )
+            return _model_content(text="[Pipeline complete] Care team has been briefed.")
+
+        tools = [name for name in (llm_request.tools_dict or {}) if name in TOOL_ARGS]
+        if tools and not answered_tools:
+            return _model_content(function_calls=[(name, TOOL_ARGS[name]) for name in tools])
+
+        output = AGENT_OUTPUTS.get(agent_name, "Acknowledged.")
+        return _model_content(text=output if isinstance(output, str) else json.dumps(output))
+
+
+def _estimate_tokens(llm_request: LlmRequest) -> int:
+    """Rough 4-characters-per-token estimate of the request size."""
+
+    chars = len(_system_text(llm_request))
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            chars += len(part.text or "")
+    return chars // 4 + 1
+
+
+def _model_content(
+    text: Optional[str] = None, function_calls: Optional[list] = None
+) -> genai_types.Content:
+    parts = []
+    if text is not None:
+        parts.append(genai_types.Part.from_text(text=text))
+    for name, args in function_calls or []:
+        parts.append(
+            genai_types.Part(function_call=genai_types.FunctionCall(name=name, args=args))
+        )
+    return genai_types.Content(role="model", parts=parts)
+
+
+def install(
+    latency_ms: Optional[float] = None, jitter_ms: Optional[float] = None, root=None
+) -> None:
+    """Point every LLM agent in the ClinicPulse graph at the simulator.
+
+    Usable as a runner-pool bootstrap (``benchmarks.sim_model:install``); the
+    latency then comes from ``CLINICPULSE_SIM_LATENCY_MS`` and
+    ``CLINICPULSE_SIM_JITTER_MS``.
+    """
+
+    if latency_ms is None:
+        latency_ms = float(os.environ.get("CLINICPULSE_SIM_LATENCY_MS", "0"))
+    if jitter_ms is None:
+        jitter_ms = float(os.environ.get("CLINICPULSE_SIM_JITTER_MS", "0"))
+    from clinicpulse.config import config
+    from clinicpulse.hedging import HedgedLlm
+
+    if root is None:
+        from clinicpulse.agent import root_agent as root
+
+    LLMRegistry.register(SimulatedLlm)
+    name = f"sim/{latency_ms:g}~{jitter_ms:g}"
+    # Model routing still runs, but every tier resolves to the simulator.
+    routing = config.model_routing
+    routing.tiers = {tier: name for tier in routing.tiers}
+    pending = [root]
+    while pending:
+        agent = pending.pop()
+        if isinstance(getattr(agent, "model", None), HedgedLlm):
+            # Keep timeouts/hedging in the loop; only the inner backend changes.
+            agent.model = agent.model.model_copy(update={"model": name})
+        elif hasattr(agent, "model"):
+            agent.model = SimulatedLlm(model=name)
+        pending.extend(agent.sub_agents)
@@ -1,5 +1,15 @@
-"""ClinicPulse AI package exports."""
+"""ClinicPulse AI package exports.
 
-from .agent import root_agent
+``root_agent`` is resolved lazily so ``import clinicpulse`` does not pull in
+google-adk, resolve credentials, or build the agent graph.
+"""
 
 __all__ = ["root_agent"]
+
+
+def __getattr__(name: str):
+    if name == "root_agent":
+        from .agent import build_root_agent
+
+        return build_root_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
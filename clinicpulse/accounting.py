@@ -0,0 +1,371 @@
+"""Per-agent token, latency, and loop-iteration accounting with a SQLite store."""
+
+import argparse
+import atexit
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from .config import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS agent_runs (
+    day TEXT NOT NULL,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    patient_id TEXT,
+    invocation_id TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    iteration INTEGER NOT NULL,
+    model_calls INTEGER NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    model_latency_s REAL NOT NULL,
+    tool_calls INTEGER NOT NULL,
+    tool_latency_s REAL NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS agent_runs_session ON agent_runs (session_id);
+CREATE INDEX IF NOT EXISTS agent_runs_day ON agent_runs (day);
+"""
+
+
+@dataclass
+class AgentRun:
+    """One execution of one agent within an invocation (one loop iteration)."""
+
+    day: str
+    app_name: str
+    user_id: str
+    session_id: str
+    invocation_id: str
+    agent: str
+    iteration: int = 1
+    patient_id: Optional[str] = None
+    model_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    model_latency_s: float = 0.0
+    tool_calls: int = 0
+    tool_latency_s: float = 0.0
+    started_at: float = field(default_factory=time.time)
+    finished_at: float = 0.0
+
+
+class AccountingStore:
+    """Append-only SQLite store written by a background thread.
+
+    ``add`` only buffers the row, so agent callbacks on the event loop never
+    touch the disk. A writer thread (started on the first ``add``) writes
+    the buffer in one transaction once ``flush_rows`` rows are waiting or
+    ``flush_interval_s`` has passed, over a single connection that stays
+    open for the life of the store.
+    """
+
+    def __init__(self, path: str, flush_rows: int = 64, flush_interval_s: float = 5.0) -> None:
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_interval_s = flush_interval_s
+        self._buffer: List[AgentRun] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._db_lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._closed = False
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def add(self, run: AgentRun) -> None:
+        with self._lock:
+            self._buffer.append(run)
+            if self._writer is None and not self._closed:
+                self._writer = threading.Thread(
+                    target=self._run, name="accounting-writer", daemon=True
+                )
+                self._writer.start()
+            if len(self._buffer) >= self.flush_rows:
+                self._wake.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._closed and len(self._buffer) < self.flush_rows:
+                    self._wake.wait(self.flush_interval_s)
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered rows now (the writer thread does this on its own)."""
+
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return
+        columns = list(asdict(rows[0]))
+        with self._db_lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO agent_runs ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                [tuple(asdict(row).values()) for row in rows],
+            )
+
+    def close(self) -> None:
+        """Stop the writer, write what is left and close the connection."""
+
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wake.notify()
+        if self._writer is not None:
+            self._writer.join()
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+    def query(self, sql: str, params: Tuple = ()) -> List[sqlite3.Row]:
+        self.flush()
+        with self._db_lock:
+            cursor = self._conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            return cursor.execute(sql, params).fetchall()
+
+
+class Accountant:
+    """Accumulates counters between ADK callbacks and emits one row per agent run.
+
+    Model latency is measured from the last ``before_model_callback`` (after
+    admission and routing) to ``after_model_callback``; tool latency from
+    ``before_tool_callback`` to ``after_tool_callback``.
+    """
+
+    def __init__(self, store: AccountingStore, max_invocations: int = 10_000) -> None:
+        self.store = store
+        self.max_invocations = max_invocations
+        self._runs: Dict[Tuple[str, str], AgentRun] = {}
+        self._model_started: Dict[Tuple[str, str], float] = {}
+        self._tool_started: Dict[str, float] = {}
+        self._iterations: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _run(self, context: Any) -> AgentRun:
+        key = (context.invocation_id, context.agent_name)
+        run = self._runs.get(key)
+        if run is None:
+            app_name, user_id, session_id = session_ids(context)
+            run = self._runs[key] = AgentRun(
+                day=datetime.date.today().isoformat(),
+                app_name=app_name,
+                user_id=user_id,
+                session_id=session_id,
+                invocation_id=context.invocation_id,
+                agent=context.agent_name,
+            )
+        return run
+
+    def model_started(self, context: Any) -> None:
+        with self._lock:
+            self._run(context)
+            self._model_started[(context.invocation_id, context.agent_name)] = time.perf_counter()
+
+    def model_finished(self, context: Any, usage: Any) -> None:
+        with self._lock:
+            run = self._run(context)
+            started = self._model_started.pop((context.invocation_id, context.agent_name), None)
+            if started is not None:
+                run.model_latency_s += time.perf_counter() - started
+            run.model_calls += 1
+            run.prompt_tokens += getattr(usage, "prompt_token_count", None) or 0
+            run.completion_tokens += getattr(usage, "candidates_token_count", None) or 0
+
+    def tool_started(self, tool_context: Any) -> None:
+        with self._lock:
+            self._run(tool_context)
+            self._tool_started[_call_id(tool_context)] = time.perf_counter()
+
+    def tool_finished(self, tool_context: Any) -> None:
+        with self._lock:
+            run = self._run(tool_context)
+            started = self._tool_started.pop(_call_id(tool_context), None)
+            if started is not None:
+                run.tool_latency_s += time.perf_counter() - started
+            run.tool_calls += 1
+
+    def agent_finished(self, context: Any) -> None:
+        with self._lock:
+            run = self._run(context)
+            del self._runs[(context.invocation_id, context.agent_name)]
+            counts = self._iterations.setdefault(context.invocation_id, {})
+            self._iterations.move_to_end(context.invocation_id)
+            while len(self._iterations) > self.max_invocations:
+                self._iterations.popitem(last=False)
+            counts[run.agent] = counts.get(run.agent, 0) + 1
+            run.iteration = counts[run.agent]
+        run.patient_id = patient_id_from_state(context.state)
+        run.finished_at = time.time()
+        self.store.add(run)
+
+
+def session_ids(context: Any) -> Tuple[str, str, str]:
+    """``(app_name, user_id, session_id)`` of a callback or tool context."""
+
+    session = getattr(context, "session", None)
+    if session is None:
+        session = getattr(getattr(context, "_invocation_context", None), "session", None)
+    if session is None:
+        return "", "", ""
+    return session.app_name, session.user_id, session.id
+
+
+def _call_id(tool_context: Any) -> str:
+    return getattr(tool_context, "function_call_id", None) or tool_context.invocation_id
+
+
+def patient_id_from_state(state: Mapping[str, Any]) -> Optional[str]:
+    """``patient_id`` from the intake dossier, if intake has produced one."""
+
+    intake = state.get("patient_intake")
+    if isinstance(intake, str):
+        try:
+            intake = json.loads(intake.strip().strip("`").removeprefix("json"))
+        except ValueError:
+            return None
+    if hasattr(intake, "get") and intake.get("patient_id"):
+        return str(intake["patient_id"])
+    return None
+
+
+_ACCOUNTANT: Optional[Accountant] = None
+
+
+def accountant() -> Optional[Accountant]:
+    """Process-wide accountant, or ``None`` when accounting is disabled."""
+
+    global _ACCOUNTANT
+    if _ACCOUNTANT is None and config.accounting_db:
+        store = AccountingStore(config.accounting_db)
+        atexit.register(store.close)
+        _ACCOUNTANT = Accountant(store)
+    return _ACCOUNTANT
+
+
+def accounting_before_model(callback_context, llm_request) -> None:
+    del llm_request  # Only the timing matters here.
+    if accountant() is not None:
+        accountant().model_started(callback_context)
+    return None
+
+
+def accounting_after_model(callback_context, llm_response) -> None:
+    if accountant() is not None:
+        accountant().model_finished(callback_context, llm_response.usage_metadata)
+    return None
+
+
+def accounting_before_tool(tool, args, tool_context) -> None:
+    del tool, args
+    if accountant() is not None:
+        accountant().tool_started(tool_context)
+    return None
+
+
+def accounting_after_tool(tool, args, tool_context, tool_response) -> None:
+    del tool, args, tool_response
+    if accountant() is not None:
+        accountant().tool_finished(tool_context)
+    return None
+
+
+def accounting_after_agent(callback_context) -> None:
+    if accountant() is not None:
+        accountant().agent_finished(callback_context)
+    return None
+
+
+# ==================== REPORTS ====================
+
+TOTALS = """
+    COUNT(*) AS runs,
+    SUM(model_calls) AS model_calls,
+    SUM(prompt_tokens) AS prompt_tokens,
+    SUM(completion_tokens) AS completion_tokens,
+    SUM(prompt_tokens + completion_tokens) AS total_tokens,
+    ROUND(SUM(model_latency_s), 3) AS model_latency_s,
+    ROUND(SUM(tool_latency_s), 3) AS tool_latency_s
+"""
+
+REPORTS = {
+    "sessions": f"""
+        SELECT session_id, MAX(patient_id) AS patient_id, {TOTALS}
+        FROM agent_runs GROUP BY session_id ORDER BY total_tokens DESC LIMIT ?
+    """,
+    "patients": f"""
+        SELECT patient_id, COUNT(DISTINCT session_id) AS sessions, {TOTALS}
+        FROM agent_runs WHERE patient_id IS NOT NULL
+        GROUP BY patient_id ORDER BY total_tokens DESC LIMIT ?
+    """,
+    "days": f"""
+        SELECT day, COUNT(DISTINCT session_id) AS sessions, {TOTALS}
+        FROM agent_runs GROUP BY day ORDER BY day DESC LIMIT ?
+    """,
+    "stages": """
+        SELECT agent,
+            COUNT(*) AS runs,
+            ROUND(AVG(prompt_tokens), 1) AS avg_prompt_tokens,
+            ROUND(AVG(completion_tokens), 1) AS avg_completion_tokens,
+            ROUND(AVG(model_latency_s), 3) AS avg_model_latency_s,
+            ROUND(AVG(tool_latency_s), 3) AS avg_tool_latency_s,
+            MAX(iteration) AS max_iterations
+        FROM agent_runs GROUP BY agent
+        ORDER BY AVG(prompt_tokens + completion_tokens) DESC LIMIT ?
+    """,
+}
+
+
+def report(store: AccountingStore, kind: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Rows of one roll-up: ``sessions``, ``patients``, ``days``, or ``stages``."""
+
+    return [dict(row) for row in store.query(REPORTS[kind], (limit,))]
+
+
+def _print_table(rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        print("(no data)")
+        return
+    columns = list(rows[0])
+    widths = [max(len(col), *(len(str(row[col])) for row in rows)) for col in columns]
+    print("  ".join(col.ljust(width) for col, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[col]).ljust(width) for col, width in zip(columns, widths)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report ClinicPulse token and latency usage.")
+    parser.add_argument("report", choices=sorted(REPORTS), help="Roll-up to print")
+    parser.add_argument("--top", type=int, default=10, help="Number of rows")
+    parser.add_argument("--db", default=None, help="Accounting database path")
+    parser.add_argument("--json", action="store_true", help="Emit JSON lines instead of a table")
+    args = parser.parse_args()
+
+    rows = report(AccountingStore(args.db or config.accounting_db), args.report, args.top)
+    if args.json:
+        for row in rows:
+            print(json.dumps(row))
+    else:
+        _print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
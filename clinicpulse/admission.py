@@ -0,0 +1,195 @@
+"""Triage-aware admission control for model calls."""
+
+import asyncio
+import functools
+import heapq
+import itertools
+import json
+import re
+import time
+from typing import Any, Callable, List, Mapping, Optional
+
+from .config import config
+from .logging_utils import log_event
+from .metrics import metrics
+
+# Lower rank is served first. Sessions that have not been triaged yet queue
+# with routine traffic.
+PRIORITY_RANKS = {"Critical": 0, "Urgent": 1, "Routine": 2, "untriaged": 2}
+
+_LEVEL_PATTERN = re.compile(r"\b(critical|urgent|routine)\b", re.IGNORECASE)
+
+
+def triage_priority_level(state: Mapping[str, Any]) -> str:
+    """Extract ``Critical | Urgent | Routine`` from ``triage_priority`` state.
+
+    The triage agent may store a dict or free text (often JSON); anything
+    unrecognised is reported as ``"untriaged"``.
+    """
+
+    triage = state.get("triage_priority")
+    if isinstance(triage, str):
+        try:
+            triage = json.loads(triage.strip().strip("`").removeprefix("json"))
+        except ValueError:
+            match = _LEVEL_PATTERN.search(triage)
+            return match.group(1).capitalize() if match else "untriaged"
+    if hasattr(triage, "get"):
+        level = str(triage.get("priority_level", "")).strip().capitalize()
+        if level in PRIORITY_RANKS:
+            return level
+    return "untriaged"
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second up to ``capacity``."""
+
+    def __init__(
+        self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """Take a token; return 0.0 on success or seconds until one is free."""
+
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def refund(self) -> None:
+        """Return a token that was taken but never used."""
+
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + 1)
+
+
+class _Waiter:
+    __slots__ = ("key", "seq", "priority", "future", "enqueued_at")
+
+    def __init__(self, key: float, seq: int, priority: str, future: asyncio.Future) -> None:
+        self.key = key
+        self.seq = seq
+        self.priority = priority
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.key, self.seq) < (other.key, other.seq)
+
+
+class AdmissionController:
+    """Token-bucket rate limit with a priority queue in front of it.
+
+    Waiters are ordered by ``rank * aging_s + enqueue_time``: a waiting call
+    gains one priority level every ``aging_s`` seconds, so routine traffic
+    cannot starve. Because aging is linear in enqueue time the heap order
+    never changes while entries wait, keeping push/pop at O(log n).
+    """
+
+    def __init__(self, rate_per_s: float, burst: float, aging_s: float) -> None:
+        self.bucket = TokenBucket(rate_per_s, burst)
+        self.aging_s = aging_s
+        self._heap: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _depth(self, priority: str):
+        return metrics.gauge("admission_queue_depth", priority=priority)
+
+    async def acquire(self, priority: str = "untriaged") -> float:
+        """Wait for a model-call slot; returns the time spent queued."""
+
+        rank = PRIORITY_RANKS.get(priority, PRIORITY_RANKS["untriaged"])
+        if not self._heap and self.bucket.try_acquire() == 0.0:
+            self._record(priority, 0.0)
+            return 0.0
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(
+            rank * self.aging_s + time.monotonic(), next(self._seq), priority, loop.create_future()
+        )
+        heapq.heappush(self._heap, waiter)
+        self._depth(priority).inc()
+        if self._timer is None or self._timer_loop is not loop:
+            self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if not waiter.future.done() or waiter.future.cancelled():
+                # Still queued: the dispatcher drops cancelled entries lazily.
+                self._depth(priority).dec()
+            else:
+                # Admitted, but cancelled before it could run: hand the token on.
+                self.bucket.refund()
+                if self._timer is not None:
+                    self._timer.cancel()
+                self._dispatch()
+            raise
+        waited = time.monotonic() - waiter.enqueued_at
+        self._record(priority, waited)
+        return waited
+
+    def _record(self, priority: str, waited: float) -> None:
+        metrics.counter("admission_admitted_total", priority=priority).inc()
+        metrics.histogram("admission_wait_seconds", priority=priority).observe(waited)
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        while self._heap:
+            head = self._heap[0]
+            if head.future.done():
+                heapq.heappop(self._heap)
+                continue
+            delay = self.bucket.try_acquire()
+            if delay > 0:
+                self._timer_loop = asyncio.get_running_loop()
+                self._timer = self._timer_loop.call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self._heap)
+            self._depth(head.priority).dec()
+            head.future.set_result(None)
+
+    def pending(self) -> int:
+        return sum(1 for waiter in self._heap if not waiter.future.done())
+
+
+@functools.lru_cache(maxsize=None)
+def admission_controller() -> Optional[AdmissionController]:
+    """Process-wide controller built from ``config`` on first use; None when disabled."""
+
+    if config.admission_rate_per_s <= 0:
+        return None
+    return AdmissionController(
+        rate_per_s=config.admission_rate_per_s,
+        burst=config.admission_burst,
+        aging_s=config.admission_aging_s,
+    )
+
+
+async def admission_callback(callback_context, llm_request) -> None:
+    """``before_model_callback`` that queues the call by triage priority."""
+
+    del llm_request  # Admission only depends on the session's priority.
+    controller = admission_controller()
+    if controller is None:
+        return None
+    priority = triage_priority_level(callback_context.state)
+    waited = await controller.acquire(priority)
+    if waited > 1.0:
+        log_event(
+            "admission",
+            f"{callback_context.agent_name} waited {waited:.2f}s for model quota ({priority})",
+        )
+    return None
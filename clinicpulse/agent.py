@@ -1,20 +1,29 @@
 """Main agent orchestration for ClinicPulse AI."""
 
-import datetime
+import functools
 
 from google.adk.agents import Agent
-from google.adk.tools import FunctionTool
-
-from .config import config
-from .sub_agents import (
-    appointment_loop,
-    briefing_ensemble,
-    intake_loop,
-    lab_wait_loop,
-    triage_loop,
+
+from .agent_utils import (
+    after_agent_callbacks,
+    after_model_callbacks,
+    after_tool_callbacks,
+    before_model_callbacks,
+    before_tool_callbacks,
+    function_tool,
+    lazy_agent_attributes,
 )
+from .config import config, ensure_environment
+from .hedging import hedged_model
+from .prompts import static_instruction
+from .sub_agents.appointment import build_appointment_loop
+from .sub_agents.briefing import build_briefing_ensemble
+from .sub_agents.intake import build_intake_loop
+from .sub_agents.labs import build_lab_wait_loop
+from .sub_agents.triage import build_triage_loop
 from .tools import (
     book_appointment,
+    cancel_appointment,
     check_doctor_availability,
     fetch_patient_records,
     record_triage_decision,
@@ -23,20 +32,17 @@ from .tools import (
 )
 
 
-clinicpulse_agent = Agent(
-    name="clinicpulse_ai",
-    model=config.worker_model,
-    description="ClinicPulse AI orchestrates intake, triage, and clinician briefings for outpatient clinics.",
-    instruction=f"""
+ROOT_INSTRUCTION = """
     You are ClinicPulse AI, the digital flow manager for clinics. Always follow this pipeline:
 
     1. **Intake** – Delegate to `intake_loop` to collect patient demographics, symptoms, and duration.
        The intake agent will ask questions one at a time. Let it handle the conversation naturally.
        Only move to the next step when `patient_intake` state is complete.
        
-    2. **Triage** – Invoke `triage_loop` to prioritize the patient. Encourage the sub-agent to leverage Google Search and `record_triage_decision` when necessary.
+    2. **Triage** – Invoke `triage_loop` to prioritize the patient. Encourage the sub-agent to consult `search_clinical_guidelines` (the offline guideline index) and `record_triage_decision` when necessary.
     
     3. **Labs (Conditional)** – When diagnostics are pending, call `lab_wait_loop`. It keeps the workflow paused until `lab_results` are completed, showcasing long-running support. You may also call `wait_for_lab_results` to explicitly signal the pause.
+       If a message says the session was resumed from a lab-wait checkpoint, continue from the recorded stage.
     
     4. **Clinician Briefing** – Run `briefing_ensemble` to create a Markdown dossier using the `clinician_briefing` key.
     
@@ -53,27 +59,66 @@ clinicpulse_agent = Agent(
     - `wait_for_lab_results` for long-running lab workflows; let the user know you will resume once results are available.
     - `check_doctor_availability` to manually check available appointment slots.
     - `book_appointment` to manually book an appointment.
+    - `cancel_appointment` to cancel one; the slot goes to the best waitlisted patient.
     - `send_appointment_confirmation` to send confirmation to patients.
 
-    Always be concise, professional, and safety-conscious. Date reference: {datetime.datetime.now().strftime("%Y-%m-%d")}
-    """,
-    sub_agents=[
-        intake_loop,
-        triage_loop,
-        lab_wait_loop,
-        briefing_ensemble,
-        appointment_loop,
-    ],
-    tools=[
-        FunctionTool(fetch_patient_records),
-        FunctionTool(record_triage_decision),
-        FunctionTool(wait_for_lab_results),
-        FunctionTool(check_doctor_availability),
-        FunctionTool(book_appointment),
-        FunctionTool(send_appointment_confirmation),
-    ],
-    output_key="clinician_briefing",
-)
+    If any tool returns `"status": "degraded"`, it is temporarily unavailable: do not retry it in the same turn, continue with what you have, and list the missing information for the care team. If it returns `"status": "invalid_arguments"`, correct the arguments named in `reason` and call it again.
+
+    Always be concise, professional, and safety-conscious. Today's date and the current dossier
+    are given in the final `[Session context]` message.
+    """
+
+
+@functools.lru_cache(maxsize=None)
+def build_root_agent() -> Agent:
+    """Resolve the environment and build the full agent graph once."""
 
+    ensure_environment()
+    return Agent(
+        name="clinicpulse_ai",
+        model=hedged_model("clinicpulse_ai", config.worker_model),
+        description="ClinicPulse AI orchestrates intake, triage, and clinician briefings for outpatient clinics.",
+        instruction=static_instruction(ROOT_INSTRUCTION),
+        sub_agents=[
+            build_intake_loop(),
+            build_triage_loop(),
+            build_lab_wait_loop(),
+            build_briefing_ensemble(),
+            build_appointment_loop(),
+        ],
+        tools=[
+            function_tool(fetch_patient_records),
+            function_tool(record_triage_decision),
+            function_tool(wait_for_lab_results),
+            function_tool(check_doctor_availability),
+            function_tool(book_appointment),
+            function_tool(cancel_appointment),
+            function_tool(send_appointment_confirmation),
+        ],
+        output_key="clinician_briefing",
+        before_model_callback=before_model_callbacks(),
+        after_model_callback=after_model_callbacks(),
+        before_tool_callback=before_tool_callbacks(),
+        after_tool_callback=after_tool_callbacks(),
+        after_agent_callback=after_agent_callbacks(),
+    )
 
-root_agent = clinicpulse_agent
+
+def reset_agent_graph() -> None:
+    """Drop cached agents so the next access rebuilds them from ``config``."""
+
+    for builder in (
+        build_root_agent,
+        build_intake_loop,
+        build_triage_loop,
+        build_lab_wait_loop,
+        build_briefing_ensemble,
+        build_appointment_loop,
+    ):
+        builder.cache_clear()
+
+
+__getattr__ = lazy_agent_attributes(
+    __name__,
+    {"root_agent": build_root_agent, "clinicpulse_agent": build_root_agent},
+)
@@ -1,11 +1,93 @@
 """Utility helpers for ClinicPulse AI agents."""
 
+from typing import Any, Callable, Dict, List
+
 from google.adk.agents.callback_context import CallbackContext
+from google.adk.tools import FunctionTool
 from google.genai import types as genai_types
 
+from .accounting import (
+    accounting_after_agent,
+    accounting_after_model,
+    accounting_after_tool,
+    accounting_before_model,
+    accounting_before_tool,
+)
+from .admission import admission_callback
+from .model_routing import model_routing_callback
+from .prompts import prompt_assembly_callback
+from .recorder import (
+    recorder_after_agent,
+    recorder_after_model,
+    recorder_after_tool,
+    recorder_before_model,
+)
+from .tool_executor import offload
+
 
 def suppress_output_callback(callback_context: CallbackContext) -> genai_types.Content:
     """Placeholder callback mirroring blogger sample behavior."""
 
     del callback_context  # Unused placeholder parameter for now.
     return genai_types.Content()
+
+
+def before_model_callbacks(*prompt_callbacks: Callable[..., Any]) -> List[Callable[..., Any]]:
+    """Callbacks every LLM agent runs before a model call, in order.
+
+    ``prompt_callbacks`` extend the assembled prompt, after the session context.
+    """
+
+    return [
+        model_routing_callback,
+        prompt_assembly_callback,
+        *prompt_callbacks,
+        admission_callback,
+        recorder_before_model,
+        accounting_before_model,  # Last, so admission waits are not billed as latency.
+    ]
+
+
+def after_model_callbacks(*callbacks: Callable[..., Any]) -> List[Callable[..., Any]]:
+    """Observers first, so they see the raw response before ``callbacks`` rewrite it."""
+
+    return [accounting_after_model, recorder_after_model, *callbacks]
+
+
+def before_tool_callbacks() -> List[Callable[..., Any]]:
+    return [accounting_before_tool]
+
+
+def after_tool_callbacks() -> List[Callable[..., Any]]:
+    return [accounting_after_tool, recorder_after_tool]
+
+
+def after_agent_callbacks(*callbacks: Callable[..., Any]) -> List[Callable[..., Any]]:
+    """Observers first: ADK stops at the first callback that returns content."""
+
+    return [accounting_after_agent, recorder_after_agent, *callbacks]
+
+
+def function_tool(func: Callable[..., Any]) -> FunctionTool:
+    """``FunctionTool`` whose sync body runs in the bounded tool thread pool."""
+
+    return FunctionTool(offload(func))
+
+
+def lazy_agent_attributes(
+    module_name: str, builders: Dict[str, Callable[[], Any]]
+) -> Callable[[str], Any]:
+    """Return a module ``__getattr__`` that builds agents on first access.
+
+    Keeps ``from clinicpulse.sub_agents.intake import intake_loop`` working
+    while deferring construction until the attribute is actually used.
+    """
+
+    def __getattr__(name: str) -> Any:
+        try:
+            builder = builders[name]
+        except KeyError:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}") from None
+        return builder()
+
+    return __getattr__
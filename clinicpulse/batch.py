@@ -0,0 +1,238 @@
+"""Bounded-concurrency batch replay of scripted patient conversations."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO
+
+from .config import config
+from .logging_utils import log_event
+from .notifications import notifications
+from .runner_pool import run_bootstrap
+
+
+@dataclass
+class BatchSummary:
+    sessions: int = 0
+    ok: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "sessions": self.sessions,
+            "ok": self.ok,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+def read_conversations(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Parse JSONL rows of ``{"session_id"?, "user_id"?, "messages": [...], "state"?}``.
+
+    A malformed line does not stop the batch: it is yielded as a row with
+    ``invalid`` set to the reason, which ``run_batch`` reports as an error.
+    So is a row reusing an earlier row's ``session_id``, since running it
+    would share, and then delete, the other row's session.
+    """
+
+    seen_session_ids = set()
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            row, invalid = {}, f"line {line_number}: invalid JSON ({exc})"
+        else:
+            messages = row.get("messages") if isinstance(row, dict) else None
+            if not isinstance(row, dict):
+                row, invalid = {}, f"line {line_number}: expected a JSON object"
+            elif not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+                invalid = f"line {line_number}: 'messages' must be a list of strings"
+            elif not isinstance(row.get("session_id", ""), str):
+                invalid = f"line {line_number}: 'session_id' must be a string"
+            elif row.get("session_id") in seen_session_ids:
+                invalid = f"line {line_number}: duplicate session_id {row['session_id']!r}"
+            else:
+                invalid = None
+                if "session_id" in row:
+                    seen_session_ids.add(row["session_id"])
+        if invalid is not None:
+            row["invalid"] = invalid
+        row.setdefault("session_id", f"batch-{line_number}-{uuid.uuid4().hex[:8]}")
+        row.setdefault("user_id", "batch_user")
+        row["line"] = line_number
+        yield row
+
+
+async def _run_conversation(
+    runner, session_service, app_name: str, conversation: Dict[str, Any], result: Dict[str, Any]
+) -> None:
+    from google.genai import types as genai_types
+
+    user_id, session_id = conversation["user_id"], conversation["session_id"]
+    await session_service.create_session(
+        app_name=app_name,
+        user_id=user_id,
+        session_id=session_id,
+        state=conversation.get("state"),
+    )
+    for text in conversation["messages"]:
+        started = time.perf_counter()
+        reply = None
+        async for event in runner.run_async(
+            user_id=user_id,
+            session_id=session_id,
+            new_message=genai_types.Content(
+                role="user", parts=[genai_types.Part.from_text(text=text)]
+            ),
+        ):
+            if event.is_final_response() and event.content and event.content.parts:
+                reply = event.content.parts[0].text
+        result["turns"].append(
+            {
+                "message": text,
+                "reply": reply,
+                "latency_s": round(time.perf_counter() - started, 4),
+            }
+        )
+
+
+async def run_batch(
+    conversations: Iterable[Dict[str, Any]],
+    output: TextIO,
+    *,
+    concurrency: Optional[int] = None,
+    session_timeout_s: Optional[float] = None,
+    runner=None,
+    session_service=None,
+    app_name: str = "clinicpulse",
+) -> BatchSummary:
+    """Replay conversations through the Runner, streaming one JSONL row each.
+
+    At most ``concurrency`` sessions run at once; each session is cancelled
+    after ``session_timeout_s``. Rows are written as sessions finish, so the
+    output order follows completion, not input order. A finished session is
+    deleted and its patient leaves the waiting room.
+    """
+
+    concurrency = concurrency or config.batch_concurrency
+    session_timeout_s = session_timeout_s or config.batch_session_timeout_s
+    if session_service is None:
+        from .session_cache import SpillingSessionService
+
+        session_service = SpillingSessionService()
+    if runner is None:
+        from google.adk.runners import Runner
+
+        from .agent import root_agent
+
+        runner = Runner(agent=root_agent, app_name=app_name, session_service=session_service)
+
+    from .waiting_room import waiting_room
+
+    summary = BatchSummary()
+    source = iter(conversations)
+    started = time.perf_counter()
+
+    async def worker() -> None:
+        # Workers pull lazily so large inputs are never fully materialised.
+        for conversation in source:
+            result: Dict[str, Any] = {
+                "session_id": conversation["session_id"],
+                "user_id": conversation["user_id"],
+                "line": conversation.get("line"),
+                "status": "ok",
+                "turns": [],
+            }
+            session_started = time.perf_counter()
+            if "invalid" in conversation:
+                result["status"] = "error"
+                result["error"] = conversation["invalid"]
+            else:
+                try:
+                    await asyncio.wait_for(
+                        _run_conversation(runner, session_service, app_name, conversation, result),
+                        timeout=session_timeout_s,
+                    )
+                except asyncio.TimeoutError:
+                    result["status"] = "timeout"
+                    result["error"] = f"session exceeded {session_timeout_s}s"
+                except Exception as exc:  # Record and keep replaying other sessions.
+                    result["status"] = "error"
+                    result["error"] = f"{type(exc).__name__}: {exc}"
+
+            # An invalid row never created a session; don't touch one that shares its id.
+            session = None if "invalid" in conversation else await session_service.get_session(
+                app_name=app_name,
+                user_id=conversation["user_id"],
+                session_id=conversation["session_id"],
+            )
+            result["final_state_keys"] = sorted(session.state) if session else []
+            result["elapsed_s"] = round(time.perf_counter() - session_started, 4)
+            if session is not None:
+                waiting_room.end_session(session.state)
+                await session_service.delete_session(
+                    app_name=app_name, user_id=session.user_id, session_id=session.id
+                )
+
+            output.write(json.dumps(result, default=str) + "\n")
+            output.flush()
+            summary.sessions += 1
+            if result["status"] == "ok":
+                summary.ok += 1
+            elif result["status"] == "timeout":
+                summary.timeouts += 1
+            else:
+                summary.errors += 1
+            log_event("batch", f"session {result['session_id']} {result['status']}")
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    summary.seconds = time.perf_counter() - started
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay scripted ClinicPulse conversations.")
+    parser.add_argument("--input", required=True, help="JSONL file of conversations")
+    parser.add_argument("--output", default="-", help="JSONL results file ('-' for stdout)")
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=None, help="Per-session timeout (s)")
+    parser.add_argument(
+        "--bootstrap",
+        default=None,
+        help="module:function to call before the Runner is built",
+    )
+    args = parser.parse_args()
+
+    run_bootstrap(args.bootstrap)
+    notifications.start()
+    with open(args.input, encoding="utf-8") as source:
+        output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+        try:
+            summary = asyncio.run(
+                run_batch(
+                    read_conversations(source),
+                    output,
+                    concurrency=args.concurrency,
+                    session_timeout_s=args.timeout,
+                )
+            )
+        finally:
+            notifications.stop()
+            if output is not sys.stdout:
+                output.close()
+    print(json.dumps(summary.as_dict()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Hybrid clinician briefing: templated fact sections plus the model's narrative."""
+
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional
+
+from .metrics import metrics
+from .prompts import is_session_context
+
+BRIEFING_FACTS_HEADER = "[Briefing facts]"
+FACT_SECTIONS = ("Overview", "Vitals/History")
+NARRATIVE_SECTIONS = ("Risk Flags", "Next Steps")
+INTAKE_FIELDS = ("patient_id", "symptoms", "duration", "history")
+# State keys the fact sections are rendered from.
+FACT_INPUTS = ("patient_intake", "triage_priority", "lab_results")
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+_HEADING = re.compile(r"^\s*#{1,6}\s*(.+?)\s*#*\s*$", re.MULTILINE)
+
+
+def _as_dict(value: Any) -> Dict[str, Any]:
+    """State values may be dicts, JSON strings (possibly fenced), or free text."""
+
+    if isinstance(value, Mapping):
+        return dict(value)
+    if not isinstance(value, str) or not value.strip():
+        return {}
+    try:
+        parsed = json.loads(_FENCE.sub("", value.strip()))
+    except ValueError:
+        return {"summary": value.strip()}
+    return parsed if isinstance(parsed, dict) else {"summary": value.strip()}
+
+
+def _or_unknown(value: Any) -> str:
+    return str(value).strip() if value not in (None, "") else "not recorded"
+
+
+def patient_record(patient_id: Optional[str]) -> Dict[str, Any]:
+    if not patient_id:
+        return {}
+    from .tools import fetch_patient_records
+
+    return fetch_patient_records(patient_id)
+
+
+def render_overview(state: Mapping[str, Any]) -> str:
+    intake = _as_dict(state.get("patient_intake"))
+    triage = _as_dict(state.get("triage_priority"))
+    labs = _as_dict(state.get("lab_results"))
+    lines = [
+        f"- **Patient:** {_or_unknown(intake.get('patient_id') or triage.get('patient_id'))}",
+        f"- **Presenting complaint:** {_or_unknown(intake.get('symptoms') or intake.get('summary'))}"
+        f" (duration: {_or_unknown(intake.get('duration'))})",
+    ]
+    if triage:
+        priority = triage.get("priority_level") or "not recorded"
+        rationale = triage.get("rationale") or triage.get("summary")
+        lines.append(f"- **Triage priority:** {priority}" + (f" — {rationale}" if rationale else ""))
+    else:
+        lines.append("- **Triage priority:** not yet triaged")
+    if labs:
+        summary = labs.get("lab_summary") or labs.get("summary") or json.dumps(labs, sort_keys=True)
+        lines.append(f"- **Labs:** {summary}")
+    missing = [name for name in INTAKE_FIELDS if not intake.get(name)] if intake else list(INTAKE_FIELDS)
+    if missing:
+        lines.append(f"- **Missing intake information:** {', '.join(missing)}")
+    return "\n".join(lines)
+
+
+def render_vitals_history(state: Mapping[str, Any], record: Mapping[str, Any]) -> str:
+    intake = _as_dict(state.get("patient_intake"))
+    lines = []
+    vitals = record.get("recent_vitals") if record.get("status") != "degraded" else None
+    if vitals:
+        lines.append(
+            f"- **Recent vitals (EHR, last visit {_or_unknown(record.get('last_visit'))}):** "
+            f"BP {_or_unknown(vitals.get('bp'))}, HR {_or_unknown(vitals.get('hr'))}, "
+            f"temperature {_or_unknown(vitals.get('temp_c'))} °C"
+        )
+        # The EHR never carries respiratory rate, SpO2 or consciousness, so
+        # the briefing cannot score NEWS2 itself; triage scores it with intake.
+        from .vital_scores import CORE_PARAMETERS, observations_from_record
+
+        observations = observations_from_record(record)
+        missing = [name for name in CORE_PARAMETERS if observations.get(name) is None]
+        lines.append(
+            f"- **NEWS2:** not scored — missing {', '.join(missing)} "
+            "(a partial total understates risk)"
+        )
+        lines.append(f"- **Known conditions (EHR):** {_or_unknown(record.get('known_conditions'))}")
+    else:
+        lines.append("- **EHR:** unavailable — vitals and recorded conditions not retrieved")
+    lines.append(f"- **Reported history:** {_or_unknown(intake.get('history'))}")
+    return "\n".join(lines)
+
+
+def render_facts(state: Mapping[str, Any], record: Mapping[str, Any]) -> str:
+    """The deterministic sections, in briefing order."""
+
+    return (
+        f"## Overview\n{render_overview(state)}\n\n"
+        f"## Vitals/History\n{render_vitals_history(state, record)}"
+    )
+
+
+def narrative_sections(text: str) -> Dict[str, str]:
+    """Risk Flags / Next Steps bodies from the model's Markdown.
+
+    Other sections the model writes anyway are dropped (the templated ones
+    win); text with no recognised headings is kept under Risk Flags.
+    """
+
+    sections: Dict[str, str] = {}
+    headings = list(_HEADING.finditer(text))
+    for i, heading in enumerate(headings):
+        title = heading.group(1).strip().lower()
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+        body = text[heading.end():end].strip()
+        for name in NARRATIVE_SECTIONS:
+            if title.startswith(name.lower().split()[0]) and body:
+                sections.setdefault(name, body)
+    if not sections and not headings and text.strip():
+        sections[NARRATIVE_SECTIONS[0]] = text.strip()
+    return sections
+
+
+def render_briefing(facts: str, narrative: str) -> str:
+    """Templated facts followed by the model's narrative sections."""
+
+    sections = narrative_sections(narrative)
+    parts = [facts]
+    for name in NARRATIVE_SECTIONS:
+        parts.append(f"## {name}\n{sections.get(name, '_Not provided._')}")
+    return "\n\n".join(parts)
+
+
+class FactsCache:
+    """Rendered facts per invocation and input state, so the prompt and the merge agree.
+
+    The key includes a digest of ``FACT_INPUTS``: a later loop iteration
+    that changed intake, triage, or labs re-renders instead of reusing the
+    first iteration's facts.
+    """
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, context: Any) -> str:
+        state = context.state
+        inputs = json.dumps([state.get(name) for name in FACT_INPUTS], sort_keys=True, default=str)
+        digest = hashlib.sha256(inputs.encode("utf-8")).hexdigest()[:16]
+        key = f"{context.invocation_id}/{context.agent_name}/{digest}"
+        with self._lock:
+            facts = self._entries.get(key)
+        if facts is None:
+            intake = _as_dict(state.get("patient_intake"))
+            triage = _as_dict(state.get("triage_priority"))
+            record = patient_record(intake.get("patient_id") or triage.get("patient_id"))
+            facts = render_facts(state, record)
+            with self._lock:
+                self._entries[key] = facts
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return facts
+
+
+facts_cache = FactsCache()
+
+
+def briefing_facts_callback(callback_context, llm_request) -> None:
+    """``before_model_callback``: show the model the sections it must not write."""
+
+    from google.genai import types as genai_types
+
+    part = genai_types.Part.from_text(
+        text=f"{BRIEFING_FACTS_HEADER}\n{facts_cache.get(callback_context)}"
+    )
+    last = llm_request.contents[-1] if llm_request.contents else None
+    if last is not None and is_session_context(last):
+        last.parts.append(part)
+    else:
+        llm_request.contents.append(genai_types.Content(role="user", parts=[part]))
+    return None
+
+
+def briefing_merge_callback(callback_context, llm_response) -> Optional[Any]:
+    """``after_model_callback``: replace the narrative with the full briefing.
+
+    Tool-call turns and partial stream chunks pass through untouched.
+    """
+
+    content = llm_response.content
+    if llm_response.partial or content is None or not content.parts:
+        return None
+    if any(part.function_call for part in content.parts):
+        return None
+    narrative = "".join(part.text or "" for part in content.parts if not part.thought)
+    if not narrative.strip():
+        return None
+
+    from google.genai import types as genai_types
+
+    facts = facts_cache.get(callback_context)
+    briefing = render_briefing(facts, narrative)
+    metrics.histogram("briefing_model_chars").observe(len(narrative))
+    metrics.histogram("briefing_templated_chars").observe(len(facts))
+    return llm_response.model_copy(
+        update={
+            "content": genai_types.Content(
+                role="model", parts=[genai_types.Part.from_text(text=briefing)]
+            )
+        }
+    )
@@ -0,0 +1,294 @@
+"""Durable suspend/resume checkpoints for long-running lab waits."""
+
+import hashlib
+import json
+import os
+import pathlib
+import time
+import zlib
+from contextlib import aclosing
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncGenerator, Dict, Iterator, Optional, Tuple
+
+from google.adk.agents import LoopAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+
+from .config import config
+from .logging_utils import log_event
+from .metrics import metrics
+from .notifications import notifications
+
+PIPELINE_POSITION_KEY = "pipeline_position"
+LAB_WAIT_STAGE = "lab_wait_loop"
+
+
+@dataclass
+class PipelinePosition:
+    """Where in the root pipeline a session was parked."""
+
+    stage: str
+    iteration: int = 0
+
+
+@dataclass
+class Checkpoint:
+    """Everything needed to rebuild a parked session without its history."""
+
+    app_name: str
+    user_id: str
+    session_id: str
+    position: PipelinePosition
+    state: Dict[str, Any] = field(default_factory=dict)
+    patient_id: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+    def to_bytes(self) -> bytes:
+        return zlib.compress(json.dumps(asdict(self), default=str).encode("utf-8"))
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "Checkpoint":
+        data = json.loads(zlib.decompress(payload))
+        data["position"] = PipelinePosition(**data["position"])
+        return cls(**data)
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def _atomic_write(path: pathlib.Path, payload: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_bytes(payload)
+    os.replace(tmp_path, path)
+
+
+class CheckpointStore:
+    """One compressed file per parked session plus a patient_id index.
+
+    Lookups by session key or patient_id touch exactly one or two small
+    files, so resume cost does not grow with the number of parked patients.
+    """
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        self.root = pathlib.Path(root or config.checkpoint_dir)
+
+    def _session_path(self, app_name: str, user_id: str, session_id: str) -> pathlib.Path:
+        digest = _digest(app_name, user_id, session_id)
+        return self.root / "sessions" / digest[:2] / f"{digest[2:32]}.ckpt"
+
+    def _patient_path(self, patient_id: str) -> pathlib.Path:
+        digest = _digest(patient_id.strip().lower())
+        return self.root / "patients" / digest[:2] / f"{digest[2:32]}.json"
+
+    def save(self, checkpoint: Checkpoint) -> None:
+        _atomic_write(
+            self._session_path(checkpoint.app_name, checkpoint.user_id, checkpoint.session_id),
+            checkpoint.to_bytes(),
+        )
+        if checkpoint.patient_id:
+            key = [checkpoint.app_name, checkpoint.user_id, checkpoint.session_id]
+            _atomic_write(
+                self._patient_path(checkpoint.patient_id), json.dumps(key).encode("utf-8")
+            )
+
+    def load(self, app_name: str, user_id: str, session_id: str) -> Optional[Checkpoint]:
+        try:
+            payload = self._session_path(app_name, user_id, session_id).read_bytes()
+        except FileNotFoundError:
+            return None
+        return Checkpoint.from_bytes(payload)
+
+    def find_by_patient(self, patient_id: str) -> Optional[Tuple[str, str, str]]:
+        try:
+            app_name, user_id, session_id = json.loads(
+                self._patient_path(patient_id).read_bytes()
+            )
+        except FileNotFoundError:
+            return None
+        return app_name, user_id, session_id
+
+    def delete(self, checkpoint: Checkpoint) -> None:
+        """Remove the checkpoint, and the patient pointer if it still names it.
+
+        A later session parked for the same patient overwrites the pointer;
+        deleting this older checkpoint must not orphan that one.
+        """
+
+        self._session_path(
+            checkpoint.app_name, checkpoint.user_id, checkpoint.session_id
+        ).unlink(missing_ok=True)
+        if not checkpoint.patient_id:
+            return
+        key = (checkpoint.app_name, checkpoint.user_id, checkpoint.session_id)
+        if self.find_by_patient(checkpoint.patient_id) == key:
+            self._patient_path(checkpoint.patient_id).unlink(missing_ok=True)
+
+    def parked(self) -> Iterator[Checkpoint]:
+        for path in (self.root / "sessions").glob("*/*.ckpt"):
+            yield Checkpoint.from_bytes(path.read_bytes())
+
+
+class CheckpointedLoopAgent(LoopAgent):
+    """``LoopAgent`` whose iteration count survives a checkpoint resume.
+
+    A resumed session continues in a new invocation, where a plain
+    ``LoopAgent`` would start counting from zero and grant a fresh
+    ``max_iterations``. This one adopts the parked iteration from
+    ``pipeline_position`` and only runs the iterations that are left.
+    """
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        position = ctx.session.state.get(PIPELINE_POSITION_KEY)
+        if not (
+            hasattr(position, "get")
+            and position.get("resumed")
+            and position.get("stage") == self.name
+        ):
+            async with aclosing(super()._run_async_impl(ctx)) as events:
+                async for event in events:
+                    yield event
+            return
+
+        times_looped = int(position.get("iteration", 0))
+        # Claim the count for this invocation so the validators continue it.
+        yield Event(
+            author=self.name,
+            actions=EventActions(
+                state_delta={
+                    PIPELINE_POSITION_KEY: {
+                        "stage": self.name,
+                        "iteration": times_looped,
+                        "invocation_id": ctx.invocation_id,
+                    }
+                }
+            ),
+        )
+        log_event("checkpoint", f"{self.name} resumed after iteration {times_looped}")
+        while not self.max_iterations or times_looped < self.max_iterations:
+            for sub_agent in self.sub_agents:
+                async with aclosing(sub_agent.run_async(ctx)) as events:
+                    async for event in events:
+                        yield event
+                        if event.actions.escalate:
+                            return
+            times_looped += 1
+
+
+def _patient_id_from_state(state: Dict[str, Any]) -> Optional[str]:
+    for key in ("patient_intake", "triage_priority", "lab_results"):
+        value = state.get(key)
+        if hasattr(value, "get") and value.get("patient_id"):
+            return str(value["patient_id"])
+    return None
+
+
+async def suspend_if_waiting(session_service, session, store: CheckpointStore) -> Optional[Checkpoint]:
+    """Checkpoint and drop a session that is parked on lab results.
+
+    Call after a turn completes. Returns the checkpoint when the session was
+    suspended, ``None`` when it is not waiting on labs.
+    """
+
+    position = session.state.get(PIPELINE_POSITION_KEY)
+    if not hasattr(position, "get") or position.get("stage") != LAB_WAIT_STAGE:
+        return None
+    if session.state.get("lab_results"):
+        return None
+
+    state = {k: v for k, v in session.state.items() if not k.startswith("temp:")}
+    checkpoint = Checkpoint(
+        app_name=session.app_name,
+        user_id=session.user_id,
+        session_id=session.id,
+        position=PipelinePosition(
+            stage=position["stage"], iteration=int(position.get("iteration", 0))
+        ),
+        state=state,
+        patient_id=_patient_id_from_state(state),
+    )
+    store.save(checkpoint)
+    await session_service.delete_session(
+        app_name=session.app_name, user_id=session.user_id, session_id=session.id
+    )
+
+    metrics.counter("lab_wait_suspended_total").inc()
+    log_event(
+        "checkpoint",
+        f"suspended at {checkpoint.position.stage} iteration={checkpoint.position.iteration}",
+        checkpoint.patient_id,
+    )
+    return checkpoint
+
+
+async def resume_session(
+    session_service,
+    store: CheckpointStore,
+    *,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    lab_results: Dict[str, Any],
+):
+    """Recreate a parked session with ``lab_results`` merged into its dossier.
+
+    Returns ``(session, checkpoint)`` or ``None`` when nothing was parked.
+    Send :func:`resume_message` as the next user turn to continue the flow.
+    """
+
+    started = time.perf_counter()
+    checkpoint = store.load(app_name, user_id, session_id)
+    if checkpoint is None:
+        return None
+
+    state = dict(checkpoint.state)
+    state["lab_results"] = lab_results
+    state[PIPELINE_POSITION_KEY] = {**asdict(checkpoint.position), "resumed": True}
+    session = await session_service.create_session(
+        app_name=app_name, user_id=user_id, state=state, session_id=session_id
+    )
+    store.delete(checkpoint)
+
+    metrics.counter("lab_wait_resumed_total").inc()
+    metrics.histogram("lab_wait_resume_seconds").observe(time.perf_counter() - started)
+    log_event("checkpoint", f"resumed at {checkpoint.position.stage}", checkpoint.patient_id)
+    return session, checkpoint
+
+
+async def resume_patient(
+    session_service, store: CheckpointStore, patient_id: str, lab_results: Dict[str, Any]
+):
+    """Resume whichever session is parked for ``patient_id``."""
+
+    key = store.find_by_patient(patient_id)
+    if key is None:
+        return None
+    app_name, user_id, session_id = key
+    resumed = await resume_session(
+        session_service,
+        store,
+        app_name=app_name,
+        user_id=user_id,
+        session_id=session_id,
+        lab_results=lab_results,
+    )
+    if resumed is not None:
+        notifications.submit(
+            patient_id,
+            "lab_ready",
+            "Your lab results are in; your care team will follow up shortly.",
+            key=f"lab_ready:{session_id}",
+        )
+    return resumed
+
+
+def resume_message(checkpoint: Checkpoint) -> str:
+    """User-turn text that tells the orchestrator to continue after labs."""
+
+    return (
+        f"Lab results are now available for patient {checkpoint.patient_id or 'UNKNOWN'}. "
+        f"This session was resumed from a lab-wait checkpoint at stage "
+        f"`{checkpoint.position.stage}` (iteration {checkpoint.position.iteration}); "
+        "continue the pipeline from there."
+    )
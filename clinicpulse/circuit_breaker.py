@@ -0,0 +1,217 @@
+"""Per-tool circuit breakers with structured degraded fallbacks."""
+
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from .config import CircuitBreakerPolicy, config
+from .logging_utils import log_event
+from .metrics import metrics
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Failures that say the dependency is unhealthy; only these count towards tripping.
+# Not all of OSError: a FileNotFoundError or PermissionError comes from the input.
+INFRASTRUCTURE_ERRORS = (
+    TimeoutError,
+    asyncio.TimeoutError,
+    concurrent.futures.TimeoutError,
+    ConnectionError,
+)
+# Bad arguments from the model: reported back to it, never counted.
+ARGUMENT_ERRORS = (ValueError, KeyError, TypeError)
+
+
+class CircuitBreaker:
+    """Trips on error rate or slow-call rate over a rolling window of calls.
+
+    ``closed`` passes calls through and records outcomes. When either rate
+    crosses its threshold the breaker goes ``open`` and rejects calls for
+    ``open_s`` seconds, then ``half_open`` lets a few probe calls through:
+    all probes succeeding closes it again, any failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        policy: Optional[CircuitBreakerPolicy] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.policy = policy or config.circuit_breaker_policy
+        self.clock = clock
+        self.state = CLOSED
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=self.policy.window)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+        metrics.gauge("circuit_breaker_state", tool=name).set(_STATE_VALUES[CLOSED])
+
+    def _transition(self, new_state: str) -> None:
+        old_state, self.state = self.state, new_state
+        if new_state == OPEN:
+            self._opened_at = self.clock()
+        if new_state in (OPEN, CLOSED):
+            self._outcomes.clear()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        metrics.gauge("circuit_breaker_state", tool=self.name).set(_STATE_VALUES[new_state])
+        metrics.counter(
+            "circuit_breaker_transitions_total", tool=self.name, to=new_state
+        ).inc()
+        log_event("circuit_breaker", f"{self.name}: {old_state} -> {new_state}")
+
+    def retry_after_s(self) -> float:
+        return max(0.0, self.policy.open_s - (self.clock() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Whether a call may proceed now (reserves a probe when half-open)."""
+
+        with self._lock:
+            if self.state == OPEN:
+                if self.retry_after_s() > 0:
+                    metrics.counter("circuit_breaker_rejections_total", tool=self.name).inc()
+                    return False
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probes_in_flight >= self.policy.half_open_probes:
+                    metrics.counter("circuit_breaker_rejections_total", tool=self.name).inc()
+                    return False
+                self._probes_in_flight += 1
+            return True
+
+    def release(self) -> None:
+        """Give back a call's slot without recording an outcome."""
+
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes_in_flight:
+                self._probes_in_flight -= 1
+
+    def record(self, success: bool, latency_s: float) -> None:
+        slow = latency_s >= self.policy.slow_call_s
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if not success or slow:
+                    self._transition(OPEN)
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.policy.half_open_probes:
+                    self._transition(CLOSED)
+                return
+
+            self._outcomes.append((success, slow))
+            calls = len(self._outcomes)
+            if calls < self.policy.min_calls:
+                return
+            failure_rate = sum(1 for ok, _ in self._outcomes if not ok) / calls
+            slow_rate = sum(1 for _, was_slow in self._outcomes if was_slow) / calls
+            if (
+                failure_rate >= self.policy.failure_rate_threshold
+                or slow_rate >= self.policy.slow_rate_threshold
+            ):
+                self._transition(OPEN)
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def breaker_for(name: str) -> CircuitBreaker:
+    with _REGISTRY_LOCK:
+        breaker = _BREAKERS.get(name)
+        if breaker is None:
+            breaker = _BREAKERS[name] = CircuitBreaker(name)
+        return breaker
+
+
+def degraded_result(tool_name: str, reason: str, retry_after_s: float = 0.0) -> Dict[str, Any]:
+    """Structured fallback returned instead of raising into the agent."""
+
+    return {
+        "status": "degraded",
+        "tool": tool_name,
+        "reason": reason,
+        "retry_after_s": round(retry_after_s, 1),
+        "message": (
+            f"{tool_name} is temporarily unavailable. Continue without it and "
+            "flag the missing information for the care team."
+        ),
+    }
+
+
+def invalid_arguments_result(tool_name: str, exc: Exception) -> Dict[str, Any]:
+    """Fallback for a call the tool rejected; the tool itself is healthy."""
+
+    return {
+        "status": "invalid_arguments",
+        "tool": tool_name,
+        "reason": f"{type(exc).__name__}: {exc}",
+        "message": f"{tool_name} rejected these arguments. Check them and call it again.",
+    }
+
+
+def _failed(name: str, breaker: CircuitBreaker, exc: Exception, latency_s: float) -> Dict[str, Any]:
+    """Record (or not) a failed call and build the result the agent sees."""
+
+    log_event("circuit_breaker", f"{name} failed: {type(exc).__name__}: {exc}")
+    if isinstance(exc, INFRASTRUCTURE_ERRORS):
+        breaker.record(False, latency_s)
+        return degraded_result(name, f"{type(exc).__name__}")
+    breaker.release()
+    metrics.counter("circuit_breaker_ignored_errors_total", tool=name, error=type(exc).__name__).inc()
+    if isinstance(exc, ARGUMENT_ERRORS):
+        return invalid_arguments_result(name, exc)
+    return degraded_result(name, f"{type(exc).__name__}")
+
+
+def circuit_breaker(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Guard a tool with its own breaker; keeps the signature for FunctionTool.
+
+    Only ``INFRASTRUCTURE_ERRORS`` count towards tripping. ``ARGUMENT_ERRORS``
+    come back as ``invalid_arguments`` and other bugs as ``degraded``,
+    neither affecting the breaker.
+    """
+
+    name = func.__name__
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            breaker = breaker_for(name)
+            if not breaker.allow():
+                return degraded_result(name, "circuit open", breaker.retry_after_s())
+            started = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as exc:
+                return _failed(name, breaker, exc, time.perf_counter() - started)
+            breaker.record(True, time.perf_counter() - started)
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        breaker = breaker_for(name)
+        if not breaker.allow():
+            return degraded_result(name, "circuit open", breaker.retry_after_s())
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as exc:
+            return _failed(name, breaker, exc, time.perf_counter() - started)
+        breaker.record(True, time.perf_counter() - started)
+        return result
+
+    return wrapper
@@ -1,16 +1,29 @@
 """Configuration for ClinicPulse AI agents."""
 
+import functools
 import os
 import warnings
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
 
-import google.auth
-from google.auth import exceptions as google_auth_exceptions
+
+@functools.lru_cache(maxsize=None)
+def ensure_environment() -> None:
+    """Resolve Vertex AI / AI Studio environment defaults once per process.
+
+    Credential discovery can probe the metadata server, so it runs lazily
+    the first time the agent graph is built instead of at import time.
+    """
+
+    _configure_environment_defaults()
 
 
 def _configure_environment_defaults() -> None:
     """Attempt to configure Vertex AI defaults but allow local fallback."""
 
+    import google.auth
+    from google.auth import exceptions as google_auth_exceptions
+
     use_vertex = os.environ.get("GOOGLE_GENAI_USE_VERTEXAI", "True")
     os.environ.setdefault("GOOGLE_GENAI_USE_VERTEXAI", use_vertex)
 
@@ -37,7 +50,98 @@ def _configure_environment_defaults() -> None:
     os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "global")
 
 
-_configure_environment_defaults()
+@dataclass
+class ModelCallPolicy:
+    """Timeout, hedging, and retry knobs for one agent's model calls."""
+
+    # Adaptive timeout: multiplier x observed percentile, clamped to bounds.
+    timeout_percentile: float = 99.0
+    timeout_multiplier: float = 2.0
+    initial_timeout_s: float = 60.0
+    min_timeout_s: float = 5.0
+    max_timeout_s: float = 120.0
+    # Hedging: send a duplicate once the primary is slower than this percentile.
+    hedge: bool = False
+    hedge_percentile: float = 95.0
+    # Percentiles are only trusted after this many observed calls.
+    min_samples: int = 20
+    # Retries with full-jitter exponential backoff.
+    max_retries: int = 2
+    backoff_base_s: float = 0.5
+    backoff_max_s: float = 8.0
+
+
+@dataclass
+class CircuitBreakerPolicy:
+    """Trip thresholds for the per-tool circuit breakers."""
+
+    # Rolling window of recent calls the rates are computed over.
+    window: int = 20
+    min_calls: int = 5
+    failure_rate_threshold: float = 0.5
+    # Calls slower than slow_call_s count towards the slow-call rate.
+    slow_call_s: float = 5.0
+    slow_rate_threshold: float = 0.8
+    # Seconds spent open before half-open probe calls are let through.
+    open_s: float = 30.0
+    half_open_probes: int = 1
+
+
+@dataclass
+class ModelRoutingPolicy:
+    """Model tiers and the per-call signals that move an agent between them."""
+
+    enabled: bool = True
+    # Ordered cheapest first; each escalation signal moves one tier up.
+    tiers: Dict[str, str] = field(
+        default_factory=lambda: {
+            "fast": "gemini-2.5-flash-lite",
+            "standard": "gemini-2.5-flash",
+        }
+    )
+    # Starting tier per agent; unlisted agents keep their configured model.
+    agent_tiers: Dict[str, str] = field(
+        default_factory=lambda: {
+            "intake_collector": "fast",
+            "lab_requester": "fast",
+            "appointment_scheduler": "fast",
+        }
+    )
+    # Input heuristics: long turns or red-flag symptoms need the larger tier.
+    complex_input_chars: int = 600
+    red_flag_terms: Tuple[str, ...] = (
+        "chest pain",
+        "shortness of breath",
+        "can't breathe",
+        "unconscious",
+        "seizure",
+        "stroke",
+        "severe bleeding",
+        "suicid",
+        "overdose",
+        "anaphyla",
+    )
+    escalate_priorities: Tuple[str, ...] = ("Critical", "Urgent")
+    # Validator failures within the same invocation before escalating.
+    escalate_after_failures: int = 1
+
+    def tier_of(self, model: Optional[str]) -> str:
+        for tier, tier_model in self.tiers.items():
+            if tier_model == model:
+                return tier
+        return "default"
+
+
+@dataclass
+class ContextCachePolicy:
+    """Explicit provider-side caching of the stable prompt prefix."""
+
+    enabled: bool = False
+    ttl_s: int = 3600
+    # Recreate a handle this long before it expires.
+    refresh_margin_s: float = 60.0
+    # Providers reject caches below a minimum token count; skip small prefixes.
+    min_prefix_chars: int = 8192
 
 
 @dataclass
@@ -48,6 +152,69 @@ class AgentConfiguration:
     critic_model: str = "gemini-2.5-flash"
         # critic_model: str = "gemini-2.5-pro"
     guideline_search_iterations: int = 3
+    # Session cache: resident byte budget before idle sessions spill to disk.
+    session_cache_bytes: int = 256 * 1024 * 1024
+    session_spill_dir: str = ".clinicpulse/sessions"
+    # Sessions untouched this long are spilled even under budget; 0 disables.
+    session_idle_s: float = 900.0
+    # Lab-wait checkpoints written when a session is suspended on labs.
+    checkpoint_dir: str = ".clinicpulse/checkpoints"
+    # Worker processes started by clinicpulse.runner_pool.
+    runner_pool_workers: int = field(default_factory=lambda: os.cpu_count() or 1)
+    # How often the pool checks for crashed workers (their requests then fail).
+    runner_pool_health_interval_s: float = 1.0
+    # Scripted conversation replay (clinicpulse.batch).
+    batch_concurrency: int = 8
+    batch_session_timeout_s: float = 300.0
+    # Admission control in front of model calls (clinicpulse.admission).
+    # Per-process calls per second, 0 = unlimited (off). Under the runner pool
+    # set it to the provider quota divided by the number of workers.
+    admission_rate_per_s: float = 0.0
+    admission_burst: int = 20
+    admission_aging_s: float = 30.0
+    # Waiting-room queue: seconds of waiting that equal one priority level.
+    waiting_room_aging_s: float = 900.0
+    # Per-agent model-call policies (clinicpulse.hedging); others use the default.
+    default_model_call_policy: ModelCallPolicy = field(default_factory=ModelCallPolicy)
+    model_call_policies: Dict[str, ModelCallPolicy] = field(
+        default_factory=lambda: {
+            "intake_collector": ModelCallPolicy(hedge=True),
+            "triage_coordinator": ModelCallPolicy(hedge=True),
+        }
+    )
+    # Per-call model tier selection (clinicpulse.model_routing).
+    model_routing: ModelRoutingPolicy = field(default_factory=ModelRoutingPolicy)
+    # Explicit context caching of instruction + tool prefixes (clinicpulse.prompts).
+    context_cache: ContextCachePolicy = field(default_factory=ContextCachePolicy)
+    # Per-agent token/latency accounting store; empty disables (clinicpulse.accounting).
+    accounting_db: str = ".clinicpulse/accounting.sqlite3"
+    # Directory for per-session recordings replayed by clinicpulse.replay; empty disables.
+    record_sessions_dir: str = ""
+    # Threads that run synchronous tools off the event loop (clinicpulse.tool_executor).
+    tool_executor_workers: int = 16
+    # Circuit breakers around tools (clinicpulse.circuit_breaker).
+    circuit_breaker_policy: CircuitBreakerPolicy = field(default_factory=CircuitBreakerPolicy)
+    # Offline guideline corpus and its BM25 index (clinicpulse.guidelines).
+    guideline_corpus_dir: str = os.path.join(os.path.dirname(__file__), "data", "guidelines")
+    guideline_index_dir: str = ".clinicpulse/guidelines"
+    guideline_top_k: int = 3
+    # Patient identity index snapshot (clinicpulse.identity); empty keeps it in memory only.
+    identity_snapshot: str = ".clinicpulse/identity.npz"
+    # Waitlist for earlier appointments (clinicpulse.waitlist): days a patient
+    # waits for, and the least notice a backfilled slot may give.
+    waitlist_window_days: int = 14
+    waitlist_min_notice_s: float = 3600.0
+    # Patient notifications (clinicpulse.notifications): events per patient and
+    # channel within this many seconds go out as one digest.
+    notification_window_s: float = 120.0
+    notification_channels: Tuple[str, ...] = ("email", "sms")
+    # Booking/triage history for capacity analytics (clinicpulse.ledger); empty disables.
+    ledger_db: str = ".clinicpulse/ledger.sqlite3"
+    ledger_snapshot: str = ".clinicpulse/ledger_columns.npz"
+    clinic_hours_per_day: float = 8.0
+
+    def model_call_policy(self, agent_name: str) -> ModelCallPolicy:
+        return self.model_call_policies.get(agent_name, self.default_model_call_policy)
 
 
 config = AgentConfiguration()
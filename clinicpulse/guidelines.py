@@ -0,0 +1,329 @@
+"""Offline clinical guideline retrieval: BM25 over a memory-mapped inverted index."""
+
+import argparse
+import hashlib
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from .config import config
+from .file_lock import file_lock
+from .metrics import metrics
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_SECTION = re.compile(r"^## +(.+)$", re.MULTILINE)
+_TITLE = re.compile(r"^# +(.+)$", re.MULTILINE)
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have if in is it its may of on or "
+    "such that the their then there these this to was were will with within".split()
+)
+
+CURRENT = "CURRENT"
+SOURCES = "sources.json"
+LOCK = "build.lock"
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric tokens, stopwords dropped, plurals folded."""
+
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def split_passages(text: str) -> List[Dict[str, str]]:
+    """One passage per ``## `` section, titled "<document> — <section>"."""
+
+    title_match = _TITLE.search(text)
+    document = title_match.group(1).strip() if title_match else ""
+    headings = list(_SECTION.finditer(text))
+    passages = []
+    for i, heading in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+        body = " ".join(text[heading.end():end].split())
+        if body:
+            section = heading.group(1).strip()
+            passages.append({
+                "title": f"{document} — {section}" if document else section,
+                "text": body,
+            })
+    return passages
+
+
+def _term_counts(passage: Dict[str, str]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for token in tokenize(f"{passage['title']} {passage['text']}"):
+        counts[token] = counts.get(token, 0) + 1
+    return counts
+
+
+class GuidelineIndexer:
+    """Builds index generations under ``index_dir`` from a Markdown corpus.
+
+    Each source file's passages and term counts are cached in
+    ``sources.json`` by content hash, so an update only re-reads and
+    re-tokenizes files that were added or changed. Postings are then
+    rewritten into a fresh generation directory and published by
+    atomically replacing the ``CURRENT`` pointer; readers keep using the
+    generation they have mapped until they reopen. Updates from different
+    processes are serialized by a lock file in ``index_dir``.
+    """
+
+    def __init__(self, index_dir: str, k1: float = 1.2, b: float = 0.75, keep: int = 2) -> None:
+        self.index_dir = index_dir
+        self.k1 = k1
+        self.b = b
+        self.keep = keep
+
+    def _load_sources(self) -> Dict[str, dict]:
+        path = os.path.join(self.index_dir, SOURCES)
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+
+    def update(self, corpus_dir: str) -> Dict[str, int]:
+        """Sync the index with ``corpus_dir``; returns what changed."""
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        # Workers building the index on first use take turns; the later
+        # ones find it current and only re-hash the corpus.
+        with file_lock(os.path.join(self.index_dir, LOCK)):
+            return self._update(corpus_dir)
+
+    def _update(self, corpus_dir: str) -> Dict[str, int]:
+        cached = self._load_sources()
+        sources: Dict[str, dict] = {}
+        stats = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0}
+        for name in sorted(os.listdir(corpus_dir)):
+            if not name.endswith(".md") or name.lower() == "readme.md":
+                continue
+            with open(os.path.join(corpus_dir, name), "rb") as handle:
+                raw = handle.read()
+            digest = hashlib.sha256(raw).hexdigest()
+            previous = cached.get(name)
+            if previous is not None and previous["sha256"] == digest:
+                sources[name] = previous
+                stats["unchanged"] += 1
+                continue
+            passages = split_passages(raw.decode("utf-8"))
+            for passage in passages:
+                passage["terms"] = _term_counts(passage)
+            sources[name] = {"sha256": digest, "passages": passages}
+            stats["changed" if previous is not None else "added"] += 1
+        stats["removed"] = len(set(cached) - set(sources))
+
+        if stats["added"] or stats["changed"] or stats["removed"] or not self._current():
+            self._write_generation(sources)
+            path = os.path.join(self.index_dir, SOURCES)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                json.dump(sources, handle)
+            os.replace(tmp_path, path)
+        stats["passages"] = sum(len(source["passages"]) for source in sources.values())
+        return stats
+
+    def _current(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.index_dir, CURRENT), encoding="utf-8") as handle:
+                return handle.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _write_generation(self, sources: Dict[str, dict]) -> None:
+        passages = [
+            (name, passage) for name in sorted(sources) for passage in sources[name]["passages"]
+        ]
+        lengths = [sum(passage["terms"].values()) for _, passage in passages]
+        count = len(passages)
+        avgdl = (sum(lengths) / count) if count else 0.0
+
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for doc, (_, passage) in enumerate(passages):
+            for term, tf in passage["terms"].items():
+                postings.setdefault(term, []).append((doc, tf))
+
+        # BM25 contributions are precomputed per posting, so a query only
+        # sums floats; any corpus change rewrites them with new statistics.
+        docs, weights = array("I"), array("f")
+        lexicon: Dict[str, List[int]] = {}
+        for term in sorted(postings):
+            entries = postings[term]
+            idf = math.log(1 + (count - len(entries) + 0.5) / (len(entries) + 0.5))
+            lexicon[term] = [len(docs), len(entries)]
+            for doc, tf in entries:
+                norm = self.k1 * (1 - self.b + self.b * lengths[doc] / avgdl)
+                docs.append(doc)
+                weights.append(idf * tf * (self.k1 + 1) / (tf + norm))
+
+        text = bytearray()
+        meta = []
+        for name, passage in passages:
+            encoded = passage["text"].encode("utf-8")
+            meta.append([name, passage["title"], len(text), len(encoded)])
+            text += encoded
+
+        generation = f"gen-{time.time_ns()}"
+        path = os.path.join(self.index_dir, generation)
+        os.makedirs(path)
+        with open(os.path.join(path, "docs.u32"), "wb") as handle:
+            docs.tofile(handle)
+        with open(os.path.join(path, "weights.f32"), "wb") as handle:
+            weights.tofile(handle)
+        with open(os.path.join(path, "passages.txt"), "wb") as handle:
+            handle.write(text)
+        with open(os.path.join(path, "lexicon.json"), "w", encoding="utf-8") as handle:
+            json.dump({"passages": meta, "terms": lexicon, "avgdl": avgdl}, handle)
+
+        pointer = os.path.join(self.index_dir, f"{CURRENT}.tmp")
+        with open(pointer, "w", encoding="utf-8") as handle:
+            handle.write(generation)
+        os.replace(pointer, os.path.join(self.index_dir, CURRENT))
+        self._prune(generation)
+
+    def _prune(self, current: str) -> None:
+        generations = sorted(
+            (name for name in os.listdir(self.index_dir) if name.startswith("gen-")),
+            key=lambda name: int(name[4:]),
+        )
+        for name in generations[: -self.keep]:
+            if name != current:
+                shutil.rmtree(os.path.join(self.index_dir, name), ignore_errors=True)
+
+
+def _map(path: str) -> Tuple[Optional[mmap.mmap], memoryview]:
+    with open(path, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return None, memoryview(b"")
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    return mapped, memoryview(mapped)
+
+
+class GuidelineIndex:
+    """Read-only view of one index generation.
+
+    Postings and passage text stay in the page cache via ``mmap``; only the
+    lexicon (term -> posting range) is loaded into memory. A search walks
+    the postings of the query terms and keeps the top ``k`` with a heap.
+    """
+
+    def __init__(self, index_dir: str) -> None:
+        with open(os.path.join(index_dir, CURRENT), encoding="utf-8") as handle:
+            self.generation = handle.read().strip()
+        path = os.path.join(index_dir, self.generation)
+        with open(os.path.join(path, "lexicon.json"), encoding="utf-8") as handle:
+            lexicon = json.load(handle)
+        self.passages: List[List] = lexicon["passages"]
+        self.terms: Dict[str, List[int]] = lexicon["terms"]
+        self._maps = []
+        views = []
+        for name in ("docs.u32", "weights.f32", "passages.txt"):
+            mapped, view = _map(os.path.join(path, name))
+            self._maps.append(mapped)
+            views.append(view)
+        self._docs = views[0].cast("I")
+        self._weights = views[1].cast("f")
+        self._text = views[2]
+        self._raw_views = views
+
+    def search(self, query: str, top_k: int = 3) -> List[Dict[str, object]]:
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            entry = self.terms.get(term)
+            if entry is None:
+                continue
+            start, count = entry
+            for doc, weight in zip(
+                self._docs[start:start + count], self._weights[start:start + count]
+            ):
+                scores[doc] = scores.get(doc, 0.0) + weight
+        results = []
+        for doc, score in heapq.nlargest(top_k, scores.items(), key=lambda item: item[1]):
+            source, title, offset, length = self.passages[doc]
+            results.append({
+                "title": title,
+                "source": source,
+                "text": bytes(self._text[offset:offset + length]).decode("utf-8"),
+                "score": round(score, 4),
+            })
+        return results
+
+    def close(self) -> None:
+        for view in (self._docs, self._weights, *self._raw_views):
+            view.release()
+        for mapped in self._maps:
+            if mapped is not None:
+                mapped.close()
+
+
+_INDEX: Optional[GuidelineIndex] = None
+_INDEX_STAMP: Optional[int] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def guideline_index() -> GuidelineIndex:
+    """Process-wide index over ``config.guideline_corpus_dir``.
+
+    Built on first use if missing, and reopened when another process
+    publishes a new generation (checked with one ``stat`` per call).
+    """
+
+    global _INDEX, _INDEX_STAMP
+    pointer = os.path.join(config.guideline_index_dir, CURRENT)
+    with _INDEX_LOCK:
+        try:
+            stamp = os.stat(pointer).st_mtime_ns
+        except FileNotFoundError:
+            GuidelineIndexer(config.guideline_index_dir).update(config.guideline_corpus_dir)
+            stamp = os.stat(pointer).st_mtime_ns
+        if _INDEX is None or stamp != _INDEX_STAMP:
+            # The previous index is left to the GC: a concurrent search may
+            # still be slicing its views.
+            _INDEX = GuidelineIndex(config.guideline_index_dir)
+            _INDEX_STAMP = stamp
+        return _INDEX
+
+
+def search_guidelines(query: str, top_k: Optional[int] = None) -> List[Dict[str, object]]:
+    started = time.perf_counter()
+    results = guideline_index().search(query, top_k or config.guideline_top_k)
+    metrics.histogram("guideline_search_seconds").observe(time.perf_counter() - started)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or query the offline guideline index.")
+    parser.add_argument("--index", default=None, help="Index directory (default: config)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    update = commands.add_parser("update", help="Index new or changed guideline files")
+    update.add_argument("--corpus", default=None, help="Corpus directory (default: config)")
+    search = commands.add_parser("search", help="Print the top passages for a query")
+    search.add_argument("query")
+    search.add_argument("--top", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.index:
+        config.guideline_index_dir = args.index
+    if args.command == "update":
+        corpus = args.corpus or config.guideline_corpus_dir
+        print(json.dumps(GuidelineIndexer(config.guideline_index_dir).update(corpus)))
+        return
+    print(json.dumps(search_guidelines(args.query, args.top), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Hedged requests, adaptive timeouts, and jittered retries for model calls."""
+
+import asyncio
+import math
+import random
+import time
+from typing import AsyncGenerator, Dict, List, Optional
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.models.registry import LLMRegistry
+
+from .config import ModelCallPolicy, config
+from .logging_utils import log_event
+from .metrics import metrics
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Inner model clients are expensive to create (HTTP clients, auth), so one
+# instance per model name is shared by every wrapper in the process.
+_INNER_LLMS: Dict[str, BaseLlm] = {}
+
+
+def _inner_llm(model: str) -> BaseLlm:
+    llm = _INNER_LLMS.get(model)
+    if llm is None:
+        llm = _INNER_LLMS[model] = LLMRegistry.new_llm(model)
+    return llm
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    return getattr(exc, "code", None) in RETRYABLE_STATUS_CODES
+
+
+def _latency(agent_name: str, model: str):
+    # Keyed by model too: routed fast and standard tiers have different latencies.
+    return metrics.histogram("model_call_latency_seconds", agent=agent_name, model=model)
+
+
+def adaptive_timeout_s(agent_name: str, policy: ModelCallPolicy, model: str = "") -> float:
+    """Timeout derived from this agent's observed latency on ``model``."""
+
+    latency = _latency(agent_name, model)
+    if latency.count < policy.min_samples:
+        return policy.initial_timeout_s
+    observed = latency.percentile(policy.timeout_percentile) * policy.timeout_multiplier
+    return min(policy.max_timeout_s, max(policy.min_timeout_s, observed))
+
+
+def hedge_delay_s(
+    agent_name: str, policy: ModelCallPolicy, model: str = ""
+) -> Optional[float]:
+    """Delay before sending a hedged duplicate, or ``None`` when disabled."""
+
+    if not policy.hedge:
+        return None
+    latency = _latency(agent_name, model)
+    if latency.count < policy.min_samples:
+        return None
+    delay = latency.percentile(policy.hedge_percentile)
+    return None if math.isnan(delay) else delay
+
+
+class HedgedLlm(BaseLlm):
+    """Wraps the configured model with per-agent timeouts, hedging, and retries.
+
+    ``model`` is the inner model name; ``llm_request.model`` takes precedence
+    so request-level model overrides still reach the right backend. Only
+    non-streaming calls are hedged; streaming calls are passed through.
+    """
+
+    agent_name: str = ""
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return []  # Constructed explicitly via hedged_model(), never by name.
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        model = llm_request.model or self.model
+        inner = _inner_llm(model)
+        if stream:
+            async for response in inner.generate_content_async(llm_request, stream=True):
+                yield response
+            return
+
+        policy = config.model_call_policy(self.agent_name)
+        for attempt in range(policy.max_retries + 1):
+            timeout = adaptive_timeout_s(self.agent_name, policy, model)
+            try:
+                responses = await asyncio.wait_for(
+                    self._hedged_call(inner, model, llm_request, policy), timeout=timeout
+                )
+            except Exception as exc:
+                if isinstance(exc, asyncio.TimeoutError):
+                    metrics.counter("model_call_timeouts_total", agent=self.agent_name).inc()
+                if attempt == policy.max_retries or not _is_retryable(exc):
+                    raise
+                backoff = random.uniform(
+                    0, min(policy.backoff_max_s, policy.backoff_base_s * 2**attempt)
+                )
+                metrics.counter("model_call_retries_total", agent=self.agent_name).inc()
+                log_event(
+                    "model_call",
+                    f"{self.agent_name} attempt {attempt + 1} failed ({type(exc).__name__}), "
+                    f"retrying in {backoff:.2f}s",
+                )
+                await asyncio.sleep(backoff)
+                continue
+            for response in responses:
+                yield response
+            return
+
+    async def _collect(
+        self, inner: BaseLlm, model: str, llm_request: LlmRequest
+    ) -> List[LlmResponse]:
+        started = time.perf_counter()
+        responses = [
+            response async for response in inner.generate_content_async(llm_request, stream=False)
+        ]
+        elapsed = time.perf_counter() - started
+        _latency(self.agent_name, model).observe(elapsed)
+        metrics.histogram(
+            "model_tier_latency_seconds", tier=config.model_routing.tier_of(llm_request.model)
+        ).observe(elapsed)
+        return responses
+
+    async def _hedged_call(
+        self, inner: BaseLlm, model: str, llm_request: LlmRequest, policy: ModelCallPolicy
+    ) -> List[LlmResponse]:
+        delay = hedge_delay_s(self.agent_name, policy, model)
+        primary = asyncio.create_task(
+            self._collect(inner, model, llm_request.model_copy(deep=True))
+        )
+        tasks = {primary}
+        try:
+            if delay is None:
+                return await primary
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+
+            metrics.counter("model_hedges_fired_total", agent=self.agent_name).inc()
+            hedge = asyncio.create_task(
+                self._collect(inner, model, llm_request.model_copy(deep=True))
+            )
+            tasks.add(hedge)
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            metrics.counter("model_hedges_won_total", agent=self.agent_name).inc()
+                        return task.result()
+            # Both attempts failed: surface the primary's error.
+            return primary.result()
+        finally:
+            for task in (primary, *tasks):
+                if not task.done():
+                    task.cancel()
+
+
+def hedged_model(agent_name: str, model: str) -> HedgedLlm:
+    """Model object for ``Agent(model=...)`` governed by the agent's policy."""
+
+    return HedgedLlm(model=model, agent_name=agent_name)
@@ -0,0 +1,601 @@
+"""Fuzzy patient identity resolution over a trigram index with on-disk snapshots."""
+
+import argparse
+import atexit
+import csv
+import datetime
+import json
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+import uuid
+from array import array
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .config import config
+from .file_lock import file_lock
+from .logging_utils import log_event
+from .metrics import metrics
+
+_NON_ALNUM = re.compile(r"[^0-9A-Z]")
+_NON_LETTER = re.compile(r"[^a-z]+")
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_SEPARATOR = "\x1f"
+
+_DOB_FORMATS = (
+    "%Y-%m-%d", "%Y%m%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%d.%m.%Y",
+    "%d %b %Y", "%d %B %Y", "%b %d %Y", "%B %d %Y", "%b %d, %Y", "%B %d, %Y",
+)
+
+
+def normalize_id(value: str) -> str:
+    """Case- and punctuation-insensitive ID key: "p-12 345" -> "P12345"."""
+
+    return _NON_ALNUM.sub("", value.upper())
+
+
+def normalize_name(value: str) -> str:
+    """Accent-free, casefolded name with tokens sorted ("Smith, Jon" == "jon smith")."""
+
+    decomposed = unicodedata.normalize("NFKD", value)
+    letters = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(sorted(_NON_LETTER.sub(" ", letters.casefold()).split()))
+
+
+def trigrams(name: str) -> Set[str]:
+    """Padded per-token trigrams of a normalized name."""
+
+    grams: Set[str] = set()
+    for token in name.split():
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _dob_key(iso: str) -> int:
+    return int(iso.replace("-", "")) if iso else 0
+
+
+def dob_candidates(value: Optional[str]) -> Set[str]:
+    """ISO dates a free-text date of birth could mean (dd/mm vs mm/dd both kept)."""
+
+    if not value:
+        return set()
+    text = " ".join(value.strip().split())
+    if _ISO_DATE.match(text):
+        try:
+            return {datetime.date.fromisoformat(text).isoformat()}
+        except ValueError:
+            return set()
+    dates = set()
+    for fmt in _DOB_FORMATS:
+        try:
+            dates.add(datetime.datetime.strptime(text, fmt).date().isoformat())
+        except ValueError:
+            continue
+    return dates
+
+
+@dataclass
+class IdentityMatch:
+    patient_id: str
+    name: str
+    dob: str
+    score: float
+    matched_on: str
+
+
+class IdentityIndex:
+    """Canonical patient IDs resolvable from names, dates of birth and ID variants.
+
+    IDs and aliases resolve through a dict of normalized keys (including the
+    digits-only form when unambiguous). Names go through a trigram inverted
+    index: a compacted part stored as one sorted ``uint32`` postings array
+    plus a small append-only delta for patients registered since the last
+    compaction. Candidates come from prefix filtering (only the rarest
+    trigrams that any match above ``min_similarity`` must share), and
+    Jaccard overlap is verified with vectorized ``searchsorted`` over the
+    query's posting lists, so common trigrams are never scanned in full.
+    A date of birth boosts matching patients and rules out patients whose
+    recorded date of birth differs.
+    """
+
+    def __init__(
+        self,
+        min_similarity: float = 0.45,
+        accept_score: float = 0.8,
+        margin: float = 0.1,
+        compact_every: int = 50_000,
+    ) -> None:
+        self.min_similarity = min_similarity
+        self.accept_score = accept_score
+        self.margin = margin
+        self.compact_every = compact_every
+        self.patient_ids: List[str] = []
+        self.names: List[str] = []
+        self.dobs: List[str] = []
+        self.aliases: List[Tuple[str, ...]] = []
+        self._keys: Dict[str, int] = {}
+        self._by_dob: Dict[str, List[int]] = {}
+        self._spans: Dict[str, Tuple[int, int]] = {}
+        self._postings = np.zeros(0, dtype=np.uint32)
+        self._sizes = np.zeros(0, dtype=np.uint16)
+        self._dob_keys = np.zeros(0, dtype=np.int32)
+        self._delta: Dict[str, List[int]] = {}
+        self._delta_sizes: List[int] = []
+        self._compacted = 0
+        self.dirty = False
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.patient_ids)
+
+    # ---- building ---------------------------------------------------------
+
+    def _add_key(self, key: str, row: int) -> None:
+        if not key:
+            return
+        existing = self._keys.get(key)
+        self._keys[key] = row if existing in (None, row) else -1
+
+    def _index_keys(self, row: int) -> None:
+        for value in (self.patient_ids[row], *self.aliases[row]):
+            key = normalize_id(value)
+            self._add_key(key, row)
+            digits = "".join(char for char in key if char.isdigit())
+            if len(digits) >= 4 and digits != key:
+                self._add_key(digits, row)
+        if self.dobs[row]:
+            self._by_dob.setdefault(self.dobs[row], []).append(row)
+
+    def add(
+        self, patient_id: str, name: str, dob: Optional[str] = None, aliases: Sequence[str] = ()
+    ) -> int:
+        """Register a patient; returns their row."""
+
+        with self._lock:
+            row = len(self.patient_ids)
+            dates = sorted(dob_candidates(dob))
+            self.patient_ids.append(patient_id)
+            self.names.append(" ".join(name.split()))
+            self.dobs.append(dates[0] if dates else "")
+            self.aliases.append(tuple(aliases))
+            self._index_keys(row)
+            grams = trigrams(normalize_name(name))
+            for gram in grams:
+                self._delta.setdefault(gram, []).append(row)
+            self._delta_sizes.append(len(grams))
+            self.dirty = True
+            if len(self._delta_sizes) >= self.compact_every:
+                self.compact()
+            return row
+
+    def compact(self) -> None:
+        """Fold the delta into the sorted postings array."""
+
+        with self._lock:
+            if not self._delta_sizes:
+                return
+            grams = sorted(set(self._spans) | set(self._delta))
+            parts, spans, start = [], {}, 0
+            for gram in grams:
+                old = self._spans.get(gram)
+                chunk = [] if old is None else [self._postings[old[0]:old[1]]]
+                if gram in self._delta:
+                    chunk.append(np.asarray(self._delta[gram], dtype=np.uint32))
+                merged = np.concatenate(chunk)
+                parts.append(merged)
+                spans[gram] = (start, start + len(merged))
+                start += len(merged)
+            self._postings = np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint32)
+            self._spans = spans
+            self._sizes = np.concatenate(
+                [self._sizes, np.asarray(self._delta_sizes, dtype=np.uint16)]
+            )
+            self._dob_keys = np.asarray(
+                [_dob_key(dob) for dob in self.dobs], dtype=np.int32
+            )
+            self._delta, self._delta_sizes = {}, []
+            self._compacted = len(self.patient_ids)
+
+    @classmethod
+    def build(cls, records: Iterable[Dict[str, object]], **kwargs) -> "IdentityIndex":
+        """Bulk-build from ``{"patient_id", "name", "dob", "aliases"}`` records."""
+
+        index = cls(**kwargs)
+        pairs_gram = array("I")
+        pairs_row = array("I")
+        gram_ids: Dict[str, int] = {}
+        sizes: List[int] = []
+        for record in records:
+            row = len(index.patient_ids)
+            dates = dob_candidates(record.get("dob"))
+            index.patient_ids.append(str(record["patient_id"]))
+            index.names.append(" ".join(str(record.get("name", "")).split()))
+            index.dobs.append(sorted(dates)[0] if dates else "")
+            index.aliases.append(tuple(record.get("aliases") or ()))
+            index._index_keys(row)
+            grams = trigrams(normalize_name(index.names[row]))
+            sizes.append(len(grams))
+            for gram in grams:
+                pairs_gram.append(gram_ids.setdefault(gram, len(gram_ids)))
+                pairs_row.append(row)
+        index._set_postings(
+            list(gram_ids),
+            np.frombuffer(pairs_gram, dtype=np.uint32),
+            np.frombuffer(pairs_row, dtype=np.uint32),
+            np.asarray(sizes, dtype=np.uint16),
+        )
+        index.dirty = True
+        return index
+
+    def _set_postings(
+        self, gram_names: List[str], gram_of: np.ndarray, rows: np.ndarray, sizes: np.ndarray
+    ) -> None:
+        order = np.argsort(gram_of, kind="stable")  # rows stay ascending per gram
+        self._postings = rows[order]
+        bounds = np.searchsorted(gram_of[order], np.arange(len(gram_names) + 1))
+        self._spans = {
+            gram: (int(bounds[i]), int(bounds[i + 1])) for i, gram in enumerate(gram_names)
+        }
+        self._sizes = sizes
+        self._dob_keys = np.asarray([_dob_key(dob) for dob in self.dobs], dtype=np.int32)
+        self._compacted = len(sizes)
+
+    # ---- querying ---------------------------------------------------------
+
+    def _frequency(self, gram: str) -> int:
+        start, end = self._spans.get(gram, (0, 0))
+        return end - start + len(self._delta.get(gram, ()))
+
+    def _posting_parts(self, gram: str) -> List[np.ndarray]:
+        parts = []
+        span = self._spans.get(gram)
+        if span is not None:
+            parts.append(self._postings[span[0]:span[1]])
+        if gram in self._delta:
+            parts.append(np.asarray(self._delta[gram], dtype=np.uint32))
+        return parts
+
+    def _verified(
+        self, ranked: List[str], rows: np.ndarray, required: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows whose trigram overlap can still reach ``required``, with the overlaps.
+
+        Grams are probed rarest first and a row is dropped as soon as the
+        grams left could no longer lift it to ``required``, so the long
+        posting lists of common grams are only searched for the survivors.
+        """
+
+        counts = np.zeros(len(rows), dtype=np.int32)
+        for i, gram in enumerate(ranked):
+            for posting in self._posting_parts(gram):
+                position = np.minimum(np.searchsorted(posting, rows), len(posting) - 1)
+                counts += posting[position] == rows
+            alive = counts + (len(ranked) - i - 1) >= required
+            if not alive.all():
+                rows, counts = rows[alive], counts[alive]
+        return rows, counts
+
+    def _row_sizes(self, rows: np.ndarray) -> np.ndarray:
+        frozen = rows < self._compacted
+        sizes = np.empty(len(rows), dtype=np.int32)
+        sizes[frozen] = self._sizes[rows[frozen]]
+        delta = np.asarray(self._delta_sizes, dtype=np.int32)
+        sizes[~frozen] = delta[rows[~frozen] - self._compacted]
+        return sizes
+
+    def _row_dob_keys(self, rows: np.ndarray) -> np.ndarray:
+        frozen = rows < self._compacted
+        keys = np.empty(len(rows), dtype=np.int32)
+        keys[frozen] = self._dob_keys[rows[frozen]]
+        keys[~frozen] = [_dob_key(self.dobs[row]) for row in rows[~frozen].tolist()]
+        return keys
+
+    def _scored(
+        self, ranked: List[str], dob_rows: np.ndarray, dates: Set[str], threshold: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows scoring at least ``threshold``, with their scores.
+
+        Without a DOB bonus a row scores at most its Jaccard similarity, and
+        Jaccard >= t needs an overlap of at least ceil(t * |query|) grams, so
+        name candidates must contain one of the |query| - required + 1
+        rarest grams (prefix filtering). Rows matching the DOB are always
+        scored in full.
+        """
+
+        rows, counts = self._verified(ranked, dob_rows, 0)
+        if threshold <= 1.0:
+            required = max(1, math.ceil(threshold * len(ranked)))
+            parts = [
+                part
+                for gram in ranked[: len(ranked) - required + 1]
+                for part in self._posting_parts(gram)
+            ]
+            if parts:
+                named = np.setdiff1d(np.concatenate(parts), dob_rows)
+                named, named_counts = self._verified(ranked, named, required)
+                rows = np.concatenate([rows, named])
+                counts = np.concatenate([counts, named_counts])
+        scores = self._scores(ranked, rows, counts, dates)
+        keep = scores >= threshold
+        return rows[keep], scores[keep]
+
+    def _scores(
+        self, ranked: List[str], rows: np.ndarray, counts: np.ndarray, dates: Set[str]
+    ) -> np.ndarray:
+        """Jaccard similarity, +0.2 for a DOB match; -inf (dropped) for a different DOB."""
+
+        scores = counts / (len(ranked) + self._row_sizes(rows) - counts)
+        if dates:
+            keys = self._row_dob_keys(rows)
+            wanted = np.asarray([_dob_key(date) for date in dates], dtype=np.int32)
+            scores = scores + np.where(
+                np.isin(keys, wanted), 0.2, np.where(keys > 0, -np.inf, 0.0)
+            )
+        return scores
+
+    def _match(self, row: int, score: float, matched_on: str) -> IdentityMatch:
+        return IdentityMatch(
+            patient_id=self.patient_ids[row],
+            name=self.names[row],
+            dob=self.dobs[row],
+            score=round(min(score, 1.0), 3),
+            matched_on=matched_on,
+        )
+
+    def search(self, query: str, dob: Optional[str] = None, limit: int = 3) -> List[IdentityMatch]:
+        """Best matches for a name or ID, optionally with a date of birth."""
+
+        started = time.perf_counter()
+        with self._lock:
+            matches = self._search_locked(query, dob_candidates(dob), limit)
+        metrics.histogram("identity_resolve_seconds").observe(time.perf_counter() - started)
+        return matches
+
+    def _search_locked(self, query: str, dates: Set[str], limit: int) -> List[IdentityMatch]:
+        key = normalize_id(query)
+        row = self._keys.get(key, -1) if key else -1
+        if row >= 0 and (not dates or not self.dobs[row] or self.dobs[row] in dates):
+            return [self._match(row, 1.0, "id")]
+
+        grams = trigrams(normalize_name(query))
+        if not grams:
+            return []
+        dob_rows = np.asarray(
+            [row for date in dates for row in self._by_dob.get(date, ())], dtype=np.uint32
+        )
+        matched_on = "name+dob" if dates else "name"
+        ranked = sorted(grams, key=self._frequency)
+        # A decisive match needs every rival to score within ``margin`` of
+        # it, so the first pass only gathers candidates that could: from
+        # accept_score - margin, or higher once a DOB match sets the bar
+        # (above 1.0 no name-only rival is possible). Weaker candidates,
+        # down to min_similarity, are only gathered if that pass finds none.
+        best = 0.0
+        if len(dob_rows):
+            rows, counts = self._verified(ranked, dob_rows, 0)
+            best = float(self._scores(ranked, rows, counts, dates).max())
+        for threshold in (max(self.accept_score, best) - self.margin, self.min_similarity):
+            candidates, scores = self._scored(ranked, dob_rows, dates, threshold)
+            if len(candidates):
+                break
+        order = np.argsort(-scores, kind="stable")
+        return [
+            self._match(int(candidates[i]), float(scores[i]), matched_on) for i in order[:limit]
+        ]
+
+    def resolve(self, query: str, dob: Optional[str] = None) -> Dict[str, object]:
+        """Resolve to one patient, or say what is still needed to decide.
+
+        ``matched`` needs an ID/alias hit, or a clear name winner whose
+        recorded date of birth equals the one given. A clear name winner
+        without that confirmation is ``needs_confirmation``; close rivals
+        are ``ambiguous``; nothing plausible is ``not_found``. A name that
+        matches only patients with a different date of birth is
+        ``needs_confirmation`` with ``dob_mismatch`` set and the name-only
+        candidates, since a mistyped date is likelier than a new namesake.
+        """
+
+        matches = self.search(query, dob)
+        if not matches and dob:
+            named = self.search(query)
+            if named and named[0].matched_on != "id":
+                return {
+                    "status": "needs_confirmation",
+                    "dob_mismatch": True,
+                    "candidates": [asdict(m) for m in named],
+                }
+        if not matches:
+            return {"status": "not_found", "candidates": []}
+        best = matches[0]
+        runner_up = matches[1].score if len(matches) > 1 else 0.0
+        if best.score < self.accept_score or best.score - runner_up < self.margin:
+            status = "ambiguous"
+        elif best.matched_on == "id" or (best.dob and best.dob in dob_candidates(dob)):
+            status = "matched"
+        else:
+            status = "needs_confirmation"
+        result: Dict[str, object] = {"status": status, "candidates": [asdict(m) for m in matches]}
+        if status == "matched":
+            result["patient_id"] = best.patient_id
+        return result
+
+    def register(self, name: str, dob: Optional[str] = None) -> str:
+        """Add a new patient under a random ``P<16 hex>`` ID.
+
+        IDs are random rather than sequential so runner-pool workers, each
+        with their own copy of the index, never mint the same one.
+        """
+
+        with self._lock:
+            patient_id = f"P{uuid.uuid4().hex[:16].upper()}"
+            while normalize_id(patient_id) in self._keys:
+                patient_id = f"P{uuid.uuid4().hex[:16].upper()}"
+            self.add(patient_id, name, dob)
+            return patient_id
+
+    # ---- snapshots --------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        """Write a compacted snapshot atomically (``.npz``, no pickles)."""
+
+        with self._lock:
+            self.compact()
+            grams = list(self._spans)
+            starts = np.array([self._spans[g][0] for g in grams], dtype=np.int64)
+            ends = np.array([self._spans[g][1] for g in grams], dtype=np.int64)
+
+            def blob(values: Iterable[str]) -> np.ndarray:
+                text = "\n".join(value.replace("\n", " ") for value in values)
+                return np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.tmp.npz"
+            np.savez(
+                temporary,
+                count=np.array([len(self.patient_ids)]),
+                patient_ids=blob(self.patient_ids),
+                names=blob(self.names),
+                dobs=blob(self.dobs),
+                aliases=blob(_SEPARATOR.join(a) for a in self.aliases),
+                grams=blob(grams),
+                starts=starts,
+                ends=ends,
+                postings=self._postings,
+                sizes=self._sizes,
+            )
+            os.replace(temporary, path)
+            self.dirty = False
+
+    def merge(self, other: "IdentityIndex") -> int:
+        """Add the patients of ``other`` this index does not know; returns how many."""
+
+        added = 0
+        with self._lock:
+            for row, patient_id in enumerate(other.patient_ids):
+                if normalize_id(patient_id) in self._keys:
+                    continue
+                self.add(patient_id, other.names[row], other.dobs[row], other.aliases[row])
+                added += 1
+        return added
+
+    def sync(self, path: str) -> None:
+        """Merge in the snapshot on disk, then save, under a lock file.
+
+        Every runner-pool worker holds its own copy of the index and
+        registers patients into it. Merging first means a worker saving
+        last keeps the patients other workers registered and saved before.
+        """
+
+        with file_lock(f"{path}.lock"):
+            if os.path.exists(path):
+                self.merge(IdentityIndex.load(path))
+            self.save(path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "IdentityIndex":
+        index = cls(**kwargs)
+        with np.load(path, allow_pickle=False) as data:
+            count = int(data["count"][0])
+
+            def unblob(name: str) -> List[str]:
+                values = data[name].tobytes().decode("utf-8").split("\n")
+                return values if count else []
+
+            index.patient_ids = unblob("patient_ids")
+            index.names = unblob("names")
+            index.dobs = unblob("dobs")
+            index.aliases = [tuple(a.split(_SEPARATOR)) if a else () for a in unblob("aliases")]
+            grams = data["grams"].tobytes().decode("utf-8").split("\n") if len(data["starts"]) else []
+            index._spans = {
+                gram: (int(start), int(end))
+                for gram, start, end in zip(grams, data["starts"], data["ends"])
+            }
+            index._postings = data["postings"]
+            index._sizes = data["sizes"]
+            index._dob_keys = np.asarray([_dob_key(dob) for dob in index.dobs], dtype=np.int32)
+        index._compacted = count
+        for row in range(count):
+            index._index_keys(row)
+        return index
+
+
+_INDEX: Optional[IdentityIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def identity_index() -> IdentityIndex:
+    """Process-wide index loaded from ``config.identity_snapshot`` (empty if absent).
+
+    Patients registered at intake are merged into the snapshot on exit
+    (see ``IdentityIndex.sync``).
+    """
+
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            path = config.identity_snapshot
+            _INDEX = IdentityIndex.load(path) if path and os.path.exists(path) else IdentityIndex()
+            atexit.register(_save_on_exit, _INDEX, path)
+        return _INDEX
+
+
+def _save_on_exit(index: IdentityIndex, path: str) -> None:
+    if path and index.dirty:
+        index.sync(path)
+
+
+def resolve_or_register(
+    name_or_id: str, date_of_birth: Optional[str] = None
+) -> Dict[str, object]:
+    """Resolve to a canonical ID; names with no candidate at all are registered as new patients."""
+
+    index = identity_index()
+    result = index.resolve(name_or_id, date_of_birth)
+    if result["status"] == "not_found" and not any(char.isdigit() for char in name_or_id):
+        patient_id = index.register(name_or_id, date_of_birth)
+        result = {"status": "registered", "patient_id": patient_id, "candidates": []}
+    log_event("identity", f"resolve status={result['status']}", result.get("patient_id"))
+    return result
+
+
+def _read_csv(path: str) -> Iterable[Dict[str, object]]:
+    with open(path, newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            aliases = [a for a in (row.get("aliases") or "").split(";") if a]
+            yield {"patient_id": row["patient_id"], "name": row.get("name", ""),
+                   "dob": row.get("dob"), "aliases": aliases}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the patient identity index.")
+    parser.add_argument("--snapshot", default=None, help="Snapshot path (default: config)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("import", help="Build a snapshot from a CSV registry")
+    load.add_argument("csv", help="Columns: patient_id,name,dob[,aliases (';'-separated)]")
+    resolve = commands.add_parser("resolve", help="Resolve a name or ID")
+    resolve.add_argument("query")
+    resolve.add_argument("--dob", default=None)
+    args = parser.parse_args()
+
+    path = args.snapshot or config.identity_snapshot
+    if args.command == "import":
+        started = time.perf_counter()
+        index = IdentityIndex.build(_read_csv(args.csv))
+        index.save(path)
+        print(json.dumps({"patients": len(index), "elapsed_s": round(time.perf_counter() - started, 3)}))
+        return
+    index = IdentityIndex.load(path)
+    print(json.dumps(index.resolve(args.query, args.dob), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,573 @@
+"""Booking and triage ledger in SQLite, with NumPy capacity analytics."""
+
+import argparse
+import atexit
+import json
+import math
+import operator
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bookings (
+    id INTEGER PRIMARY KEY,
+    appointment_id TEXT NOT NULL UNIQUE,
+    patient_id TEXT NOT NULL,
+    doctor TEXT NOT NULL,
+    specialty TEXT NOT NULL,
+    urgency TEXT NOT NULL,
+    booked_at REAL NOT NULL,
+    slot_at REAL,
+    duration_minutes INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    rebooked_from TEXT,
+    seq INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bookings_seq ON bookings (seq);
+CREATE TABLE IF NOT EXISTS triage (
+    id INTEGER PRIMARY KEY,
+    patient_id TEXT NOT NULL,
+    priority_level TEXT NOT NULL,
+    specialty TEXT NOT NULL,
+    decided_at REAL NOT NULL
+);
+"""
+
+URGENCIES = ("critical", "urgent", "routine")
+STATUSES = ("confirmed", "cancelled", "rebooked")
+BOOKING_COLUMNS = (
+    "appointment_id", "patient_id", "doctor", "specialty", "urgency",
+    "booked_at", "slot_at", "duration_minutes", "status", "rebooked_from", "seq",
+)
+# Refreshes re-read bookings written this long before the last one seen, in
+# case another process committed rows with slightly older ``seq`` values late.
+SNAPSHOT_OVERLAP_NS = 300 * 10**9
+
+
+class LedgerStore:
+    """Append-mostly SQLite ledger; rows are buffered and written in batches.
+
+    A booking is keyed by ``appointment_id``; recording it again (e.g. when
+    it is cancelled or moved by the waitlist) updates the row in place and
+    bumps its ``seq`` (nanoseconds), which incremental readers key on.
+    ``seq`` is stamped when the row is written, not when it is recorded, so
+    a row that sat in the buffer is still newer than any reader's watermark.
+    A flusher thread (started on the first record) writes the buffer once
+    ``flush_rows`` rows are waiting or ``flush_interval_s`` has passed, so an
+    idle process does not hold rows back.
+    """
+
+    def __init__(self, path: str, flush_rows: int = 256, flush_interval_s: float = 5.0) -> None:
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_interval_s = flush_interval_s
+        self._bookings: Dict[str, Tuple] = {}
+        self._triage: List[Tuple] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def record_booking(self, appointment: Any, duration_minutes: int = 30) -> None:
+        """Record a ``clinicpulse.waitlist.Appointment`` (insert or status change)."""
+
+        from .waitlist import parse_slot
+
+        slot = parse_slot(appointment.datetime)
+        row = (
+            appointment.appointment_id,
+            appointment.patient_id,
+            appointment.doctor,
+            appointment.specialty.lower(),
+            appointment.urgency_level.lower(),
+            appointment.booked_at,
+            slot.timestamp() if slot is not None else None,
+            duration_minutes,
+            appointment.status,
+            appointment.rebooked_from,
+        )
+        with self._lock:
+            self._bookings[appointment.appointment_id] = row
+            self._buffered_locked()
+
+    def record_triage(
+        self,
+        patient_id: str,
+        priority_level: str,
+        specialty: str = "general",
+        decided_at: Optional[float] = None,
+    ) -> None:
+        row = (
+            patient_id,
+            priority_level.strip().lower(),
+            specialty.lower(),
+            time.time() if decided_at is None else decided_at,
+        )
+        with self._lock:
+            self._triage.append(row)
+            self._buffered_locked()
+
+    def _buffered_locked(self) -> None:
+        if self._flusher is None and not self._closed:
+            self._flusher = threading.Thread(target=self._run, name="ledger-flusher", daemon=True)
+            self._flusher.start()
+        if len(self._bookings) + len(self._triage) >= self.flush_rows:
+            self._wake.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._closed and len(self._bookings) + len(self._triage) < self.flush_rows:
+                    self._wake.wait(self.flush_interval_s)
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered rows now (the flusher thread does this on its own)."""
+
+        # One batch at a time, so an older version of a booking never lands last.
+        with self._flush_lock:
+            self._write()
+
+    def _write(self) -> None:
+        with self._lock:
+            pending, self._bookings = list(self._bookings.values()), {}
+            triage, self._triage = self._triage, []
+        if not pending and not triage:
+            return
+        written_ns = time.time_ns()
+        bookings = [row + (written_ns + i,) for i, row in enumerate(pending)]
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT INTO bookings ({', '.join(BOOKING_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in BOOKING_COLUMNS)}) "
+                "ON CONFLICT (appointment_id) DO UPDATE SET "
+                + ", ".join(f"{column} = excluded.{column}" for column in BOOKING_COLUMNS[1:]),
+                bookings,
+            )
+            conn.executemany(
+                "INSERT INTO triage (patient_id, priority_level, specialty, decided_at) "
+                "VALUES (?, ?, ?, ?)",
+                triage,
+            )
+
+    def close(self) -> None:
+        """Stop the flusher thread and write what is left."""
+
+        with self._lock:
+            self._closed = True
+            self._wake.notify()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+    def query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        self.flush()
+        with self._connect() as conn:
+            return conn.execute(sql, params).fetchall()
+
+
+_LEDGER: Optional[LedgerStore] = None
+_LEDGER_LOCK = threading.Lock()
+
+
+def ledger() -> Optional[LedgerStore]:
+    """Process-wide ledger, or ``None`` when ``config.ledger_db`` is empty."""
+
+    global _LEDGER
+    with _LEDGER_LOCK:
+        if _LEDGER is None and config.ledger_db:
+            _LEDGER = LedgerStore(config.ledger_db)
+            atexit.register(_LEDGER.close)
+    return _LEDGER
+
+
+# ==================== ANALYTICS ====================
+
+
+@dataclass
+class History:
+    """Booking and triage history as columns; categorical columns are codes."""
+
+    doctors: List[str]
+    specialties: List[str]
+    urgencies: List[str]
+    statuses: List[str]
+    booked_at: np.ndarray
+    slot_at: np.ndarray
+    duration_minutes: np.ndarray
+    doctor: np.ndarray
+    specialty: np.ndarray
+    urgency: np.ndarray
+    status: np.ndarray
+    triage_at: np.ndarray
+    triage_urgency: np.ndarray
+    triage_specialty: np.ndarray
+
+    @property
+    def span_days(self) -> float:
+        stamps = np.concatenate([self.booked_at, self.triage_at])
+        if not len(stamps):
+            return 0.0
+        return max(1.0, math.ceil((stamps.max() - stamps.min()) / 86400))
+
+
+BOOKING_ARRAYS = {
+    "id": np.int64, "seq": np.int64, "booked_at": np.float64, "slot_at": np.float64,
+    "duration_minutes": np.float64, "doctor": np.int32, "specialty": np.int32,
+    "urgency": np.int32, "status": np.int32,
+}
+TRIAGE_ARRAYS = {"id": np.int64, "at": np.float64, "urgency": np.int32, "specialty": np.int32}
+
+
+def _columns(rows: List[Tuple], count: int) -> List[List[Any]]:
+    """Transpose fetched rows (cheaper than ``zip(*rows)`` for millions of rows)."""
+
+    return [list(map(operator.itemgetter(i), rows)) for i in range(count)]
+
+
+def _merge(old: Dict[str, np.ndarray], new: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Upsert ``new`` rows into ``old`` by ``id``, keeping ids sorted."""
+
+    pos = np.searchsorted(old["id"], new["id"])
+    hit = pos < len(old["id"])
+    hit[hit] = old["id"][pos[hit]] == new["id"][hit]
+    merged = {name: np.concatenate([column, new[name][~hit]]) for name, column in old.items()}
+    for name, column in merged.items():
+        column[pos[hit]] = new[name][hit]
+    if len(merged["id"]) and (np.diff(merged["id"]) < 0).any():
+        order = np.argsort(merged["id"], kind="stable")
+        merged = {name: column[order] for name, column in merged.items()}
+    return merged
+
+
+class ColumnCache:
+    """Columnar copy of the ledger, refreshed incrementally and kept as ``.npz``.
+
+    Bookings are read by ``seq``, which changes on every insert or status
+    change. A refresh therefore fetches only rows written since the last one,
+    and changed bookings are found by ``id`` with a binary search and updated
+    in place. Triage rows are append-only and read by ``id``. Strings are
+    stored once per distinct value; the columns hold integer codes.
+    """
+
+    def __init__(self, store: LedgerStore, path: str = "") -> None:
+        self.store = store
+        self.path = path
+        self.labels: Dict[str, List[str]] = {
+            "doctors": [], "specialties": [], "urgencies": list(URGENCIES), "statuses": list(STATUSES),
+        }
+        self.bookings = {name: np.zeros(0, dtype) for name, dtype in BOOKING_ARRAYS.items()}
+        self.triage = {name: np.zeros(0, dtype) for name, dtype in TRIAGE_ARRAYS.items()}
+        self.seq_watermark = 0
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self) -> None:
+        with np.load(self.path, allow_pickle=False) as data:
+            for kind in self.labels:
+                self.labels[kind] = data[f"labels_{kind}"].tolist()
+            self.bookings = {name: data[f"bookings_{name}"] for name in BOOKING_ARRAYS}
+            self.triage = {name: data[f"triage_{name}"] for name in TRIAGE_ARRAYS}
+            self.seq_watermark = int(data["seq_watermark"][0])
+
+    def save(self) -> None:
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary = f"{self.path}.tmp.npz"
+        np.savez(
+            temporary,
+            seq_watermark=np.array([self.seq_watermark], dtype=np.int64),
+            **{f"labels_{kind}": np.array(labels, dtype=str) for kind, labels in self.labels.items()},
+            **{f"bookings_{name}": column for name, column in self.bookings.items()},
+            **{f"triage_{name}": column for name, column in self.triage.items()},
+        )
+        os.replace(temporary, self.path)
+
+    def _codes(self, kind: str, values: Sequence[str]) -> np.ndarray:
+        labels = self.labels[kind]
+        labels.extend(sorted(set(values) - set(labels)))
+        index = {label: code for code, label in enumerate(labels)}
+        return np.fromiter(map(index.__getitem__, values), dtype=np.int32, count=len(values))
+
+    def refresh(self) -> bool:
+        """Pull rows written since the last refresh; returns whether anything changed."""
+
+        columns = "id, seq, booked_at, slot_at, duration_minutes, doctor, specialty, urgency, status"
+        if self.seq_watermark:
+            bookings = self.store.query(
+                f"SELECT {columns} FROM bookings WHERE seq > ? ORDER BY id",
+                (self.seq_watermark - SNAPSHOT_OVERLAP_NS,),
+            )
+        else:
+            # A first load scans the table in rowid order rather than via the seq index.
+            bookings = self.store.query(f"SELECT {columns} FROM bookings ORDER BY id")
+        last_triage = int(self.triage["id"][-1]) if len(self.triage["id"]) else 0
+        triage = self.store.query(
+            "SELECT id, decided_at, priority_level, specialty FROM triage WHERE id > ? ORDER BY id",
+            (last_triage,),
+        )
+        if bookings:
+            ids, seq, booked_at, slot_at, duration, doctor, specialty, urgency, status = _columns(bookings, 9)
+            new = {
+                "id": np.array(ids, dtype=np.int64),
+                "seq": np.array(seq, dtype=np.int64),
+                "booked_at": np.array(booked_at, dtype=np.float64),
+                "slot_at": np.array(slot_at, dtype=np.float64),  # NULL -> nan
+                "duration_minutes": np.array(duration, dtype=np.float64),
+                "doctor": self._codes("doctors", doctor),
+                "specialty": self._codes("specialties", specialty),
+                "urgency": self._codes("urgencies", urgency),
+                "status": self._codes("statuses", status),
+            }
+            self.bookings = _merge(self.bookings, new)
+            self.seq_watermark = max(self.seq_watermark, int(new["seq"].max()))
+        if triage:
+            ids, decided_at, urgency, specialty = _columns(triage, 4)
+            new = {
+                "id": np.array(ids, dtype=np.int64),
+                "at": np.array(decided_at, dtype=np.float64),
+                "urgency": self._codes("urgencies", urgency),
+                "specialty": self._codes("specialties", specialty),
+            }
+            self.triage = {name: np.concatenate([self.triage[name], new[name]]) for name in TRIAGE_ARRAYS}
+        changed = bool(bookings or triage)
+        if changed and self.path:
+            self.save()
+        return changed
+
+    def history(self, since: Optional[float] = None, until: Optional[float] = None) -> History:
+        """Bookings (by ``booked_at``) and triage decisions in ``[since, until)``."""
+
+        def window(stamps: np.ndarray) -> np.ndarray:
+            mask = np.ones(len(stamps), dtype=bool)
+            if since is not None:
+                mask &= stamps >= since
+            if until is not None:
+                mask &= stamps < until
+            return mask
+
+        b = window(self.bookings["booked_at"])
+        t = window(self.triage["at"])
+        return History(
+            doctors=list(self.labels["doctors"]),
+            specialties=list(self.labels["specialties"]),
+            urgencies=list(self.labels["urgencies"]),
+            statuses=list(self.labels["statuses"]),
+            booked_at=self.bookings["booked_at"][b],
+            slot_at=self.bookings["slot_at"][b],
+            duration_minutes=self.bookings["duration_minutes"][b],
+            doctor=self.bookings["doctor"][b],
+            specialty=self.bookings["specialty"][b],
+            urgency=self.bookings["urgency"][b],
+            status=self.bookings["status"][b],
+            triage_at=self.triage["at"][t],
+            triage_urgency=self.triage["urgency"][t],
+            triage_specialty=self.triage["specialty"][t],
+        )
+
+
+def load_history(
+    store: LedgerStore,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    snapshot: Optional[str] = None,
+) -> History:
+    """History in ``[since, until)``, via the columnar snapshot (``config.ledger_snapshot``).
+
+    Pass ``snapshot=""`` to read the whole ledger without a snapshot file.
+    """
+
+    cache = ColumnCache(store, config.ledger_snapshot if snapshot is None else snapshot)
+    cache.refresh()
+    return cache.history(since, until)
+
+
+def local_hour(timestamps: np.ndarray, utc_offset_s: Optional[float] = None) -> np.ndarray:
+    """Hour of day (0-23); defaults to the machine's current UTC offset."""
+
+    if utc_offset_s is None:
+        utc_offset_s = time.localtime().tm_gmtoff
+    return ((timestamps + utc_offset_s) // 3600 % 24).astype(np.int64)
+
+
+def arrivals(history: History, utc_offset_s: Optional[float] = None) -> np.ndarray:
+    """Triage decisions per day, as a (24 hours, specialty, urgency) array.
+
+    Triage is the point a patient's demand enters the clinic, so it is what
+    rosters have to cover; bookings without a triage row are not counted.
+    """
+
+    shape = (24, len(history.specialties), len(history.urgencies))
+    flat = np.ravel_multi_index(
+        (local_hour(history.triage_at, utc_offset_s), history.triage_specialty, history.triage_urgency),
+        shape,
+    )
+    counts = np.bincount(flat, minlength=int(np.prod(shape))).reshape(shape)
+    return counts / history.span_days if history.span_days else counts.astype(float)
+
+
+def kept(history: History) -> np.ndarray:
+    """Mask of bookings that still hold their slot."""
+
+    return (history.status == history.statuses.index("confirmed")) & ~np.isnan(history.slot_at)
+
+
+def utilization(
+    history: History,
+    hours_per_day: Optional[float] = None,
+    utc_offset_s: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Booked minutes per doctor over ``hours_per_day`` on each day they had bookings."""
+
+    hours_per_day = config.clinic_hours_per_day if hours_per_day is None else hours_per_day
+    if utc_offset_s is None:
+        utc_offset_s = time.localtime().tm_gmtoff
+    mask = kept(history)
+    doctor = history.doctor[mask]
+    minutes = np.bincount(doctor, weights=history.duration_minutes[mask], minlength=len(history.doctors))
+    bookings = np.bincount(doctor, minlength=len(history.doctors))
+    day = ((history.slot_at[mask] + utc_offset_s) // 86400).astype(np.int64)
+    # Distinct (doctor, day) pairs as one integer key each.
+    span = int(day.max() - day.min() + 1) if len(day) else 1
+    pairs = np.unique(doctor.astype(np.int64) * span + (day - (day.min() if len(day) else 0)))
+    days = np.bincount(pairs // span, minlength=len(history.doctors))
+    capacity = days * hours_per_day * 60
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(capacity > 0, minutes / capacity, 0.0)
+    order = np.argsort(-ratio, kind="stable")
+    return [
+        {
+            "doctor": history.doctors[i],
+            "bookings": int(bookings[i]),
+            "clinic_days": int(days[i]),
+            "booked_hours": round(float(minutes[i]) / 60, 1),
+            "utilization": round(float(ratio[i]), 3),
+        }
+        for i in order
+        if bookings[i]
+    ]
+
+
+def lead_time_percentiles(
+    history: History, by: str = "urgency", percentiles: Sequence[float] = (50, 90, 95)
+) -> List[Dict[str, Any]]:
+    """Hours from booking to appointment, per ``urgency`` or ``specialty``."""
+
+    labels = history.urgencies if by == "urgency" else history.specialties
+    mask = kept(history)
+    groups = (history.urgency if by == "urgency" else history.specialty)[mask]
+    hours = (history.slot_at[mask] - history.booked_at[mask]) / 3600
+    order = np.argsort(groups, kind="stable")
+    groups, hours = groups[order], hours[order]
+    bounds = np.searchsorted(groups, np.arange(len(labels) + 1))
+    rows = []
+    for code, label in enumerate(labels):
+        values = hours[bounds[code]:bounds[code + 1]]
+        if not len(values):
+            continue
+        quantiles = np.percentile(values, percentiles)
+        rows.append({
+            by: label,
+            "bookings": int(len(values)),
+            **{f"p{q:g}_hours": round(float(v), 1) for q, v in zip(percentiles, quantiles)},
+        })
+    return rows
+
+
+def capacity_report(
+    history: History, utc_offset_s: Optional[float] = None, hours_per_day: Optional[float] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Every roll-up the CLI prints, as JSON-ready rows."""
+
+    per_day = arrivals(history, utc_offset_s)
+    by_hour = [
+        {
+            "hour": f"{hour:02d}:00",
+            "arrivals_per_day": round(float(per_day[hour].sum()), 2),
+            **{urgency: round(float(per_day[hour, :, u].sum()), 2)
+               for u, urgency in enumerate(history.urgencies)},
+        }
+        for hour in range(24)
+        if per_day[hour].sum() > 0
+    ]
+    by_specialty = [
+        {
+            "specialty": specialty,
+            "arrivals_per_day": round(float(per_day[:, s].sum()), 2),
+            "peak_hour": f"{int(per_day[:, s].sum(axis=1).argmax()):02d}:00",
+            **{urgency: round(float(per_day[:, s, u].sum()), 2)
+               for u, urgency in enumerate(history.urgencies)},
+        }
+        for s, specialty in enumerate(history.specialties)
+        if per_day[:, s].sum() > 0
+    ]
+    return {
+        "arrivals_by_hour": by_hour,
+        "arrivals_by_specialty": by_specialty,
+        "utilization": utilization(history, hours_per_day, utc_offset_s),
+        "lead_time_by_urgency": lead_time_percentiles(history, "urgency"),
+        "lead_time_by_specialty": lead_time_percentiles(history, "specialty"),
+    }
+
+
+def _print_table(rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        print("(no data)")
+        return
+    columns = list(dict.fromkeys(col for row in rows for col in row))
+    widths = [max(len(col), *(len(str(row.get(col, ""))) for row in rows)) for col in columns]
+    print("  ".join(col.ljust(width) for col, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row.get(col, "")).ljust(width) for col, width in zip(columns, widths)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report clinic demand and doctor capacity.")
+    parser.add_argument("--db", default=None, help="Ledger database path (default: config)")
+    parser.add_argument("--snapshot", default=None, help="Columnar snapshot path ('' for none)")
+    parser.add_argument("--days", type=float, default=None, help="Only the last N days")
+    parser.add_argument("--hours-per-day", type=float, default=None, help="Clinic hours per doctor-day")
+    parser.add_argument("--utc", action="store_true", help="Bucket hours in UTC instead of local time")
+    parser.add_argument("--json", action="store_true", help="Emit one JSON document")
+    args = parser.parse_args()
+
+    store = LedgerStore(args.db or config.ledger_db)
+    since = time.time() - args.days * 86400 if args.days else None
+    started = time.perf_counter()
+    history = load_history(store, since=since, snapshot=args.snapshot)
+    report = capacity_report(history, 0 if args.utc else None, args.hours_per_day)
+    elapsed = time.perf_counter() - started
+    if args.json:
+        print(json.dumps(report))
+        return
+    print(
+        f"{len(history.booked_at)} bookings and {len(history.triage_at)} triage decisions "
+        f"over {history.span_days:g} days, analysed in {elapsed:.2f}s"
+    )
+    for name, rows in report.items():
+        print(f"\n== {name.replace('_', ' ')} ==")
+        _print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
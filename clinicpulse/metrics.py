@@ -0,0 +1,137 @@
+"""In-process metrics registry for ClinicPulse AI."""
+
+import math
+import threading
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    """Monotonically increasing value."""
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge:
+    """Value that can move up and down (queue depth, resident bytes, ...)."""
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Histogram:
+    """Count/sum plus a sliding window of recent observations for percentiles."""
+
+    def __init__(self, window: int = 2048) -> None:
+        self.count = 0
+        self.sum = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            self._recent.append(value)
+
+    def percentile(self, q: float) -> float:
+        """Nearest-rank percentile (0-100) over the recent window; NaN if empty."""
+
+        with self._lock:
+            values = sorted(self._recent)
+        if not values:
+            return math.nan
+        rank = max(0, min(len(values) - 1, math.ceil(q / 100 * len(values)) - 1))
+        return values[rank]
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else math.nan
+
+
+class MetricsRegistry:
+    """Named, optionally labelled metrics shared across the process."""
+
+    def __init__(self) -> None:
+        self._counters: Dict[Tuple[str, LabelKey], Counter] = {}
+        self._gauges: Dict[Tuple[str, LabelKey], Gauge] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, str]) -> Tuple[str, LabelKey]:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def counter(self, name: str, **labels: str) -> Counter:
+        key = self._key(name, labels)
+        with self._lock:
+            return self._counters.setdefault(key, Counter())
+
+    def gauge(self, name: str, **labels: str) -> Gauge:
+        key = self._key(name, labels)
+        with self._lock:
+            return self._gauges.setdefault(key, Gauge())
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        key = self._key(name, labels)
+        with self._lock:
+            return self._histograms.setdefault(key, Histogram())
+
+    def snapshot(self) -> Dict[str, float]:
+        """Flatten all metrics into ``name{label=value}`` -> number."""
+
+        def fmt(name: str, labels: LabelKey, suffix: str = "") -> str:
+            rendered = ",".join(f"{k}={v}" for k, v in labels)
+            return f"{name}{suffix}{{{rendered}}}" if rendered else f"{name}{suffix}"
+
+        with self._lock:
+            counters = list(self._counters.items())
+            gauges = list(self._gauges.items())
+            histograms = list(self._histograms.items())
+
+        data: Dict[str, float] = {}
+        for (name, labels), metric in counters + gauges:
+            data[fmt(name, labels)] = metric.value
+        for (name, labels), hist in histograms:
+            data[fmt(name, labels, "_count")] = hist.count
+            data[fmt(name, labels, "_sum")] = hist.sum
+            for q in (50, 95, 99):
+                data[fmt(name, labels, f"_p{q}")] = hist.percentile(q)
+        return data
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,116 @@
+"""Per-call model tier routing by agent, input complexity, and triage priority."""
+
+from typing import Any, List, Mapping, Optional, Tuple
+
+from .admission import triage_priority_level
+from .config import ModelRoutingPolicy, config
+from .logging_utils import log_event
+from .metrics import metrics
+
+VALIDATION_FAILURES_KEY = "validation_failures"
+
+
+def latest_user_text(llm_request: Any) -> str:
+    """Text of the most recent user turn in the request (tool results skipped)."""
+
+    for content in reversed(getattr(llm_request, "contents", None) or []):
+        if getattr(content, "role", None) != "user":
+            continue
+        texts = [part.text for part in content.parts or [] if getattr(part, "text", None)]
+        if texts:
+            return "\n".join(texts)
+    return ""
+
+
+def validation_failures(state: Mapping[str, Any], stage: str, invocation_id: str) -> int:
+    """Validator failures recorded for ``stage`` during this invocation."""
+
+    record = (state.get(VALIDATION_FAILURES_KEY) or {}).get(stage)
+    if hasattr(record, "get") and record.get("invocation_id") == invocation_id:
+        return int(record.get("count", 0))
+    return 0
+
+
+def escalation_reasons(
+    text: str, priority: str, failures: int, policy: ModelRoutingPolicy
+) -> List[str]:
+    """Signals that this call needs a larger model than the agent's base tier."""
+
+    reasons = []
+    lowered = text.lower()
+    if len(text) > policy.complex_input_chars:
+        reasons.append("long_input")
+    if any(term in lowered for term in policy.red_flag_terms):
+        reasons.append("red_flag")
+    if priority in policy.escalate_priorities:
+        reasons.append("priority")
+    if failures >= policy.escalate_after_failures:
+        reasons.append("validator_failure")
+    return reasons
+
+
+def choose_tier(
+    base_tier: str, reasons: List[str], policy: ModelRoutingPolicy
+) -> Tuple[str, str]:
+    """Move ``base_tier`` up one tier per escalation reason; returns (tier, model)."""
+
+    ordered = list(policy.tiers)
+    index = min(ordered.index(base_tier) + len(reasons), len(ordered) - 1)
+    tier = ordered[index]
+    return tier, policy.tiers[tier]
+
+
+def _base_tier(agent_name: str, model: Optional[str], policy: ModelRoutingPolicy) -> Optional[str]:
+    tier = policy.agent_tiers.get(agent_name)
+    if tier in policy.tiers:
+        return tier
+    tier = policy.tier_of(model)
+    return tier if tier in policy.tiers else None
+
+
+def _stage(callback_context: Any) -> str:
+    """Name of the loop running this agent, where validators record failures."""
+
+    invocation = getattr(callback_context, "_invocation_context", None)
+    parent = getattr(getattr(invocation, "agent", None), "parent_agent", None)
+    return parent.name if parent is not None else callback_context.agent_name
+
+
+def model_routing_callback(callback_context, llm_request) -> None:
+    """``before_model_callback`` that rewrites ``llm_request.model`` to a tier."""
+
+    policy = config.model_routing
+    agent_name = callback_context.agent_name
+    base_tier = _base_tier(agent_name, llm_request.model, policy) if policy.enabled else None
+    if base_tier is None:
+        return None
+
+    state = callback_context.state
+    reasons = escalation_reasons(
+        latest_user_text(llm_request),
+        triage_priority_level(state),
+        validation_failures(state, _stage(callback_context), callback_context.invocation_id),
+        policy,
+    )
+    tier, model = choose_tier(base_tier, reasons, policy)
+    llm_request.model = model
+
+    metrics.counter("model_routing_calls_total", agent=agent_name, tier=tier).inc()
+    if tier != base_tier:
+        metrics.counter("model_routing_escalations_total", agent=agent_name).inc()
+        for reason in reasons:
+            metrics.counter("model_routing_escalation_reasons_total", reason=reason).inc()
+        log_event("model_routing", f"{agent_name}: {base_tier} -> {tier} ({', '.join(reasons)})")
+    return None
+
+
+def escalation_rate(agent_name: str) -> float:
+    """Share of ``agent_name``'s routed calls that were escalated."""
+
+    snapshot = metrics.snapshot()
+    prefix = "model_routing_calls_total{agent=" + agent_name + ","
+    calls = sum(value for key, value in snapshot.items() if key.startswith(prefix))
+    if not calls:
+        return 0.0
+    escalated = snapshot.get(f"model_routing_escalations_total{{agent={agent_name}}}", 0)
+    return escalated / calls
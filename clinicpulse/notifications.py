@@ -0,0 +1,260 @@
+"""Per-patient notification coalescing: one digest per channel per window."""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .config import config
+from .logging_utils import log_event
+from .metrics import metrics
+
+BucketKey = Tuple[str, str]  # (patient_id, channel)
+
+
+@dataclass
+class Notification:
+    patient_id: str
+    kind: str  # confirmation | rebooking | reminder | lab_ready
+    message: str
+    key: str
+    created_at: float
+    details: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class _Bucket:
+    opened_at: float
+    items: "OrderedDict[str, Notification]" = field(default_factory=OrderedDict)
+
+
+def log_transport(digest: Dict[str, Any]) -> None:
+    """Default transport: the mock channels just log the digest."""
+
+    log_event(
+        "notification_digest",
+        f"{digest['channel']}: {digest['count']} update(s) — " + " | ".join(digest["messages"]),
+        digest["patient_id"],
+    )
+
+
+class NotificationAggregator:
+    """Buffers patient notifications and sends one digest per channel.
+
+    The first event for a (patient, channel) opens a bucket. Events arriving
+    within ``window_s`` join it, and the whole bucket goes out as a single
+    digest when the window closes. Events with the same ``key`` (e.g. one
+    appointment) replace each other, and ``supersedes`` lets a rebooking
+    replace the confirmation of the appointment it moved. Buckets all share
+    one window, so they close in the order they opened and ``flush_due``
+    only looks at the oldest ones.
+
+    Nothing is sent until a digest goes out: ``delivery`` reports each
+    notification key as ``queued`` until then and ``sent`` afterwards. The
+    first submit starts the background flusher (unless ``autostart`` is
+    off), so digests go out however the app is served, ``adk web``
+    included. The runner pool worker and the batch CLI stop it on shutdown
+    to send what is left. With
+    ``window_s`` 0 every submit is sent at once. A digest whose transport
+    raises goes back to the front of the queue and is retried.
+    """
+
+    def __init__(
+        self,
+        window_s: Optional[float] = None,
+        channels: Optional[Sequence[str]] = None,
+        transport: Callable[[Dict[str, Any]], None] = log_transport,
+        max_delivered: int = 10_000,
+        autostart: bool = True,
+    ) -> None:
+        self.window_s = config.notification_window_s if window_s is None else window_s
+        self.channels = tuple(channels or config.notification_channels)
+        self.transport = transport
+        self.max_delivered = max_delivered
+        self.autostart = autostart
+        self._buckets: "OrderedDict[BucketKey, _Bucket]" = OrderedDict()
+        self._delivered: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(bucket.items) for bucket in self._buckets.values())
+
+    def submit(
+        self,
+        patient_id: str,
+        kind: str,
+        message: str,
+        *,
+        key: Optional[str] = None,
+        supersedes: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None,
+        channels: Optional[Sequence[str]] = None,
+        now: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Queue a notification; returns when each channel's digest is due."""
+
+        now = time.time() if now is None else now
+        notification = Notification(
+            patient_id=patient_id,
+            kind=kind,
+            message=message,
+            key=key or f"{kind}:{message}",
+            created_at=now,
+            details=dict(details or {}),
+        )
+        channels = tuple(channels or self.channels)
+        due_at = now
+        with self._lock:
+            for channel in channels:
+                bucket = self._buckets.get((patient_id, channel))
+                if bucket is None:
+                    bucket = self._buckets[(patient_id, channel)] = _Bucket(opened_at=now)
+                replaced = [k for k in (notification.key, supersedes) if k and k in bucket.items]
+                for replaced_key in replaced:
+                    # Keep the original queue time so delivery latency stays honest.
+                    notification.created_at = min(
+                        notification.created_at, bucket.items.pop(replaced_key).created_at
+                    )
+                if replaced:
+                    metrics.counter("notifications_deduplicated_total", channel=channel).inc(
+                        len(replaced)
+                    )
+                bucket.items[notification.key] = notification
+                due_at = max(due_at, bucket.opened_at + self.window_s)
+        metrics.counter("notifications_submitted_total", kind=kind).inc()
+        if self.window_s <= 0:
+            self.flush_due(now)
+        elif self.autostart:
+            self.start()
+        return {"channels": list(channels), "queued_at": now, "digest_due_at": due_at}
+
+    def delivery(self, patient_id: str, key: str) -> Dict[str, Any]:
+        """``queued`` until the digest carrying ``key`` is sent, then ``sent`` with its time."""
+
+        with self._lock:
+            sent_at = self._delivered.get((patient_id, key))
+            queued = any(
+                key in bucket.items
+                for (bucket_patient, _), bucket in self._buckets.items()
+                if bucket_patient == patient_id
+            )
+        if sent_at is not None and not queued:
+            return {"status": "sent", "sent_at": sent_at}
+        return {"status": "queued" if queued else "unknown", "sent_at": None}
+
+    def flush_due(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Send every digest whose window has closed."""
+
+        now = time.time() if now is None else now
+        with self._lock:
+            due = []
+            while self._buckets:
+                bucket_key, bucket = next(iter(self._buckets.items()))
+                if bucket.opened_at + self.window_s > now:
+                    break
+                due.append((bucket_key, self._buckets.pop(bucket_key)))
+        return self._send_all(due, now)
+
+    def flush(self, patient_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Send pending digests now (for one patient, or everyone)."""
+
+        now = time.time()
+        with self._lock:
+            keys = [key for key in self._buckets if patient_id is None or key[0] == patient_id]
+            due = [(key, self._buckets.pop(key)) for key in keys]
+        return self._send_all(due, now)
+
+    def _send_all(
+        self, due: List[Tuple[BucketKey, _Bucket]], now: float
+    ) -> List[Dict[str, Any]]:
+        """Send each bucket on its own; requeue the ones whose transport fails."""
+
+        sent, failed = [], []
+        for bucket_key, bucket in due:
+            try:
+                sent.append(self._send(bucket_key, bucket, now))
+            except Exception as exc:  # the transport is external; keep the rest going
+                failed.append((bucket_key, bucket))
+                metrics.counter("notification_digests_failed_total", channel=bucket_key[1]).inc()
+                log_event("notification_digest", f"send failed, requeued: {exc!r}", bucket_key[0])
+        if failed:
+            with self._lock:
+                for bucket_key, bucket in reversed(failed):
+                    newer = self._buckets.pop(bucket_key, None)
+                    if newer is not None:
+                        for key, item in newer.items.items():
+                            bucket.items.pop(key, None)
+                            bucket.items[key] = item
+                    self._buckets[bucket_key] = bucket
+                    self._buckets.move_to_end(bucket_key, last=False)
+        return sent
+
+    def _send(self, bucket_key: BucketKey, bucket: _Bucket, now: float) -> Dict[str, Any]:
+        patient_id, channel = bucket_key
+        items = list(bucket.items.values())
+        digest = {
+            "patient_id": patient_id,
+            "channel": channel,
+            "count": len(items),
+            "kinds": sorted({item.kind for item in items}),
+            "messages": [item.message for item in items],
+            "details": [item.details for item in items],
+            "sent_at": now,
+        }
+        self.transport(digest)
+        with self._lock:
+            for item in items:
+                self._delivered[(patient_id, item.key)] = now
+                self._delivered.move_to_end((patient_id, item.key))
+            while len(self._delivered) > self.max_delivered:
+                self._delivered.popitem(last=False)
+        metrics.counter("notification_digests_sent_total", channel=channel).inc()
+        metrics.counter("notification_messages_saved_total", channel=channel).inc(len(items) - 1)
+        for item in items:
+            metrics.histogram("notification_delivery_seconds", kind=item.kind).observe(
+                now - item.created_at
+            )
+        return digest
+
+    def start(self) -> None:
+        """Start the background flusher (idempotent)."""
+
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._stopped.clear()
+            self._flusher = threading.Thread(
+                target=self._run, name="notification-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    def _run(self) -> None:
+        interval = max(0.05, min(1.0, self.window_s / 10))
+        while not self._stopped.wait(interval):
+            self.flush_due()
+
+    def stop(self, flush: bool = True) -> None:
+        """Stop the background flusher, then send whatever is still pending."""
+
+        self._stopped.set()
+        with self._lock:
+            flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            flusher.join()
+        if flush:
+            self.flush()
+
+    def reset(self) -> None:
+        """Stop the flusher and forget everything without sending (tests)."""
+
+        self.stop(flush=False)
+        with self._lock:
+            self._buckets.clear()
+            self._delivered.clear()
+
+
+notifications = NotificationAggregator()
@@ -0,0 +1,175 @@
+"""Prompt assembly: byte-stable instruction prefixes plus a dynamic session suffix."""
+
+import datetime
+import functools
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, Set, Tuple
+
+from .config import ContextCachePolicy, config
+from .logging_utils import log_event
+from .metrics import metrics
+
+SESSION_CONTEXT_HEADER = "[Session context]"
+
+# State keys summarised in the session context, in a fixed order.
+DOSSIER_KEYS = ("patient_intake", "triage_priority", "lab_results", "appointment_details")
+
+
+def static_instruction(text: str) -> Callable[[Any], str]:
+    """Instruction provider that returns ``text`` verbatim on every call.
+
+    ADK does not run ``{state}`` templating over provider output, so the
+    system instruction stays byte-identical across turns, sessions, and
+    days. Per-call values belong in :func:`session_context` instead.
+    """
+
+    def provider(context: Any) -> str:
+        del context  # The prefix must not depend on the session.
+        return text
+
+    return provider
+
+
+def _today() -> datetime.date:
+    return datetime.date.today()
+
+
+def session_context(state: Mapping[str, Any], today: Optional[datetime.date] = None) -> str:
+    """Dynamic suffix: the date plus whichever dossier keys are filled in."""
+
+    lines = [SESSION_CONTEXT_HEADER, f"Date reference: {(today or _today()).isoformat()}"]
+    for key in DOSSIER_KEYS:
+        value = state.get(key)
+        if not value:
+            continue
+        if not isinstance(value, str):
+            value = json.dumps(value, sort_keys=True, default=str)
+        lines.append(f"{key}: {value}")
+    return "\n".join(lines)
+
+
+def is_session_context(content: Any) -> bool:
+    parts = getattr(content, "parts", None) or []
+    return bool(parts) and (getattr(parts[0], "text", None) or "").startswith(
+        SESSION_CONTEXT_HEADER
+    )
+
+
+def _system_text(request_config: Any) -> str:
+    instruction = getattr(request_config, "system_instruction", None)
+    if instruction is None or isinstance(instruction, str):
+        return instruction or ""
+    return "".join(getattr(part, "text", None) or "" for part in instruction.parts or [])
+
+
+def prefix_fingerprint(llm_request: Any) -> str:
+    """Hash of everything that precedes the conversation: model, system, tools."""
+
+    request_config = getattr(llm_request, "config", None)
+    digest = hashlib.sha256()
+    digest.update((llm_request.model or "").encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(_system_text(request_config).encode("utf-8"))
+    for tool in getattr(request_config, "tools", None) or []:
+        digest.update(b"\0")
+        digest.update(tool.model_dump_json(exclude_none=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+_LAST_PREFIX: Dict[str, str] = {}
+
+
+def _track_prefix(agent_name: str, fingerprint: str) -> None:
+    previous = _LAST_PREFIX.get(agent_name)
+    _LAST_PREFIX[agent_name] = fingerprint
+    if previous is not None and previous != fingerprint:
+        metrics.counter("prompt_prefix_changes_total", agent=agent_name).inc()
+
+
+class ContextCache:
+    """Explicit provider-side cache handles for stable prompt prefixes.
+
+    One cached-content resource is created per prefix fingerprint and
+    reused until shortly before its TTL expires. Prefixes the provider
+    rejects (e.g. below its minimum cacheable size) are not retried.
+    """
+
+    def __init__(self, policy: ContextCachePolicy) -> None:
+        self.policy = policy
+        self._handles: Dict[str, Tuple[str, float]] = {}
+        self._rejected: Set[str] = set()
+
+    @functools.cached_property
+    def _client(self):
+        from google import genai
+
+        return genai.Client()
+
+    async def handle(self, llm_request: Any, fingerprint: str) -> Optional[str]:
+        now = time.time()
+        cached = self._handles.get(fingerprint)
+        if cached is not None and cached[1] - now > self.policy.refresh_margin_s:
+            metrics.counter("context_cache_hits_total").inc()
+            return cached[0]
+        if fingerprint in self._rejected:
+            return None
+        if len(_system_text(llm_request.config)) < self.policy.min_prefix_chars:
+            self._rejected.add(fingerprint)
+            return None
+
+        from google.genai import types as genai_types
+
+        try:
+            cache = await self._client.aio.caches.create(
+                model=llm_request.model,
+                config=genai_types.CreateCachedContentConfig(
+                    display_name=f"clinicpulse-{fingerprint[:16]}",
+                    system_instruction=llm_request.config.system_instruction,
+                    tools=llm_request.config.tools,
+                    ttl=f"{self.policy.ttl_s}s",
+                ),
+            )
+        except Exception as exc:  # Caching is an optimisation; never fail the call.
+            self._rejected.add(fingerprint)
+            metrics.counter("context_cache_failures_total").inc()
+            log_event("context_cache", f"cache creation failed: {type(exc).__name__}: {exc}")
+            return None
+        self._handles[fingerprint] = (cache.name, now + self.policy.ttl_s)
+        metrics.counter("context_cache_creations_total").inc()
+        return cache.name
+
+
+@functools.lru_cache(maxsize=None)
+def context_cache() -> ContextCache:
+    return ContextCache(config.context_cache)
+
+
+async def prompt_assembly_callback(callback_context, llm_request) -> None:
+    """``before_model_callback`` that appends the dynamic suffix after the prefix.
+
+    Runs after model routing so the prefix fingerprint (and any explicit
+    cache handle) matches the model actually called.
+    """
+
+    from google.genai import types as genai_types
+
+    fingerprint = prefix_fingerprint(llm_request)
+    _track_prefix(callback_context.agent_name, fingerprint)
+
+    if config.context_cache.enabled:
+        handle = await context_cache().handle(llm_request, fingerprint)
+        if handle is not None:
+            # The cached resource already holds the system instruction and tools.
+            llm_request.config.cached_content = handle
+            llm_request.config.system_instruction = None
+            llm_request.config.tools = None
+
+    llm_request.contents.append(
+        genai_types.Content(
+            role="user",
+            parts=[genai_types.Part.from_text(text=session_context(callback_context.state))],
+        )
+    )
+    return None
@@ -0,0 +1,221 @@
+"""Per-session event recorder: model traffic, tool calls, and state deltas."""
+
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from .accounting import session_ids
+from .config import config
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def log_path(root: str, app_name: str, user_id: str, session_id: str) -> str:
+    """Recording file for one session: ``root/<app>/<user>/<session>.jsonl.gz``."""
+
+    parts = [_UNSAFE.sub("_", part) or "_" for part in (app_name, user_id, session_id)]
+    return os.path.join(root, *parts[:2], f"{parts[2]}.jsonl.gz")
+
+
+def _dump(value: Any) -> Any:
+    """JSON-ready form of pydantic models (requests, responses) and plain data."""
+
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    return value
+
+
+def _state_dict(state: Any) -> Dict[str, Any]:
+    return state.to_dict() if hasattr(state, "to_dict") else dict(state)
+
+
+class SessionRecorder:
+    """Buffers records per session and appends them as gzip members.
+
+    Each agent run's records are flushed when the agent finishes, so a log
+    is usable even if the process dies mid-conversation. The first record
+    is a header with the session's state when recording started, which the
+    replay engine uses as the initial state.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self._buffers: Dict[str, List[Dict[str, Any]]] = {}
+        self._paths: Dict[str, str] = {}
+        self._invocations: Dict[str, Set[str]] = {}
+        self._last_state: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def _session(self, context: Any) -> str:
+        app_name, user_id, session_id = session_ids(context)
+        key = f"{app_name}/{user_id}/{session_id}"
+        if key not in self._paths:
+            state = _state_dict(context.state)
+            path = self._paths[key] = log_path(self.root, app_name, user_id, session_id)
+            self._last_state[key] = {k: json.dumps(v, sort_keys=True, default=str) for k, v in state.items()}
+            self._invocations[key] = set()
+            if not os.path.exists(path):
+                self._buffers.setdefault(key, []).append({
+                    "t": "session",
+                    "app_name": app_name,
+                    "user_id": user_id,
+                    "session_id": session_id,
+                    "recorded_at": time.time(),
+                    "state": json.loads(json.dumps(state, default=str)),
+                })
+        return key
+
+    def _append(self, key: str, record: Dict[str, Any]) -> None:
+        self._buffers.setdefault(key, []).append(record)
+
+    def model_request(self, context: Any, llm_request: Any) -> None:
+        with self._lock:
+            key = self._session(context)
+            if context.invocation_id not in self._invocations[key]:
+                self._invocations[key].add(context.invocation_id)
+                self._append(key, {
+                    "t": "user",
+                    "inv": context.invocation_id,
+                    "content": _dump(getattr(context, "user_content", None)),
+                })
+            self._append(key, {
+                "t": "request",
+                "inv": context.invocation_id,
+                "agent": context.agent_name,
+                "model": llm_request.model,
+                "contents": len(llm_request.contents or []),
+            })
+
+    def model_response(self, context: Any, llm_response: Any) -> None:
+        with self._lock:
+            self._append(self._session(context), {
+                "t": "response",
+                "inv": context.invocation_id,
+                "agent": context.agent_name,
+                "response": _dump(llm_response),
+            })
+
+    def tool_call(self, tool_name: str, args: Any, tool_context: Any, response: Any) -> None:
+        with self._lock:
+            self._append(self._session(tool_context), {
+                "t": "tool",
+                "inv": tool_context.invocation_id,
+                "agent": tool_context.agent_name,
+                "tool": tool_name,
+                "call_id": getattr(tool_context, "function_call_id", None),
+                "args": json.loads(json.dumps(args, default=str)),
+                "response": json.loads(json.dumps(_dump(response), default=str)),
+            })
+
+    def agent_finished(self, context: Any) -> None:
+        with self._lock:
+            key = self._session(context)
+            current = {
+                k: json.dumps(v, sort_keys=True, default=str)
+                for k, v in _state_dict(context.state).items()
+            }
+            previous = self._last_state.get(key, {})
+            delta = {k: json.loads(v) for k, v in current.items() if previous.get(k) != v}
+            self._last_state[key] = current
+            if delta:
+                self._append(key, {
+                    "t": "state",
+                    "inv": context.invocation_id,
+                    "agent": context.agent_name,
+                    "delta": delta,
+                })
+            records = self._buffers.pop(key, [])
+            path = self._paths[key]
+        if records:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            payload = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+            with gzip.open(path, "at", encoding="utf-8") as handle:
+                handle.write(payload)
+
+
+@dataclass
+class SessionLog:
+    """A recorded session, as read back for replay."""
+
+    app_name: str
+    user_id: str
+    session_id: str
+    initial_state: Dict[str, Any] = field(default_factory=dict)
+    records: List[Dict[str, Any]] = field(default_factory=list)
+
+    def of_type(self, record_type: str) -> Iterator[Dict[str, Any]]:
+        return (record for record in self.records if record["t"] == record_type)
+
+    @property
+    def user_turns(self) -> List[Dict[str, Any]]:
+        return [record["content"] for record in self.of_type("user")]
+
+    def responses_by_agent(self) -> Dict[str, List[Dict[str, Any]]]:
+        scripts: Dict[str, List[Dict[str, Any]]] = {}
+        for record in self.of_type("response"):
+            scripts.setdefault(record["agent"], []).append(record["response"])
+        return scripts
+
+    def final_state(self) -> Dict[str, Any]:
+        state = dict(self.initial_state)
+        for record in self.of_type("state"):
+            state.update(record["delta"])
+        return state
+
+
+def read_session_log(path: str) -> SessionLog:
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        records = [json.loads(line) for line in handle if line.strip()]
+    if not records or records[0]["t"] != "session":
+        raise ValueError(f"{path} is not a ClinicPulse session recording")
+    header = records[0]
+    return SessionLog(
+        app_name=header["app_name"],
+        user_id=header["user_id"],
+        session_id=header["session_id"],
+        initial_state=header.get("state", {}),
+        records=records[1:],
+    )
+
+
+_RECORDER: Optional[SessionRecorder] = None
+
+
+def recorder() -> Optional[SessionRecorder]:
+    """Process-wide recorder, or ``None`` unless ``config.record_sessions_dir`` is set."""
+
+    global _RECORDER
+    if not config.record_sessions_dir:
+        return None
+    if _RECORDER is None or _RECORDER.root != config.record_sessions_dir:
+        _RECORDER = SessionRecorder(config.record_sessions_dir)
+    return _RECORDER
+
+
+def recorder_before_model(callback_context, llm_request) -> None:
+    if recorder() is not None:
+        recorder().model_request(callback_context, llm_request)
+    return None
+
+
+def recorder_after_model(callback_context, llm_response) -> None:
+    if recorder() is not None:
+        recorder().model_response(callback_context, llm_response)
+    return None
+
+
+def recorder_after_tool(tool, args, tool_context, tool_response) -> None:
+    if recorder() is not None:
+        recorder().tool_call(tool.name, args, tool_context, tool_response)
+    return None
+
+
+def recorder_after_agent(callback_context) -> None:
+    if recorder() is not None:
+        recorder().agent_finished(callback_context)
+    return None
@@ -0,0 +1,270 @@
+"""Deterministic replay of recorded sessions through the agent graph, with profiling."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import cProfile
+import io
+import json
+import pstats
+import re
+import sys
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncGenerator, Deque, Dict, Iterator, List, Optional, Tuple
+
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types as genai_types
+
+from .config import config
+from .hedging import HedgedLlm
+from .recorder import SessionLog, read_session_log
+from .runner_pool import run_bootstrap
+
+_AGENT_NAME = re.compile(r'Your internal name is "([^"]+)"')
+
+
+# Recorded responses per agent, keyed by replay model name so instances the
+# LLMRegistry creates from that name find their script.
+_SCRIPTS: Dict[str, Dict[str, Deque[Dict[str, Any]]]] = {}
+
+
+class ReplayDivergence(RuntimeError):
+    """The graph asked for a model call or tool result the recording lacks."""
+
+
+def _agent_name(llm_request: LlmRequest) -> str:
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    if instruction is not None and not isinstance(instruction, str):
+        instruction = "".join(part.text or "" for part in instruction.parts or [])
+    match = _AGENT_NAME.search(instruction or "")
+    return match.group(1) if match else ""
+
+
+class ReplayLlm(BaseLlm):
+    """Serves recorded responses per agent, in recorded order, with no model."""
+
+    model: str = "replay/default"
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r"replay/.*"]
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        agent = _agent_name(llm_request)
+        script = _SCRIPTS.get(self.model, {}).get(agent)
+        if not script:
+            raise ReplayDivergence(f"no recorded model response left for {agent or '?'}")
+        yield LlmResponse.model_validate(script.popleft())
+
+
+@dataclass
+class ReplayReport:
+    session_id: str
+    turns: int = 0
+    events: int = 0
+    elapsed_s: float = 0.0
+    turn_latency_s: List[float] = field(default_factory=list)
+    unused_responses: Dict[str, int] = field(default_factory=dict)
+    missing_state_keys: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def _walk(root: Any) -> List[Any]:
+    agents, pending = [], [root]
+    while pending:
+        agent = pending.pop()
+        agents.append(agent)
+        pending.extend(agent.sub_agents)
+    return agents
+
+
+@contextlib.contextmanager
+def install_replay(log: SessionLog, root: Any, live_tools: bool = False) -> Iterator[str]:
+    """Point every LLM agent at ``log``'s recorded responses; yields the model name.
+
+    Timeouts, routing, admission and the other callbacks still run, so the
+    replay measures real orchestration overhead. Hedging, context caching,
+    recording and accounting are switched off so the replay neither
+    consumes extra responses nor writes new records. Unless ``live_tools``
+    is set, tools return their recorded results instead of executing.
+    The config, the agents and the script are restored on exit.
+    """
+
+    name = f"replay/{uuid.uuid4().hex[:12]}"
+    _SCRIPTS[name] = {
+        agent: deque(responses) for agent, responses in log.responses_by_agent().items()
+    }
+    LLMRegistry.register(ReplayLlm)
+
+    routing = config.model_routing
+    saved_config = (
+        routing.tiers,
+        config.model_call_policies,
+        config.default_model_call_policy.hedge,
+        config.context_cache.enabled,
+        config.record_sessions_dir,
+        config.accounting_db,
+    )
+    routing.tiers = {tier: name for tier in routing.tiers}
+    config.model_call_policies = {}
+    config.default_model_call_policy.hedge = False
+    config.context_cache.enabled = False
+    config.record_sessions_dir = ""
+    config.accounting_db = ""
+
+    tool_results: Dict[Tuple[str, str], Deque[Any]] = {}
+    for record in log.of_type("tool"):
+        tool_results.setdefault((record["agent"], record["tool"]), deque()).append(
+            record["response"]
+        )
+
+    def replayed_tool(tool, args, tool_context) -> Any:
+        del args
+        results = tool_results.get((tool_context.agent_name, tool.name))
+        if not results:
+            raise ReplayDivergence(f"no recorded result left for {tool.name}")
+        return results.popleft()
+
+    saved_agents = []
+    for agent in _walk(root):
+        if not isinstance(agent, LlmAgent):
+            continue
+        saved_agents.append((agent, agent.model, agent.before_tool_callback))
+        if isinstance(agent.model, HedgedLlm):
+            agent.model = agent.model.model_copy(update={"model": name})
+        else:
+            agent.model = ReplayLlm(model=name)
+        if not live_tools:
+            existing = agent.before_tool_callback or []
+            if not isinstance(existing, list):
+                existing = [existing]
+            agent.before_tool_callback = [replayed_tool, *existing]
+    try:
+        yield name
+    finally:
+        for agent, model, before_tool_callback in saved_agents:
+            agent.model = model
+            agent.before_tool_callback = before_tool_callback
+        (
+            routing.tiers,
+            config.model_call_policies,
+            config.default_model_call_policy.hedge,
+            config.context_cache.enabled,
+            config.record_sessions_dir,
+            config.accounting_db,
+        ) = saved_config
+        _SCRIPTS.pop(name, None)
+
+
+async def replay_session(log: SessionLog, root: Any, model_name: str) -> ReplayReport:
+    """Re-drive ``root`` through the recorded user turns of ``log``."""
+
+    report = ReplayReport(session_id=log.session_id)
+    service = InMemorySessionService()
+    session = await service.create_session(
+        app_name=log.app_name, user_id=log.user_id, state=dict(log.initial_state)
+    )
+    runner = Runner(agent=root, app_name=log.app_name, session_service=service)
+    started = time.perf_counter()
+    try:
+        for content in log.user_turns:
+            turn_started = time.perf_counter()
+            async for _ in runner.run_async(
+                user_id=log.user_id,
+                session_id=session.id,
+                new_message=genai_types.Content.model_validate(content),
+            ):
+                report.events += 1
+            report.turns += 1
+            report.turn_latency_s.append(round(time.perf_counter() - turn_started, 6))
+    except ReplayDivergence as exc:
+        report.error = str(exc)
+    report.elapsed_s = round(time.perf_counter() - started, 6)
+
+    report.unused_responses = {
+        agent: len(script)
+        for agent, script in _SCRIPTS.get(model_name, {}).items()
+        if script
+    }
+    final = await service.get_session(
+        app_name=log.app_name, user_id=log.user_id, session_id=session.id
+    )
+    report.missing_state_keys = sorted(set(log.final_state()) - set(final.state))
+    return report
+
+
+def _profiled(mode: str, top: int, output: Optional[str], run) -> Tuple[Any, str]:
+    if mode == "cpu":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            result = run()
+        finally:
+            profiler.disable()
+        if output:
+            profiler.dump_stats(output)
+        buffer = io.StringIO()
+        pstats.Stats(profiler, stream=buffer).sort_stats("cumulative").print_stats(top)
+        return result, buffer.getvalue()
+    if mode == "memory":
+        tracemalloc.start(25)
+        try:
+            result = run()
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        if output:
+            snapshot.dump(output)
+        lines = [f"traced memory: current={current / 1024:.1f} KiB peak={peak / 1024:.1f} KiB"]
+        lines += [str(stat) for stat in snapshot.statistics("lineno")[:top]]
+        return result, "\n".join(lines)
+    return run(), ""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded ClinicPulse session without a model, optionally profiled."
+    )
+    parser.add_argument("log", help="Recording written under config.record_sessions_dir")
+    parser.add_argument("--profile", choices=["none", "cpu", "memory"], default="cpu")
+    parser.add_argument("--top", type=int, default=25, help="Profile entries to print")
+    parser.add_argument("--output", default=None, help="Write raw pstats / tracemalloc dump")
+    parser.add_argument("--live-tools", action="store_true", help="Execute tools for real")
+    parser.add_argument(
+        "--bootstrap", default=None, help="module:function to call before the graph is built"
+    )
+    args = parser.parse_args()
+
+    run_bootstrap(args.bootstrap)
+    log = read_session_log(args.log)
+    from .agent import root_agent
+
+    with install_replay(log, root_agent, live_tools=args.live_tools) as model_name:
+        report, profile = _profiled(
+            args.profile,
+            args.top,
+            args.output,
+            lambda: asyncio.run(replay_session(log, root_agent, model_name)),
+        )
+    if profile:
+        print(profile, file=sys.stderr)
+    print(json.dumps(asdict(report)))
+    if report.error:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
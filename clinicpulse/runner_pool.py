@@ -0,0 +1,557 @@
+"""Multi-process, session-sharded runner pool for ClinicPulse AI.
+
+Only sessions (spill directory), checkpoints and the ledger are shared
+between workers. Every other module-level singleton is per process: the
+waiting room, waitlist, identity index (until its snapshot is saved),
+notification queue, admission controller and circuit breakers. Each worker
+therefore sees only the patients whose sessions it served.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import contextlib
+import hashlib
+import importlib
+import itertools
+import json
+import multiprocessing
+import sys
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from .config import config
+from .logging_utils import log_event
+from .metrics import metrics
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes.
+
+    Adding or removing a worker only remaps the sessions that hashed to that
+    worker's virtual nodes (roughly ``1/N`` of them).
+    """
+
+    def __init__(self, virtual_nodes: int = 64) -> None:
+        self.virtual_nodes = virtual_nodes
+        self._points: List[int] = []
+        self._owners: List[str] = []
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.sha1(value.encode("utf-8")).digest()[:8], "big")
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(set(self._owners))
+
+    def add(self, node: str) -> None:
+        for replica in range(self.virtual_nodes):
+            point = self._hash(f"{node}#{replica}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node: str) -> None:
+        keep = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in keep]
+        self._owners = [o for _, o in keep]
+
+    def owner(self, key: str) -> str:
+        if not self._points:
+            raise LookupError("hash ring has no nodes")
+        index = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+# ------------------------------------------------------------------ worker
+
+
+def run_bootstrap(bootstrap: Optional[str]) -> None:
+    """Call ``module:function`` before the worker builds its Runner."""
+
+    if not bootstrap:
+        return
+    module_name, _, func_name = bootstrap.partition(":")
+    getattr(importlib.import_module(module_name), func_name or "install")()
+
+
+def _worker_main(
+    worker_id: str,
+    inbox: multiprocessing.Queue,
+    results: multiprocessing.Queue,
+    app_name: str,
+    spill_dir: Optional[str],
+    checkpoint_dir: Optional[str],
+    bootstrap: Optional[str],
+) -> None:
+    run_bootstrap(bootstrap)
+    asyncio.run(
+        _serve(worker_id, inbox, results, app_name, spill_dir, checkpoint_dir)
+    )
+
+
+async def _serve(
+    worker_id: str,
+    inbox: multiprocessing.Queue,
+    results: multiprocessing.Queue,
+    app_name: str,
+    spill_dir: Optional[str],
+    checkpoint_dir: Optional[str],
+) -> None:
+    from google.adk.runners import Runner
+    from google.genai import types as genai_types
+
+    from .agent import root_agent
+    from .checkpoints import (
+        CheckpointStore,
+        resume_message,
+        resume_session,
+        suspend_if_waiting,
+    )
+    from .notifications import notifications
+    from .session_cache import SpillingSessionService
+    from .waiting_room import waiting_room
+
+    notifications.start()
+    # Sessions spilled since the last reply; the parent unpins them.
+    spilled: set = set()
+    service = SpillingSessionService(
+        spill_dir=spill_dir, on_spill=lambda key: spilled.add(key[2])
+    )
+    store = CheckpointStore(checkpoint_dir)
+    runner = Runner(agent=root_agent, app_name=app_name, session_service=service)
+    # Per-session locks live only while a request holds or awaits them.
+    locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+    in_flight: set = set()
+    loop = asyncio.get_running_loop()
+
+    @contextlib.asynccontextmanager
+    async def session_lock(session_id: str) -> AsyncIterator[None]:
+        lock, users = locks.get(session_id, (None, 0))
+        lock = lock or asyncio.Lock()
+        locks[session_id] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = locks[session_id]
+            if users == 1:
+                del locks[session_id]
+            else:
+                locks[session_id] = (lock, users - 1)
+
+    async def run_turn(user_id: str, session_id: str, text: str) -> Optional[str]:
+        reply = None
+        async for event in runner.run_async(
+            user_id=user_id,
+            session_id=session_id,
+            new_message=genai_types.Content(
+                role="user", parts=[genai_types.Part.from_text(text=text)]
+            ),
+        ):
+            if event.is_final_response() and event.content and event.content.parts:
+                reply = event.content.parts[0].text
+        return reply
+
+    async def end_session(user_id: str, session_id: str) -> bool:
+        session = await service.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        if session is None:
+            return False
+        waiting_room.end_session(session.state)
+        await service.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        return True
+
+    async def handle(message: Dict[str, Any]) -> None:
+        user_id, session_id = message["user_id"], message["session_id"]
+        started = time.perf_counter()
+        payload: Dict[str, Any] = {"worker": worker_id, "session_id": session_id}
+        try:
+            async with session_lock(session_id):
+                if message["op"] == "end":
+                    payload["ended"] = await end_session(user_id, session_id)
+                    return
+                if message["op"] == "resume":
+                    resumed = await resume_session(
+                        service,
+                        store,
+                        app_name=app_name,
+                        user_id=user_id,
+                        session_id=session_id,
+                        lab_results=message["lab_results"],
+                    )
+                    if resumed is None:
+                        raise LookupError(f"no parked session {session_id}")
+                    text = resume_message(resumed[1])
+                else:
+                    text = message["text"]
+                    existing = await service.get_session(
+                        app_name=app_name, user_id=user_id, session_id=session_id
+                    )
+                    if existing is None:
+                        await service.create_session(
+                            app_name=app_name, user_id=user_id, session_id=session_id
+                        )
+                payload["reply"] = await run_turn(user_id, session_id, text)
+
+                session = await service.get_session(
+                    app_name=app_name, user_id=user_id, session_id=session_id
+                )
+                payload["suspended"] = bool(
+                    session and await suspend_if_waiting(service, session, store)
+                )
+        except Exception as exc:  # Surface errors to the caller, keep serving.
+            payload["error"] = f"{type(exc).__name__}: {exc}"
+        finally:
+            payload["latency_s"] = time.perf_counter() - started
+            if spilled:
+                payload["spilled"] = sorted(spilled)
+                spilled.clear()
+            results.put(("result", message["request_id"], payload))
+
+    log_event("runner_pool", f"worker {worker_id} ready")
+    while True:
+        message = await loop.run_in_executor(None, inbox.get)
+        if message is None:
+            break
+        task = asyncio.create_task(handle(message))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    # Drain: finish in-flight turns, then hand sessions over via the spill dir.
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    flushed = service.flush()
+    notifications.stop()
+    log_event("runner_pool", f"worker {worker_id} drained, flushed {flushed} sessions")
+    results.put(("drained", worker_id, flushed))
+
+
+# ------------------------------------------------------------------ parent
+
+
+class RunnerPool:
+    """Routes sessions to N worker processes, each with its own ``Runner``.
+
+    A session is pinned to the worker that first served it (sticky routing);
+    new sessions are placed by consistent hashing on ``session_id``. Workers
+    share the session spill directory, so when a worker is drained its
+    sessions are flushed to disk and rehydrated by their next owner.
+
+    A health check every ``config.runner_pool_health_interval_s`` notices
+    workers that exited without draining. Their in-flight requests resolve
+    with an ``error`` instead of hanging, since a turn that may have
+    half-run is not safe to replay. The dead worker is dropped from the ring
+    and replaced, and its sessions move to their new owners, which resume
+    from whatever was last spilled.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        *,
+        app_name: str = "clinicpulse",
+        spill_dir: Optional[str] = None,
+        checkpoint_dir: Optional[str] = None,
+        bootstrap: Optional[str] = None,
+        virtual_nodes: int = 64,
+    ) -> None:
+        self.target_workers = workers or config.runner_pool_workers
+        self.app_name = app_name
+        self.spill_dir = spill_dir or config.session_spill_dir
+        self.checkpoint_dir = checkpoint_dir or config.checkpoint_dir
+        self.bootstrap = bootstrap
+        self.ring = HashRing(virtual_nodes)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._results = self._ctx.Queue()
+        self._workers: Dict[str, Tuple[Any, Any]] = {}
+        self._draining: Dict[str, asyncio.Event] = {}
+        self._pinned: Dict[str, str] = {}
+        self._active: Dict[str, int] = {}
+        self._pending: Dict[int, Tuple[str, asyncio.Future]] = {}
+        self._request_ids = itertools.count()
+        self._worker_ids = itertools.count()
+        self._reader: Optional[threading.Thread] = None
+        self._monitor: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def workers(self) -> List[str]:
+        return self.ring.nodes
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._reader = threading.Thread(target=self._read_results, daemon=True)
+        self._reader.start()
+        for _ in range(self.target_workers):
+            self._spawn()
+        self._monitor = asyncio.create_task(self._watch_workers())
+
+    def _spawn(self) -> str:
+        worker_id = f"w{next(self._worker_ids)}"
+        inbox = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                worker_id,
+                inbox,
+                self._results,
+                self.app_name,
+                self.spill_dir,
+                self.checkpoint_dir,
+                self.bootstrap,
+            ),
+            name=f"clinicpulse-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        self._workers[worker_id] = (process, inbox)
+        self.ring.add(worker_id)
+        metrics.gauge("runner_pool_workers").set(len(self.ring.nodes))
+        return worker_id
+
+    def _read_results(self) -> None:
+        while True:
+            item = self._results.get()
+            if item is None:
+                return
+            self._loop.call_soon_threadsafe(self._dispatch, item)
+
+    def _dispatch(self, item: Tuple[Any, ...]) -> None:
+        kind = item[0]
+        if kind == "result":
+            _, future = self._pending.pop(item[1], (None, None))
+            if future is not None and not future.done():
+                future.set_result(item[2])
+        elif kind == "drained":
+            worker_id = item[1]
+            metrics.counter("runner_pool_drained_sessions_total").inc(item[2])
+            for session_id, owner in list(self._pinned.items()):
+                if owner == worker_id:
+                    del self._pinned[session_id]
+            event = self._draining.get(worker_id)
+            if event is not None:
+                event.set()
+
+    async def _watch_workers(self) -> None:
+        while True:
+            await asyncio.sleep(config.runner_pool_health_interval_s)
+            self.check_workers()
+
+    def check_workers(self) -> List[str]:
+        """Handle workers that exited without being drained; returns their ids."""
+
+        dead = [
+            worker_id
+            for worker_id, (process, _) in self._workers.items()
+            if not process.is_alive()
+            # A worker that drained normally exits before resize() reaps it.
+            and not (worker_id in self._draining and self._draining[worker_id].is_set())
+        ]
+        for worker_id in dead:
+            process, _ = self._workers[worker_id]
+            draining = worker_id in self._draining
+            log_event(
+                "runner_pool",
+                f"worker {worker_id} exited with code {process.exitcode}"
+                f"{' while draining' if draining else ''}",
+            )
+            metrics.counter("runner_pool_worker_deaths_total").inc()
+            for request_id, (owner, future) in list(self._pending.items()):
+                if owner != worker_id:
+                    continue
+                del self._pending[request_id]
+                if not future.done():
+                    future.set_result(
+                        {
+                            "worker": worker_id,
+                            "error": f"WorkerDied: worker {worker_id} exited "
+                            f"(code {process.exitcode}) before replying",
+                            "latency_s": 0.0,
+                        }
+                    )
+            for session_id, owner in list(self._pinned.items()):
+                if owner == worker_id:
+                    del self._pinned[session_id]
+            if draining:
+                # resize() is waiting on the drain; let it finish the cleanup.
+                self._draining[worker_id].set()
+                continue
+            del self._workers[worker_id]
+            self.ring.remove(worker_id)
+            self._spawn()
+        return dead
+
+    async def _route(self, session_id: str) -> str:
+        worker_id = self._pinned.get(session_id)
+        if worker_id in self._draining:
+            # Wait until the old owner has flushed the session to disk.
+            await self._draining[worker_id].wait()
+            worker_id = None
+        if worker_id is None:
+            worker_id = self.ring.owner(session_id)
+            self._pinned[session_id] = worker_id
+        return worker_id
+
+    async def _submit(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        worker_id = await self._route(message["session_id"])
+        request_id = next(self._request_ids)
+        message["request_id"] = request_id
+        future = self._loop.create_future()
+        self._pending[request_id] = (worker_id, future)
+        session_id = message["session_id"]
+        self._active[session_id] = self._active.get(session_id, 0) + 1
+        try:
+            self._workers[worker_id][1].put(message)
+            result = await future
+        finally:
+            self._active[session_id] -= 1
+            if not self._active[session_id]:
+                del self._active[session_id]
+        self._unpin_spilled(worker_id, result.pop("spilled", ()))
+        result.setdefault("session_id", session_id)
+        metrics.counter("runner_pool_requests_total", worker=worker_id).inc()
+        metrics.histogram("runner_pool_latency_seconds").observe(result["latency_s"])
+        return result
+
+    def _unpin_spilled(self, worker_id: str, session_ids: Iterable[str]) -> None:
+        """Forget pins of sessions the worker spilled; the ring re-places them."""
+
+        for session_id in session_ids:
+            # A session with a request still queued stays with its worker.
+            if self._pinned.get(session_id) == worker_id and session_id not in self._active:
+                del self._pinned[session_id]
+
+    async def send(self, user_id: str, session_id: str, text: str) -> Dict[str, Any]:
+        """Run one user turn on the session's worker and return its reply."""
+
+        return await self._submit(
+            {"op": "message", "user_id": user_id, "session_id": session_id, "text": text}
+        )
+
+    async def resume(
+        self, user_id: str, session_id: str, lab_results: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Resume a session that was checkpointed while waiting on labs."""
+
+        return await self._submit(
+            {
+                "op": "resume",
+                "user_id": user_id,
+                "session_id": session_id,
+                "lab_results": lab_results,
+            }
+        )
+
+    async def end(self, user_id: str, session_id: str) -> Dict[str, Any]:
+        """End a session: delete it and take its patient out of the waiting room."""
+
+        result = await self._submit(
+            {"op": "end", "user_id": user_id, "session_id": session_id}
+        )
+        self._pinned.pop(session_id, None)
+        return result
+
+    async def resize(self, workers: int) -> None:
+        """Grow or shrink the pool; removed workers are drained gracefully."""
+
+        current = self.ring.nodes
+        if workers > len(current):
+            for _ in range(workers - len(current)):
+                self._spawn()
+            return
+
+        victims = sorted(current, key=lambda w: int(w[1:]))[workers:]
+        for worker_id in victims:
+            self.ring.remove(worker_id)
+            self._draining[worker_id] = asyncio.Event()
+            self._workers[worker_id][1].put(None)
+        metrics.gauge("runner_pool_workers").set(len(self.ring.nodes))
+        for worker_id in victims:
+            await self._draining[worker_id].wait()
+            process, _ = self._workers.pop(worker_id)
+            await asyncio.get_running_loop().run_in_executor(None, process.join)
+            del self._draining[worker_id]
+            log_event("runner_pool", f"worker {worker_id} removed")
+
+    async def close(self) -> None:
+        await self.resize(0)  # The monitor still runs, so a crash mid-drain cannot hang this.
+        if self._monitor is not None:
+            self._monitor.cancel()
+        self._results.put(None)
+        if self._reader is not None:
+            self._reader.join()
+
+
+async def _serve_stdio(args: argparse.Namespace) -> None:
+    """Read ``{"user_id", "session_id", "text"}`` lines from stdin, reply on stdout.
+
+    ``{"user_id", "session_id", "end": true}`` ends the session instead. A
+    line that is not a complete request is answered with an ``error``.
+    """
+
+    pool = RunnerPool(args.workers, bootstrap=args.bootstrap)
+    await pool.start()
+    loop = asyncio.get_running_loop()
+    pending: set = set()
+
+    def reply(result: Dict[str, Any]) -> None:
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+
+    async def answer(request: Dict[str, Any]) -> None:
+        try:
+            if request.get("end"):
+                result = await pool.end(request["user_id"], request["session_id"])
+            elif "lab_results" in request:
+                result = await pool.resume(
+                    request["user_id"], request["session_id"], request["lab_results"]
+                )
+            else:
+                result = await pool.send(
+                    request["user_id"], request["session_id"], request["text"]
+                )
+        except KeyError as exc:
+            result = {"session_id": request.get("session_id"), "error": f"missing field {exc}"}
+        reply(result)
+
+    while True:
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        if not line:
+            break
+        if line.strip():
+            # A malformed line gets an error result; the server keeps going.
+            try:
+                request = json.loads(line)
+            except ValueError as exc:
+                reply({"error": f"invalid JSON ({exc})"})
+                continue
+            if not isinstance(request, dict):
+                reply({"error": "expected a JSON object"})
+                continue
+            task = asyncio.create_task(answer(request))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.gather(*pending)
+    await pool.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve ClinicPulse AI from a runner pool.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker process count")
+    parser.add_argument(
+        "--bootstrap",
+        default=None,
+        help="module:function to call in each worker before the Runner is built",
+    )
+    asyncio.run(_serve_stdio(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
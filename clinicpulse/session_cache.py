@@ -0,0 +1,245 @@
+"""Memory-bounded session service that spills idle sessions to disk."""
+
+import hashlib
+import os
+import pathlib
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService, Session
+from google.adk.sessions.base_session_service import (
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+
+from .config import config as clinicpulse_config
+from .logging_utils import log_event
+from .metrics import metrics
+
+SessionKey = Tuple[str, str, str]
+
+
+class SpillingSessionService(InMemorySessionService):
+    """InMemorySessionService that keeps hot sessions under a byte budget.
+
+    Sessions are tracked in LRU order. When the estimated resident size goes
+    over ``max_resident_bytes`` the least recently used sessions are written
+    to zlib-compressed JSON files and dropped from memory, down to the
+    session just used if it alone is over budget (it is spilled once its
+    event is stored). Sessions untouched for ``idle_s`` are spilled as well.
+    Any later read or append rehydrates them transparently, so callers
+    (``Runner``) never see the difference apart from latency. ``on_spill``
+    is called with each spilled session's key.
+    """
+
+    def __init__(
+        self,
+        max_resident_bytes: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        idle_s: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        on_spill: Optional[Callable[[SessionKey], None]] = None,
+    ) -> None:
+        super().__init__()
+        self.max_resident_bytes = (
+            max_resident_bytes
+            if max_resident_bytes is not None
+            else clinicpulse_config.session_cache_bytes
+        )
+        self.spill_dir = pathlib.Path(spill_dir or clinicpulse_config.session_spill_dir)
+        self.idle_s = clinicpulse_config.session_idle_s if idle_s is None else idle_s
+        self.clock = clock
+        self.on_spill = on_spill
+        self._lru: "OrderedDict[SessionKey, int]" = OrderedDict()
+        self._touched: Dict[SessionKey, float] = {}
+        self._spilled: set = set()
+        self._resident_bytes = 0
+
+    # ------------------------------------------------------------------ API
+
+    @property
+    def resident_bytes(self) -> int:
+        return self._resident_bytes
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session = await super().create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+        key = (app_name, user_id, session.id)
+        self._track(key, len(session.model_dump_json()))
+        return session
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        key = (app_name, user_id, session_id)
+        self._ensure_resident(key)
+        session = await super().get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+        if session is not None:
+            # The caller (Runner) appends to this session next; don't spill it.
+            self._track(key, 0, keep=True)
+        return session
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: Optional[str] = None
+    ) -> ListSessionsResponse:
+        response = await super().list_sessions(app_name=app_name, user_id=user_id)
+        for key in sorted(self._spilled):
+            if key[0] != app_name or (user_id is not None and key[1] != user_id):
+                continue
+            session = self._read_spilled(key)
+            if session is not None:
+                session.events = []
+                response.sessions.append(session)
+        return response
+
+    async def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        key = (app_name, user_id, session_id)
+        await super().delete_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        self._resident_bytes -= self._lru.pop(key, 0)
+        self._touched.pop(key, None)
+        self._spilled.discard(key)
+        self._spill_path(key).unlink(missing_ok=True)
+        metrics.gauge("session_cache_resident_bytes").set(self._resident_bytes)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        key = (session.app_name, session.user_id, session.id)
+        self._ensure_resident(key)
+        event = await super().append_event(session=session, event=event)
+        if not event.partial:
+            self._track(key, len(event.model_dump_json()))
+        return event
+
+    def evict(self, app_name: str, user_id: str, session_id: str) -> bool:
+        """Spill one session to disk immediately (e.g. when it parks on labs)."""
+
+        key = (app_name, user_id, session_id)
+        if key not in self._lru:
+            return False
+        self._spill(key)
+        return True
+
+    def evict_idle(self, keep: Optional[SessionKey] = None) -> int:
+        """Spill sessions untouched for ``idle_s``; returns how many."""
+
+        if self.idle_s <= 0:
+            return 0
+        cutoff = self.clock() - self.idle_s
+        spilled = 0
+        while self._lru:
+            oldest = next(iter(self._lru))
+            if oldest == keep or self._touched[oldest] > cutoff:
+                break
+            self._spill(oldest)
+            spilled += 1
+        return spilled
+
+    def flush(self) -> int:
+        """Spill every resident session; used when a worker drains."""
+
+        keys = list(self._lru)
+        for key in keys:
+            self._spill(key)
+        return len(keys)
+
+    # ------------------------------------------------------------ internals
+
+    def _spill_path(self, key: SessionKey) -> pathlib.Path:
+        digest = hashlib.sha256("\0".join(key).encode("utf-8")).hexdigest()
+        return self.spill_dir / digest[:2] / f"{digest[2:32]}.json.z"
+
+    def _track(self, key: SessionKey, grow_bytes: int, keep: bool = False) -> None:
+        """Mark ``key`` most recently used, account its growth, enforce budget.
+
+        ``keep`` holds ``key`` resident because the caller is about to use
+        the stored copy; otherwise it is spilled too if it alone is over
+        budget.
+        """
+
+        size = self._lru.pop(key, 0) + grow_bytes
+        self._lru[key] = size
+        self._touched[key] = self.clock()
+        self._resident_bytes += grow_bytes
+        while self._resident_bytes > self.max_resident_bytes and self._lru:
+            oldest = next(iter(self._lru))
+            if oldest == key and keep:
+                break
+            self._spill(oldest)
+        self.evict_idle(keep=key)
+        metrics.gauge("session_cache_resident_bytes").set(self._resident_bytes)
+
+    def _spill(self, key: SessionKey) -> None:
+        app_name, user_id, session_id = key
+        session = self.sessions.get(app_name, {}).get(user_id, {}).pop(session_id, None)
+        self._resident_bytes -= self._lru.pop(key, 0)
+        self._touched.pop(key, None)
+        if session is None:
+            return
+
+        path = self._spill_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(zlib.compress(session.model_dump_json().encode("utf-8")))
+        os.replace(tmp_path, path)
+        self._spilled.add(key)
+        if self.on_spill is not None:
+            self.on_spill(key)
+
+        metrics.counter("session_cache_evictions_total").inc()
+        metrics.gauge("session_cache_resident_bytes").set(self._resident_bytes)
+        log_event("session_cache", f"spilled idle session {session_id} to disk")
+
+    def _read_spilled(self, key: SessionKey) -> Optional[Session]:
+        path = self._spill_path(key)
+        try:
+            payload = zlib.decompress(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        return Session.model_validate_json(payload)
+
+    def _ensure_resident(self, key: SessionKey) -> None:
+        """Rehydrate a spilled session (possibly spilled by another worker)."""
+
+        app_name, user_id, session_id = key
+        if session_id in self.sessions.get(app_name, {}).get(user_id, {}):
+            return
+
+        started = time.perf_counter()
+        path = self._spill_path(key)
+        try:
+            payload = zlib.decompress(path.read_bytes())
+        except FileNotFoundError:
+            self._spilled.discard(key)
+            return
+        session = Session.model_validate_json(payload)
+        self.sessions.setdefault(app_name, {}).setdefault(user_id, {})[session_id] = session
+        path.unlink(missing_ok=True)
+        self._spilled.discard(key)
+
+        metrics.counter("session_cache_rehydrations_total").inc()
+        metrics.histogram("session_cache_rehydration_seconds").observe(
+            time.perf_counter() - started
+        )
+        log_event("session_cache", f"rehydrated session {session_id}")
+        self._track(key, len(payload), keep=True)
@@ -1,10 +1,18 @@
-"""ClinicPulse sub-agent exports."""
+"""ClinicPulse sub-agent exports.
 
-from .appointment import appointment_loop
-from .briefing import briefing_ensemble
-from .intake import intake_loop
-from .labs import lab_wait_loop
-from .triage import triage_loop
+Sub-agents are built lazily on first attribute access so that importing the
+package stays cheap; see each module's ``build_*`` function.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "intake_loop": ".intake",
+    "triage_loop": ".triage",
+    "briefing_ensemble": ".briefing",
+    "lab_wait_loop": ".labs",
+    "appointment_loop": ".appointment",
+}
 
 __all__ = [
     "intake_loop",
@@ -13,3 +21,9 @@ __all__ = [
     "lab_wait_loop",
     "appointment_loop",
 ]
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,23 +1,32 @@
 """Appointment scheduling agent definitions."""
 
+import functools
+
 from google.adk.agents import Agent, LoopAgent
-from google.adk.tools import FunctionTool
 
-from ..agent_utils import suppress_output_callback
+from ..agent_utils import (
+    after_agent_callbacks,
+    after_model_callbacks,
+    after_tool_callbacks,
+    before_model_callbacks,
+    before_tool_callbacks,
+    function_tool,
+    lazy_agent_attributes,
+    suppress_output_callback,
+)
 from ..config import config
+from ..hedging import hedged_model
+from ..prompts import static_instruction
 from ..tools import (
     book_appointment,
+    cancel_appointment,
     check_doctor_availability,
     send_appointment_confirmation,
 )
 from ..validation import AppointmentValidationChecker
 
 
-appointment_scheduler = Agent(
-    name="appointment_scheduler",
-    model=config.worker_model,
-    description="Books doctor appointments based on triage priority and patient needs.",
-    instruction="""
+APPOINTMENT_INSTRUCTION = """
     You are the appointment coordinator. Your job is to schedule a doctor appointment for the patient.
 
     Steps to follow:
@@ -31,9 +40,16 @@ appointment_scheduler = Agent(
        - doctor_name (from available slots)
        - appointment_datetime (selected slot datetime)
        - appointment_type (default: "consultation")
+       - specialty (from step 3)
+       - urgency_level (from step 2)
+       Non-critical patients booked on a later day are waitlisted automatically (`waitlisted` in the response)
+       and moved to an earlier slot if one is cancelled; tell the patient so.
+       If it returns status "slot_taken", pick another slot from `check_doctor_availability` and book again.
     7. **Send confirmation**: Call `send_appointment_confirmation` with:
        - patient_id
        - appointment_details (the dict returned from book_appointment)
+       A "queued" status means the confirmation goes out in the patient's next digest
+       (by `digest_due_at`); tell the patient it is on its way rather than already sent.
     8. **Store complete details**: Ensure the `appointment_details` state key contains ALL fields:
        - patient_id (string)
        - appointment_id (string, from book_appointment response)
@@ -41,32 +57,61 @@ appointment_scheduler = Agent(
        - datetime (string, appointment datetime)
        - specialty (string, medical specialty)
        - urgency_level (string, from triage_priority)
-       - confirmation_sent (boolean, True after sending confirmation)
+       - confirmation_sent (boolean, exactly as returned by send_appointment_confirmation)
+       - confirmation_status ("queued" until the digest goes out, then "sent")
+
+    If the patient asks to cancel an appointment, call `cancel_appointment` with its appointment_id instead of booking;
+    the freed slot is offered to waitlisted patients automatically.
 
     IMPORTANT:
     - Always extract patient_id from patient_intake state first
     - If patient_id is missing, set it to "UNKNOWN" and log a warning
     - Ensure all required fields are present in the final appointment_details output
     - The appointment_details must be a structured dictionary, not a text summary
+    - If a tool returns status "degraded", do not retry it this turn; keep confirmation_sent False and note the gap
 
     Be professional and ensure all booking details are accurate.
-    """,
-    tools=[
-        FunctionTool(check_doctor_availability),
-        FunctionTool(book_appointment),
-        FunctionTool(send_appointment_confirmation),
-    ],
-    output_key="appointment_details",
-    after_agent_callback=suppress_output_callback,
-)
+    """
+
+
+@functools.lru_cache(maxsize=None)
+def build_appointment_loop() -> LoopAgent:
+    """Build the appointment loop on first use; cached until the graph is reset."""
+
+    appointment_scheduler = Agent(
+        name="appointment_scheduler",
+        model=hedged_model("appointment_scheduler", config.worker_model),
+        description="Books doctor appointments based on triage priority and patient needs.",
+        instruction=static_instruction(APPOINTMENT_INSTRUCTION),
+        tools=[
+            function_tool(check_doctor_availability),
+            function_tool(book_appointment),
+            function_tool(cancel_appointment),
+            function_tool(send_appointment_confirmation),
+        ],
+        output_key="appointment_details",
+        before_model_callback=before_model_callbacks(),
+        after_model_callback=after_model_callbacks(),
+        before_tool_callback=before_tool_callbacks(),
+        after_tool_callback=after_tool_callbacks(),
+        after_agent_callback=after_agent_callbacks(suppress_output_callback),
+    )
+
+    return LoopAgent(
+        name="appointment_loop",
+        description="Retries appointment booking if validation fails",
+        sub_agents=[
+            appointment_scheduler,
+            AppointmentValidationChecker(name="appointment_validator"),
+        ],
+        max_iterations=3,
+    )
 
 
-appointment_loop = LoopAgent(
-    name="appointment_loop",
-    description="Retries appointment booking if validation fails",
-    sub_agents=[
-        appointment_scheduler,
-        AppointmentValidationChecker(name="appointment_validator"),
-    ],
-    max_iterations=3,
+__getattr__ = lazy_agent_attributes(
+    __name__,
+    {
+        "appointment_loop": build_appointment_loop,
+        "appointment_scheduler": lambda: build_appointment_loop().sub_agents[0],
+    },
 )
@@ -1,26 +1,57 @@
 """Clinician briefing agent definitions."""
 
+import functools
+
 from google.adk.agents import Agent
-from google.adk.tools import FunctionTool
 
-from ..agent_utils import suppress_output_callback
+from ..agent_utils import (
+    after_agent_callbacks,
+    after_model_callbacks,
+    after_tool_callbacks,
+    before_model_callbacks,
+    before_tool_callbacks,
+    function_tool,
+    lazy_agent_attributes,
+    suppress_output_callback,
+)
+from ..briefing_renderer import briefing_facts_callback, briefing_merge_callback
 from ..config import config
-from ..tools import fetch_patient_records, wait_for_lab_results
-
-
-briefing_ensemble = Agent(
-    name="clinician_briefing",
-    model=config.critic_model,
-    description="Produces doctor-ready patient dossiers.",
-    instruction="""
-    Combine `patient_intake`, `triage_priority`, and any fetched records into a concise briefing.
-    Structure your Markdown with sections: Overview, Vitals/History, Risk Flags, Next Steps.
-    Highlight missing information and propose clarifying questions for the clinician.
-    """,
-    tools=[
-        FunctionTool(fetch_patient_records),
-        FunctionTool(wait_for_lab_results),
-    ],
-    output_key="clinician_briefing",
-    after_agent_callback=suppress_output_callback,
+from ..hedging import hedged_model
+from ..prompts import static_instruction
+from ..tools import wait_for_lab_results
+
+
+BRIEFING_INSTRUCTION = """
+    You write the narrative half of a clinician briefing. The Overview and Vitals/History
+    sections are rendered automatically from `patient_intake`, `triage_priority`,
+    `lab_results` and the EHR, and are shown to you in the `[Briefing facts]` block.
+    Do not repeat them. Reply with only these two concise Markdown sections:
+    ## Risk Flags
+    Red flags, deterioration risks, and missing information that matters clinically.
+    ## Next Steps
+    Recommended actions, outstanding orders, and clarifying questions for the clinician.
+    """
+
+
+@functools.lru_cache(maxsize=None)
+def build_briefing_ensemble() -> Agent:
+    """Build the briefing agent on first use; cached until the graph is reset."""
+
+    return Agent(
+        name="clinician_briefing",
+        model=hedged_model("clinician_briefing", config.critic_model),
+        description="Produces doctor-ready patient dossiers.",
+        instruction=static_instruction(BRIEFING_INSTRUCTION),
+        tools=[function_tool(wait_for_lab_results)],
+        output_key="clinician_briefing",
+        before_model_callback=before_model_callbacks(briefing_facts_callback),
+        after_model_callback=after_model_callbacks(briefing_merge_callback),
+        before_tool_callback=before_tool_callbacks(),
+        after_tool_callback=after_tool_callbacks(),
+        after_agent_callback=after_agent_callbacks(suppress_output_callback),
+    )
+
+
+__getattr__ = lazy_agent_attributes(
+    __name__, {"briefing_ensemble": build_briefing_ensemble}
 )
@@ -1,17 +1,27 @@
 """Patient intake agent definitions."""
 
+import functools
+
 from google.adk.agents import Agent, LoopAgent
 
-from ..agent_utils import suppress_output_callback
+from ..agent_utils import (
+    after_agent_callbacks,
+    after_model_callbacks,
+    after_tool_callbacks,
+    before_model_callbacks,
+    before_tool_callbacks,
+    function_tool,
+    lazy_agent_attributes,
+    suppress_output_callback,
+)
 from ..config import config
+from ..hedging import hedged_model
+from ..prompts import static_instruction
+from ..tools import resolve_patient_identity
 from ..validation import IntakeValidationChecker
 
 
-intake_agent = Agent(
-    name="intake_collector",
-    model=config.worker_model,
-    description="Collects patient demographics and symptoms.",
-    instruction="""
+INTAKE_INSTRUCTION = """
     You are the front-desk intake assistant. Collect patient information conversationally.
     
     CRITICAL RULES:
@@ -21,32 +31,60 @@ intake_agent = Agent(
     4. ALWAYS ask about medical history before finishing
     
     Required information to collect (in order):
-    1. Patient name or ID
+    1. Patient name or ID. Call `resolve_patient_identity` with it (and the date of
+       birth if they gave one). If the status is "matched" or "registered", use the
+       returned `patient_id`; if "ambiguous" or "needs_confirmation", ask for their
+       date of birth (or, with `dob_mismatch`, ask them to repeat it) and call it again; if "not_found", ask them to check the ID or give their name instead;
+       if "degraded", use the name or ID as given.
     2. Primary symptoms (what's bothering them)
     3. Symptom duration (when did it start)
     4. Medical history (ask: "Do you have any medical conditions like diabetes, heart disease, or allergies?")
     
     After collecting ALL FOUR items, save to `patient_intake` state as:
     {
-      "patient_id": "name or ID",
+      "patient_id": "canonical patient_id from resolve_patient_identity",
       "symptoms": "description",
       "duration": "timeframe",
       "history": "conditions or 'none'"
     }
     
     Be warm and professional. Don't summarize or repeat - just ask the next question.
-    """,
-    output_key="patient_intake",
-    after_agent_callback=suppress_output_callback,
-)
+    """
+
 
+@functools.lru_cache(maxsize=None)
+def build_intake_loop() -> LoopAgent:
+    """Build the intake loop on first use; cached until the graph is reset."""
 
-intake_loop = LoopAgent(
-    name="intake_loop",
-    description="Collects patient intake information conversationally",
-    sub_agents=[
-        intake_agent,
-        IntakeValidationChecker(name="intake_validator"),
-    ],
-    max_iterations=3,  # Allow retries if validation fails, but improved validation prevents loops
+    intake_agent = Agent(
+        name="intake_collector",
+        model=hedged_model("intake_collector", config.worker_model),
+        description="Collects patient demographics and symptoms.",
+        instruction=static_instruction(INTAKE_INSTRUCTION),
+        tools=[function_tool(resolve_patient_identity)],
+        output_key="patient_intake",
+        before_model_callback=before_model_callbacks(),
+        after_model_callback=after_model_callbacks(),
+        before_tool_callback=before_tool_callbacks(),
+        after_tool_callback=after_tool_callbacks(),
+        after_agent_callback=after_agent_callbacks(suppress_output_callback),
+    )
+
+    return LoopAgent(
+        name="intake_loop",
+        description="Collects patient intake information conversationally",
+        sub_agents=[
+            intake_agent,
+            IntakeValidationChecker(name="intake_validator"),
+        ],
+        max_iterations=3,  # Allow retries if validation fails, but improved validation prevents loops
+    )
+
+
+__getattr__ = lazy_agent_attributes(
+    __name__,
+    {
+        "intake_loop": build_intake_loop,
+        "intake_agent": lambda: build_intake_loop().sub_agents[0],
+    },
 )
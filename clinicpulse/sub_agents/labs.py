@@ -1,35 +1,67 @@
 """Lab wait/pause agent definitions."""
 
-from google.adk.agents import Agent, LoopAgent
+import functools
 
-from ..agent_utils import suppress_output_callback
+from google.adk.agents import Agent
+
+from ..agent_utils import (
+    after_agent_callbacks,
+    after_model_callbacks,
+    after_tool_callbacks,
+    before_model_callbacks,
+    before_tool_callbacks,
+    lazy_agent_attributes,
+    suppress_output_callback,
+)
+from ..checkpoints import CheckpointedLoopAgent
 from ..config import config
+from ..hedging import hedged_model
+from ..prompts import static_instruction
 from ..validation import LabResultsValidationChecker
 
 
-lab_request_agent = Agent(
-    name="lab_requester",
-    model=config.worker_model,
-    description="Pauses workflow until lab results are provided.",
-    instruction="""
+LAB_REQUEST_INSTRUCTION = """
     If lab work or imaging is required, kindly request the outstanding results from the user.
     Store any provided details under the `lab_results` state key with keys:
       - patient_id
       - lab_summary
       - timestamp (if provided)
     Stay in this loop until the user supplies the results.
-    """,
-    output_key="lab_results",
-    after_agent_callback=suppress_output_callback,
-)
+    """
+
+
+@functools.lru_cache(maxsize=None)
+def build_lab_wait_loop() -> CheckpointedLoopAgent:
+    """Build the lab wait loop on first use; cached until the graph is reset."""
+
+    lab_request_agent = Agent(
+        name="lab_requester",
+        model=hedged_model("lab_requester", config.worker_model),
+        description="Pauses workflow until lab results are provided.",
+        instruction=static_instruction(LAB_REQUEST_INSTRUCTION),
+        output_key="lab_results",
+        before_model_callback=before_model_callbacks(),
+        after_model_callback=after_model_callbacks(),
+        before_tool_callback=before_tool_callbacks(),
+        after_tool_callback=after_tool_callbacks(),
+        after_agent_callback=after_agent_callbacks(suppress_output_callback),
+    )
+
+    return CheckpointedLoopAgent(
+        name="lab_wait_loop",
+        description="Blocks until lab_results are available",
+        sub_agents=[
+            lab_request_agent,
+            LabResultsValidationChecker(name="lab_results_validator"),
+        ],
+        max_iterations=5,
+    )
 
 
-lab_wait_loop = LoopAgent(
-    name="lab_wait_loop",
-    description="Blocks until lab_results are available",
-    sub_agents=[
-        lab_request_agent,
-        LabResultsValidationChecker(name="lab_results_validator"),
-    ],
-    max_iterations=5,
+__getattr__ = lazy_agent_attributes(
+    __name__,
+    {
+        "lab_wait_loop": build_lab_wait_loop,
+        "lab_request_agent": lambda: build_lab_wait_loop().sub_agents[0],
+    },
 )
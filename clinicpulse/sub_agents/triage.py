@@ -1,44 +1,98 @@
 """Triage agent definitions."""
 
+import functools
+
 from google.adk.agents import Agent, LoopAgent
-from google.adk.tools import FunctionTool
 
-from ..agent_utils import suppress_output_callback
+from ..agent_utils import (
+    after_agent_callbacks,
+    after_model_callbacks,
+    after_tool_callbacks,
+    before_model_callbacks,
+    before_tool_callbacks,
+    function_tool,
+    lazy_agent_attributes,
+    suppress_output_callback,
+)
 from ..config import config
-from ..tools import fetch_patient_records, record_triage_decision
+from ..hedging import hedged_model
+from ..prompts import static_instruction
+from ..tools import (
+    compute_early_warning_score,
+    fetch_patient_records,
+    record_triage_decision,
+    score_waiting_room,
+    search_clinical_guidelines,
+)
 from ..validation import TriageValidationChecker
 
 
-triage_agent = Agent(
-    name="triage_coordinator",
-    model=config.critic_model,
-    description="Assigns priority levels using guidelines and tools.",
-    instruction="""
+TRIAGE_INSTRUCTION = """
     You are a clinical triage nurse. Review the `patient_intake` state and use your
     medical knowledge to assign priority. Call `fetch_patient_records` for history,
+    and `search_clinical_guidelines` with the presenting complaint and key findings
+    (at most {iterations} searches) to ground the priority in local protocols;
     then call `record_triage_decision` to log the decision.
+    Call `compute_early_warning_score` with the patient_id (plus respiratory rate,
+    SpO2, oxygen use and new confusion when intake reported them) and use its exact
+    `score` and `risk` instead of estimating from raw vitals: "high" risk is Critical,
+    "medium" is at least Urgent. If it returns "insufficient_data" or "degraded" there
+    is no score: triage on clinical judgement and note the missing observations.
+    `score_waiting_room` ranks the waiting patients whose observations are complete
+    when you need to compare this patient against the queue; patients in its
+    `unscored` list have no score, so do not rank them below scored ones.
+    If `fetch_patient_records` returns status "degraded", triage from intake alone
+    and mention the missing history in the rationale.
     
     Write the triage summary to the `triage_priority` key with fields:
       - patient_id
       - priority_level (Critical | Urgent | Routine)
       - rationale
       - recommended_next_steps
-    """,
-    tools=[
-        FunctionTool(fetch_patient_records),
-        FunctionTool(record_triage_decision),
-    ],
-    output_key="triage_priority",
-    after_agent_callback=suppress_output_callback,
-)
+    """
+
+
+@functools.lru_cache(maxsize=None)
+def build_triage_loop() -> LoopAgent:
+    """Build the triage loop on first use; cached until the graph is reset."""
+
+    triage_agent = Agent(
+        name="triage_coordinator",
+        model=hedged_model("triage_coordinator", config.critic_model),
+        description="Assigns priority levels using guidelines and tools.",
+        instruction=static_instruction(
+            TRIAGE_INSTRUCTION.format(iterations=config.guideline_search_iterations)
+        ),
+        tools=[
+            function_tool(fetch_patient_records),
+            function_tool(search_clinical_guidelines),
+            function_tool(compute_early_warning_score),
+            function_tool(score_waiting_room),
+            function_tool(record_triage_decision),
+        ],
+        output_key="triage_priority",
+        before_model_callback=before_model_callbacks(),
+        after_model_callback=after_model_callbacks(),
+        before_tool_callback=before_tool_callbacks(),
+        after_tool_callback=after_tool_callbacks(),
+        after_agent_callback=after_agent_callbacks(suppress_output_callback),
+    )
+
+    return LoopAgent(
+        name="triage_loop",
+        description="Retries triage decisions if validation fails",
+        sub_agents=[
+            triage_agent,
+            TriageValidationChecker(name="triage_validator"),
+        ],
+        max_iterations=3,
+    )
 
 
-triage_loop = LoopAgent(
-    name="triage_loop",
-    description="Retries triage decisions if validation fails",
-    sub_agents=[
-        triage_agent,
-        TriageValidationChecker(name="triage_validator"),
-    ],
-    max_iterations=3,
+__getattr__ = lazy_agent_attributes(
+    __name__,
+    {
+        "triage_loop": build_triage_loop,
+        "triage_agent": lambda: build_triage_loop().sub_agents[0],
+    },
 )
@@ -0,0 +1,53 @@
+"""Bounded thread pool that keeps blocking tools off the event loop."""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from .config import config
+from .metrics import metrics
+
+
+@functools.lru_cache(maxsize=None)
+def tool_executor() -> ThreadPoolExecutor:
+    """Process-wide pool sized by ``config.tool_executor_workers``."""
+
+    return ThreadPoolExecutor(
+        max_workers=config.tool_executor_workers, thread_name_prefix="clinicpulse-tool"
+    )
+
+
+def offload(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Return an async wrapper that runs sync ``func`` in the tool pool.
+
+    Coroutine functions are returned unchanged so async-native tools keep
+    running on the loop. The wrapper keeps ``func``'s signature, so
+    ``FunctionTool`` builds the same declaration and still injects
+    ``tool_context``; context variables are copied into the worker thread.
+    """
+
+    if inspect.iscoroutinefunction(func):
+        return func
+
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        in_flight = metrics.gauge("tool_executor_in_flight")
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(tool_executor(), call)
+        finally:
+            in_flight.dec()
+            metrics.histogram("tool_call_seconds", tool=name).observe(
+                time.perf_counter() - started
+            )
+
+    return wrapper
@@ -2,36 +2,186 @@
 
 import random
 import time
+import zlib
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
+from .circuit_breaker import circuit_breaker
 from .logging_utils import log_event
 
 
+@circuit_breaker
+def resolve_patient_identity(
+    name_or_id: str, date_of_birth: Optional[str] = None
+) -> Dict[str, object]:
+    """Resolve a patient's name or ID (any spelling or format) to their canonical patient_id.
+
+    Returns status "matched" or "registered" (a new patient) with `patient_id`.
+    A name alone never matches: "needs_confirmation" (one likely patient) or
+    "ambiguous" (several) come with `candidates` and need the date of birth.
+    "needs_confirmation" with `dob_mismatch` means the name is known but under
+    a different date of birth: confirm the date rather than registering anew.
+
+    Args:
+        name_or_id: Patient name or ID exactly as the patient gave it.
+        date_of_birth: Date of birth in any common format, if known.
+    """
+
+    from .identity import resolve_or_register
+
+    return resolve_or_register(name_or_id, date_of_birth)
+
+
+@circuit_breaker
 def fetch_patient_records(patient_id: str) -> Dict[str, str]:
     """Mock EHR lookup returning synthetic vitals and history."""
 
-    random.seed(hash(patient_id) % 2**32)
+    # Per-call generator seeded from the id: stable across processes and
+    # safe to run concurrently in the tool thread pool.
+    rng = random.Random(zlib.crc32(patient_id.encode("utf-8")))
     log_event("fetch_patient_records", "retrieving mock EHR snapshot", patient_id)
     return {
         "patient_id": patient_id,
         "last_visit": "2024-11-12",
-        "known_conditions": random.choice([
+        "known_conditions": rng.choice([
             "hypertension",
             "type 2 diabetes",
             "asthma",
             "no chronic conditions recorded",
         ]),
         "recent_vitals": {
-            "bp": f"{random.randint(110, 150)}/{random.randint(70, 95)}",
-            "hr": random.randint(60, 110),
-            "temp_c": round(random.uniform(36.5, 38.5), 1),
+            "bp": f"{rng.randint(110, 150)}/{rng.randint(70, 95)}",
+            "hr": rng.randint(60, 110),
+            "temp_c": round(rng.uniform(36.5, 38.5), 1),
         },
     }
 
 
-def record_triage_decision(patient_id: str, priority_level: str) -> Dict[str, str]:
-    """Store triage outcomes (mock implementation)."""
+@circuit_breaker
+def search_clinical_guidelines(query: str, top_k: int = 3) -> Dict[str, object]:
+    """Search the local clinical guideline corpus (offline BM25 index).
+
+    Args:
+        query: Symptoms, findings, or condition to look up, e.g. "chest pain sweating".
+        top_k: Number of guideline passages to return (default 3).
+    """
+
+    from .guidelines import search_guidelines
+
+    passages = search_guidelines(query, top_k)
+    log_event("search_clinical_guidelines", f"{len(passages)} passages for {query!r}")
+    return {"query": query, "status": "ok", "passages": passages}
+
+
+@circuit_breaker
+def compute_early_warning_score(
+    patient_id: str,
+    respiratory_rate: Optional[float] = None,
+    spo2: Optional[float] = None,
+    on_oxygen: Optional[bool] = None,
+    confused: Optional[bool] = None,
+) -> Dict[str, object]:
+    """Compute the NEWS2 early-warning score from the EHR vitals plus intake observations.
+
+    Blood pressure, heart rate and temperature come from the patient's
+    record; pass the other NEWS2 parameters when intake reported them.
+    Returns status "degraded" when the record is unavailable and
+    "insufficient_data" (listing `missing`) when a core parameter is
+    unknown; neither carries a score.
+
+    Args:
+        patient_id: Patient identifier from intake.
+        respiratory_rate: Breaths per minute, if known.
+        spo2: Oxygen saturation in percent, if known.
+        on_oxygen: True if the patient is on supplemental oxygen.
+        confused: True for new confusion or reduced responsiveness, False if alert.
+    """
+
+    from .vital_scores import CORE_PARAMETERS, observations_from_record, score_rows
+
+    record = fetch_patient_records(patient_id)
+    if record.get("status") == "degraded":
+        log_event("compute_early_warning_score", "EHR record unavailable; not scored", patient_id)
+        return {
+            "patient_id": patient_id,
+            "status": "degraded",
+            "reason": f"fetch_patient_records: {record.get('reason', 'unavailable')}",
+            "message": "Vitals are unavailable, so no early-warning score was computed.",
+        }
+    observations = observations_from_record(record)
+    observations.update(
+        respiratory_rate=respiratory_rate, spo2=spo2, on_oxygen=on_oxygen, confused=confused
+    )
+    missing = [name for name in CORE_PARAMETERS if observations.get(name) is None]
+    if missing:
+        log_event("compute_early_warning_score", f"missing {', '.join(missing)}; not scored", patient_id)
+        return {
+            "patient_id": patient_id,
+            "status": "insufficient_data",
+            "missing": missing,
+            "message": "Ask for the missing observations; a partial NEWS2 total understates risk.",
+        }
+    result = score_rows([observations])[0]
+    log_event("compute_early_warning_score", f"news2={result['score']} risk={result['risk']}", patient_id)
+    return {"patient_id": patient_id, "status": "ok", **result}
+
+
+@circuit_breaker
+def score_waiting_room(clinic: str = "main") -> Dict[str, object]:
+    """NEWS2 scores for everyone in the clinic's waiting room, highest first.
+
+    Only patients with every core NEWS2 parameter are scored and ranked.
+    The others are listed in `unscored` with status "degraded" (record
+    unavailable) or "insufficient_data" (listing `missing`).
+
+    Args:
+        clinic: Clinic whose waiting room to score (default 'main').
+    """
+
+    from .vital_scores import CORE_PARAMETERS, observations_from_record, score_rows
+    from .waiting_room import waiting_room
+
+    patients, observations, unscored = [], [], []
+    for patient in waiting_room.waiting(clinic):
+        record = fetch_patient_records(patient.patient_id)
+        if record.get("status") == "degraded":
+            unscored.append({"patient_id": patient.patient_id, "status": "degraded"})
+            continue
+        observed = observations_from_record(record)
+        missing = [name for name in CORE_PARAMETERS if observed.get(name) is None]
+        if missing:
+            unscored.append(
+                {"patient_id": patient.patient_id, "status": "insufficient_data", "missing": missing}
+            )
+            continue
+        patients.append(patient)
+        observations.append(observed)
+    rows = [
+        {"patient_id": patient.patient_id, "priority_level": patient.priority_level, **row}
+        for patient, row in zip(patients, score_rows(observations))
+    ]
+    rows.sort(key=lambda row: row["score"], reverse=True)
+    log_event(
+        "score_waiting_room",
+        f"scored {len(rows)} waiting patients in {clinic}, {len(unscored)} unscored",
+    )
+    return {"clinic": clinic, "status": "ok", "patients": rows, "unscored": unscored}
+
+
+@circuit_breaker
+def record_triage_decision(
+    patient_id: str, priority_level: str, specialty: str = "general"
+) -> Dict[str, str]:
+    """Store triage outcomes and place the patient in the clinic waiting room.
+
+    Args:
+        patient_id: Patient identifier from intake.
+        priority_level: Critical, Urgent, or Routine.
+        specialty: Specialty that should see the patient (default 'general').
+    """
+
+    from .ledger import ledger
+    from .waiting_room import waiting_room
 
     timestamp = time.time()
     log_event(
@@ -39,7 +189,10 @@ def record_triage_decision(patient_id: str, priority_level: str) -> Dict[str, st
         f"priority={priority_level}",
         patient_id,
     )
-    # In a full build this would persist to a database or emit telemetry.
+    # Re-triage of a waiting patient reprioritizes them in place.
+    waiting_room.admit(patient_id, priority_level.strip().capitalize(), specialty=specialty)
+    if ledger() is not None:
+        ledger().record_triage(patient_id, priority_level, specialty, timestamp)
     return {
         "patient_id": patient_id,
         "priority_level": priority_level,
@@ -48,16 +201,41 @@ def record_triage_decision(patient_id: str, priority_level: str) -> Dict[str, st
     }
 
 
-def wait_for_lab_results(patient_id: str) -> Dict[str, str]:
-    """Simulate a long-running lab wait that motivates pause/resume flows."""
+@circuit_breaker
+def wait_for_lab_results(patient_id: str, tool_context=None) -> Dict[str, str]:
+    """Simulate a long-running lab wait that motivates pause/resume flows.
+
+    When called by an agent, marks the session as parked in `lab_wait_loop`
+    so the serving layer can checkpoint it and free its memory until the
+    results arrive (see `clinicpulse.checkpoints`).
+    """
 
     log_event("wait_for_lab_results", "initiated lab wait", patient_id)
-    return {"status": "pending", "message": "Awaiting lab uploads"}
+    if tool_context is not None:
+        tool_context.state["pipeline_position"] = {
+            "stage": "lab_wait_loop",
+            "iteration": 0,
+        }
+    return {
+        "status": "pending",
+        "message": "Awaiting lab uploads; the session will resume when results arrive",
+    }
 
 
 # ==================== APPOINTMENT SCHEDULING TOOLS ====================
 
 
+# Mock doctor database
+DOCTOR_DIRECTORY: Dict[str, List[str]] = {
+    "general": ["Dr. Smith", "Dr. Johnson", "Dr. Williams"],
+    "cardiology": ["Dr. Heart", "Dr. Cardio"],
+    "pediatrics": ["Dr. Kids", "Dr. Child"],
+    "orthopedics": ["Dr. Bones", "Dr. Joint"],
+    "dermatology": ["Dr. Skin", "Dr. Derm"],
+}
+
+
+@circuit_breaker
 def check_doctor_availability(
     specialty: str, urgency_level: str
 ) -> Dict[str, any]:
@@ -73,16 +251,7 @@ def check_doctor_availability(
 
     log_event("check_doctor_availability", f"specialty={specialty}, urgency={urgency_level}")
 
-    # Mock doctor database
-    doctors = {
-        "general": ["Dr. Smith", "Dr. Johnson", "Dr. Williams"],
-        "cardiology": ["Dr. Heart", "Dr. Cardio"],
-        "pediatrics": ["Dr. Kids", "Dr. Child"],
-        "orthopedics": ["Dr. Bones", "Dr. Joint"],
-        "dermatology": ["Dr. Skin", "Dr. Derm"],
-    }
-
-    available_doctors = doctors.get(specialty.lower(), doctors["general"])
+    available_doctors = DOCTOR_DIRECTORY.get(specialty.lower(), DOCTOR_DIRECTORY["general"])
 
     # Generate mock available slots based on urgency
     base_date = datetime.now()
@@ -97,9 +266,16 @@ def check_doctor_availability(
         slot_dates = [base_date + timedelta(days=i) for i in range(7, 15, 2)]
 
     # Pick a random doctor
-    selected_doctor = random.choice(available_doctors)
+    selected_doctor = random.Random().choice(available_doctors)
 
+    from .waitlist import waitlist
+
+    # Slots freed by cancellations that no waitlisted patient took come first.
     available_slots = [
+        {**slot, "specialty": specialty, "duration_minutes": 30}
+        for slot in waitlist.open_slots(specialty)[:3]
+    ]
+    available_slots += [
         {
             "datetime": slot.strftime("%Y-%m-%d %H:%M"),
             "doctor": selected_doctor,
@@ -107,6 +283,7 @@ def check_doctor_availability(
             "duration_minutes": 30,
         }
         for slot in slot_dates
+        if not waitlist.is_taken(selected_doctor, slot.strftime("%Y-%m-%d %H:%M"))
     ]
 
     log_event(
@@ -121,51 +298,157 @@ def check_doctor_availability(
     }
 
 
+@circuit_breaker
 def book_appointment(
     patient_id: str,
     doctor_name: str,
     appointment_datetime: str,
     appointment_type: str = "consultation",
+    specialty: str = "general",
+    urgency_level: str = "routine",
 ) -> Dict[str, str]:
-    """Book an appointment for a patient (mock implementation)."""
+    """Book an appointment for a patient (mock implementation).
 
-    timestamp = time.time()
-    appointment_id = f"APT-{int(timestamp)}-{hash(patient_id) % 10000}"
+    Non-critical patients booked for a later day are put on the waitlist and
+    moved to an earlier slot automatically if one is cancelled. A booked
+    patient leaves the clinic waiting room. A slot the
+    doctor already has booked returns status "slot_taken"; pick another one
+    from check_doctor_availability.
+    """
+
+    from .ledger import ledger
+    from .waiting_room import waiting_room
+    from .waitlist import SlotTakenError, waitlist
+
+    try:
+        appointment = waitlist.book(
+            patient_id, doctor_name, appointment_datetime, specialty, urgency_level
+        )
+    except SlotTakenError as exc:
+        log_event("book_appointment", f"rejected: {exc}", patient_id)
+        return {
+            "patient_id": patient_id,
+            "doctor": doctor_name,
+            "datetime": appointment_datetime,
+            "status": "slot_taken",
+            "message": "That slot is already booked. Choose another from check_doctor_availability.",
+        }
+    waitlisted = (
+        urgency_level.lower() != "critical"
+        and waitlist.join(appointment.appointment_id) is not None
+    )
+    if ledger() is not None:
+        ledger().record_booking(appointment)
+    # Booked patients are no longer waiting to be called in.
+    waiting_room.remove(patient_id)
 
     log_event(
         "book_appointment",
-        f"doctor={doctor_name}, datetime={appointment_datetime}, type={appointment_type}",
+        f"doctor={doctor_name}, datetime={appointment_datetime}, type={appointment_type}, "
+        f"waitlisted={waitlisted}",
         patient_id,
     )
 
     return {
-        "appointment_id": appointment_id,
+        "appointment_id": appointment.appointment_id,
         "patient_id": patient_id,
         "doctor": doctor_name,
         "datetime": appointment_datetime,
         "type": appointment_type,
+        "specialty": appointment.specialty,
+        "urgency_level": appointment.urgency_level,
         "status": "confirmed",
-        "booked_at": timestamp,
+        "booked_at": appointment.booked_at,
+        "waitlisted": waitlisted,
         "location": "Clinic Building A, Room 201",
         "instructions": "Please arrive 15 minutes early for check-in",
     }
 
 
+@circuit_breaker
+def cancel_appointment(appointment_id: str, reason: str = "") -> Dict[str, object]:
+    """Cancel an appointment and offer its slot to the waitlist.
+
+    Waitlisted patients moved into the freed slot (and any slots freed in
+    turn) are rebooked and sent a confirmation.
+
+    Args:
+        appointment_id: The appointment_id returned by book_appointment.
+        reason: Optional cancellation reason for the log.
+    """
+
+    from .ledger import ledger
+    from .waitlist import waitlist
+
+    try:
+        rebooked = waitlist.cancel(appointment_id)
+    except KeyError:
+        return {"appointment_id": appointment_id, "status": "not_found"}
+    log_event("cancel_appointment", f"cancelled {appointment_id}: {reason or 'no reason given'}")
+    if ledger() is not None:
+        ledger().record_booking(waitlist.get(appointment_id))
+        for appointment in rebooked:
+            ledger().record_booking(waitlist.get(appointment.rebooked_from))
+            ledger().record_booking(appointment)
+
+    confirmations = []
+    for appointment in waitlist.drain_confirmations():
+        details = {**appointment.as_dict(), "type": "consultation"}
+        confirmations.append(send_appointment_confirmation(appointment.patient_id, details))
+    return {
+        "appointment_id": appointment_id,
+        "status": waitlist.get(appointment_id).status,
+        "rebooked": [appointment.as_dict() for appointment in rebooked],
+        "confirmations": confirmations,
+    }
+
+
+@circuit_breaker
 def send_appointment_confirmation(
     patient_id: str, appointment_details: Dict[str, str]
 ) -> Dict[str, str]:
-    """Send appointment confirmation to patient (mock implementation)."""
+    """Queue an appointment confirmation for the patient (mock channels).
+
+    Confirmations go through `clinicpulse.notifications`, which merges a
+    patient's updates per channel into one digest; a rebooking replaces the
+    pending confirmation of the appointment it moved. The result has status
+    "queued" and `confirmation_sent` False until the digest is delivered.
+    """
 
+    from .notifications import notifications
+
+    appointment_id = appointment_details.get("appointment_id")
+    rebooked_from = appointment_details.get("rebooked_from")
     log_event(
         "send_appointment_confirmation",
-        f"sending confirmation for {appointment_details.get('appointment_id')}",
+        f"queueing confirmation for {appointment_id}",
+        patient_id,
+    )
+    doctor, when = appointment_details.get("doctor"), appointment_details.get("datetime")
+    message = (
+        f"Appointment moved earlier: now with {doctor} on {when}"
+        if rebooked_from
+        else f"Appointment confirmed with {doctor} on {when}"
+    )
+    key = f"appointment:{appointment_id}"
+    receipt = notifications.submit(
         patient_id,
+        "rebooking" if rebooked_from else "confirmation",
+        message,
+        key=key,
+        supersedes=f"appointment:{rebooked_from}" if rebooked_from else None,
+        details=dict(appointment_details),
     )
+    delivery = notifications.delivery(patient_id, key)
 
     return {
         "patient_id": patient_id,
-        "confirmation_sent": True,
-        "channels": ["email", "sms"],
-        "message": f"Appointment confirmed with {appointment_details.get('doctor')} on {appointment_details.get('datetime')}",
-        "sent_at": time.time(),
+        "status": delivery["status"],
+        "confirmation_sent": delivery["status"] == "sent",
+        "channels": receipt["channels"],
+        "message": message,
+        "queued_at": receipt["queued_at"],
+        "sent_at": delivery["sent_at"],
+        "delivery": "digest",
+        "digest_due_at": receipt["digest_due_at"],
     }
@@ -6,7 +6,29 @@ from google.adk.agents import BaseAgent
 from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event, EventActions
 
+from ..checkpoints import LAB_WAIT_STAGE, PIPELINE_POSITION_KEY
 from ..logging_utils import log_event
+from ..model_routing import VALIDATION_FAILURES_KEY
+
+
+def _failure_event(checker: BaseAgent, context: InvocationContext) -> Event:
+    """Non-escalating event that counts this invocation's failures per loop.
+
+    ``clinicpulse.model_routing`` escalates the loop's agent to a larger
+    model tier on the retry.
+    """
+
+    stage = checker.parent_agent.name if checker.parent_agent else checker.name
+    failures = dict(context.session.state.get(VALIDATION_FAILURES_KEY) or {})
+    record = failures.get(stage)
+    count = 0
+    if hasattr(record, "get") and record.get("invocation_id") == context.invocation_id:
+        count = int(record.get("count", 0))
+    failures[stage] = {"invocation_id": context.invocation_id, "count": count + 1}
+    return Event(
+        author=checker.name,
+        actions=EventActions(state_delta={VALIDATION_FAILURES_KEY: failures}),
+    )
 
 
 class IntakeValidationChecker(BaseAgent):
@@ -18,7 +40,7 @@ class IntakeValidationChecker(BaseAgent):
         dossier = context.session.state.get("patient_intake")
         if not dossier:
             log_event("intake_validation", "missing patient_intake state")
-            yield Event(author=self.name)
+            yield _failure_event(self, context)
             return
 
         required_fields = {"patient_id", "symptoms", "duration", "history"}
@@ -52,7 +74,7 @@ class IntakeValidationChecker(BaseAgent):
                 return
 
         log_event("intake_validation", "validation failed, retrying")
-        yield Event(author=self.name)
+        yield _failure_event(self, context)
 
 
 class TriageValidationChecker(BaseAgent):
@@ -73,7 +95,7 @@ class TriageValidationChecker(BaseAgent):
             yield Event(author=self.name, actions=EventActions(escalate=True))
             return
         log_event("triage_validation", "triage pending")
-        yield Event(author=self.name)
+        yield _failure_event(self, context)
 
 
 class LabResultsValidationChecker(BaseAgent):
@@ -93,8 +115,32 @@ class LabResultsValidationChecker(BaseAgent):
             )
             yield Event(author=self.name, actions=EventActions(escalate=True))
             return
-        log_event("lab_validation", "awaiting lab input")
-        yield Event(author=self.name)
+        # Record the pipeline position so the session can be checkpointed
+        # and resumed here once results arrive (see clinicpulse.checkpoints).
+        # The count restarts with each invocation; a resumed loop re-claims
+        # its parked count for the new invocation before this runs.
+        stage = self.parent_agent.name if self.parent_agent else LAB_WAIT_STAGE
+        position = context.session.state.get(PIPELINE_POSITION_KEY)
+        iteration = 1
+        if (
+            hasattr(position, "get")
+            and position.get("stage") == stage
+            and position.get("invocation_id") == context.invocation_id
+        ):
+            iteration = int(position.get("iteration", 0)) + 1
+        log_event("lab_validation", f"awaiting lab input (iteration {iteration})")
+        yield Event(
+            author=self.name,
+            actions=EventActions(
+                state_delta={
+                    PIPELINE_POSITION_KEY: {
+                        "stage": stage,
+                        "iteration": iteration,
+                        "invocation_id": context.invocation_id,
+                    }
+                }
+            ),
+        )
 
 
 class AppointmentValidationChecker(BaseAgent):
@@ -106,7 +152,7 @@ class AppointmentValidationChecker(BaseAgent):
         appointment = context.session.state.get("appointment_details")
         if not appointment:
             log_event("appointment_validation", "missing appointment_details state")
-            yield Event(author=self.name)
+            yield _failure_event(self, context)
             return
 
         # Required fields for a complete appointment
@@ -138,5 +184,5 @@ class AppointmentValidationChecker(BaseAgent):
                 return
 
         log_event("appointment_validation", "validation failed, retrying")
-        yield Event(author=self.name)
+        yield _failure_event(self, context)
 
@@ -0,0 +1,95 @@
+"""NEWS2-style early-warning scores, vectorized over one patient or a batch."""
+
+import math
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+# Upper bin edges (closed on the right) and the points for each bin.
+BANDS = {
+    "respiratory_rate": ([8, 11, 20, 24], [3, 1, 0, 2, 3]),
+    "spo2": ([91, 93, 95], [3, 2, 1, 0]),
+    "systolic_bp": ([90, 100, 110, 219], [3, 2, 1, 0, 3]),
+    "heart_rate": ([40, 50, 90, 110, 130], [3, 1, 0, 1, 2, 3]),
+    "temp_c": ([35.0, 36.0, 38.0, 39.0], [3, 1, 0, 1, 2]),
+}
+# Boolean parameters: points when the flag is set.
+FLAGS = {"on_oxygen": 2, "confused": 3}
+PARAMETERS = tuple(BANDS) + tuple(FLAGS)
+# A total without any of these is not a NEWS2 score; oxygen defaults to room air.
+CORE_PARAMETERS = tuple(BANDS) + ("confused",)
+
+RISK_LEVELS = np.array(["low", "low-medium", "medium", "high"])
+
+
+def _column(observations: Sequence[Mapping[str, Any]], name: str) -> np.ndarray:
+    values = [observation.get(name) for observation in observations]
+    return np.array([np.nan if value is None else float(value) for value in values])
+
+
+def news2(observations: Sequence[Mapping[str, Any]]) -> Dict[str, np.ndarray]:
+    """Score every observation set at once.
+
+    Each observation maps parameter names (see ``PARAMETERS``) to values;
+    missing parameters score 0 and are flagged in ``missing``. Returns
+    per-parameter points, ``total``, ``red`` (any single parameter scoring
+    3) and ``risk`` (low / low-medium / medium / high) as arrays.
+    """
+
+    components: Dict[str, np.ndarray] = {}
+    missing: Dict[str, np.ndarray] = {}
+    for name, (edges, points) in BANDS.items():
+        column = _column(observations, name)
+        missing[name] = np.isnan(column)
+        bins = np.digitize(np.nan_to_num(column), edges, right=True)
+        components[name] = np.where(missing[name], 0, np.take(points, bins))
+    for name, points in FLAGS.items():
+        column = _column(observations, name)
+        missing[name] = np.isnan(column)
+        components[name] = np.where(np.nan_to_num(column) > 0, points, 0)
+
+    stacked = np.stack([components[name] for name in PARAMETERS]).reshape(len(PARAMETERS), -1)
+    total = stacked.sum(axis=0).astype(int)
+    red = (stacked == 3).any(axis=0)
+    risk = RISK_LEVELS[np.select([total >= 7, total >= 5, red], [3, 2, 1], default=0)]
+    return {"components": components, "missing": missing, "total": total, "red": red, "risk": risk}
+
+
+def score_rows(observations: Sequence[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """``news2`` unpacked into one JSON-ready dict per observation set."""
+
+    scores = news2(observations)
+    return [
+        {
+            "score": int(scores["total"][i]),
+            "risk": str(scores["risk"][i]),
+            "red_parameter": bool(scores["red"][i]),
+            "components": {
+                name: int(scores["components"][name][i])
+                for name in PARAMETERS
+                if not scores["missing"][name][i]
+            },
+            "missing": [name for name in PARAMETERS if scores["missing"][name][i]],
+        }
+        for i in range(len(observations))
+    ]
+
+
+def observations_from_record(record: Mapping[str, Any]) -> Dict[str, Optional[float]]:
+    """Map a ``fetch_patient_records`` snapshot to NEWS2 parameters."""
+
+    vitals = record.get("recent_vitals") or {}
+    systolic = None
+    bp = vitals.get("bp")
+    if isinstance(bp, str) and "/" in bp:
+        try:
+            systolic = float(bp.split("/", 1)[0])
+        except ValueError:
+            systolic = None
+    elif isinstance(bp, (int, float)) and not math.isnan(bp):
+        systolic = float(bp)
+    return {
+        "systolic_bp": systolic,
+        "heart_rate": vitals.get("hr"),
+        "temp_c": vitals.get("temp_c"),
+    }
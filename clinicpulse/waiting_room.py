@@ -0,0 +1,278 @@
+"""Clinic-wide waiting-room queue with O(log n) reprioritization."""
+
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Optional, Tuple
+
+from .admission import PRIORITY_RANKS
+from .config import config
+from .logging_utils import log_event
+from .metrics import metrics
+
+PoolKey = Tuple[str, str, str]  # (clinic, "doctor" | "specialty", name)
+
+
+class IndexedHeap:
+    """Binary min-heap with a position index for O(log n) update/remove."""
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[tuple, Hashable]] = []
+        self._pos: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __contains__(self, item_id: Hashable) -> bool:
+        return item_id in self._pos
+
+    def push(self, item_id: Hashable, key: tuple) -> None:
+        if item_id in self._pos:
+            self.update(item_id, key)
+            return
+        self._heap.append((key, item_id))
+        self._pos[item_id] = len(self._heap) - 1
+        self._sift_up(len(self._heap) - 1)
+
+    def update(self, item_id: Hashable, key: tuple) -> None:
+        index = self._pos[item_id]
+        old_key = self._heap[index][0]
+        self._heap[index] = (key, item_id)
+        if key < old_key:
+            self._sift_up(index)
+        else:
+            self._sift_down(index)
+
+    def remove(self, item_id: Hashable) -> None:
+        index = self._pos.pop(item_id)
+        last = self._heap.pop()
+        if index == len(self._heap):
+            return
+        self._heap[index] = last
+        self._pos[last[1]] = index
+        self._sift_up(index)
+        self._sift_down(self._pos[last[1]])
+
+    def peek(self) -> Optional[Tuple[tuple, Hashable]]:
+        return self._heap[0] if self._heap else None
+
+    def pop(self) -> Tuple[tuple, Hashable]:
+        entry = self._heap[0]
+        self.remove(entry[1])
+        return entry
+
+    def _swap(self, i: int, j: int) -> None:
+        self._heap[i], self._heap[j] = self._heap[j], self._heap[i]
+        self._pos[self._heap[i][1]] = i
+        self._pos[self._heap[j][1]] = j
+
+    def _sift_up(self, index: int) -> None:
+        while index > 0:
+            parent = (index - 1) // 2
+            if self._heap[index][0] >= self._heap[parent][0]:
+                return
+            self._swap(index, parent)
+            index = parent
+
+    def _sift_down(self, index: int) -> None:
+        size = len(self._heap)
+        while True:
+            smallest = index
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < size and self._heap[child][0] < self._heap[smallest][0]:
+                    smallest = child
+            if smallest == index:
+                return
+            self._swap(index, smallest)
+            index = smallest
+
+
+@dataclass
+class WaitingPatient:
+    patient_id: str
+    priority_level: str
+    arrived_at: float
+    clinic: str = "main"
+    specialty: str = "general"
+    doctor: Optional[str] = None
+
+
+class WaitingRoom:
+    """Patients waiting to be seen, across clinics, specialties and doctors.
+
+    Each patient sits in exactly one pool: their assigned doctor's, or the
+    specialty pool of their clinic. Pools are indexed heaps ordered by
+    ``rank * aging_s + arrived_at`` so a patient gains one priority level per
+    ``aging_s`` seconds waited; as with admission control the order is
+    time-invariant, so insert, reprioritize and remove are O(log n).
+
+    Patients leave when a doctor calls them in, when ``book_appointment``
+    confirms their booking, or when their session ends (``end_session``).
+    The queue lives in process memory: under the runner pool each worker
+    holds only the patients whose sessions it served, so ``waiting`` and
+    ``next_for_doctor`` see that worker's share of the clinic.
+    """
+
+    def __init__(
+        self,
+        doctor_specialties: Optional[Dict[str, Iterable[str]]] = None,
+        aging_s: Optional[float] = None,
+    ) -> None:
+        self.aging_s = config.waiting_room_aging_s if aging_s is None else aging_s
+        self.doctor_specialties = {
+            doctor: tuple(specialties)
+            for doctor, specialties in (doctor_specialties or {}).items()
+        }
+        self._patients: Dict[str, WaitingPatient] = {}
+        self._pools: Dict[PoolKey, IndexedHeap] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._patients)
+
+    def _key(self, patient: WaitingPatient) -> tuple:
+        rank = PRIORITY_RANKS.get(patient.priority_level, PRIORITY_RANKS["untriaged"])
+        return (rank * self.aging_s + patient.arrived_at, next(self._seq))
+
+    @staticmethod
+    def _pool_key(patient: WaitingPatient) -> PoolKey:
+        if patient.doctor:
+            return (patient.clinic, "doctor", patient.doctor)
+        return (patient.clinic, "specialty", patient.specialty.lower())
+
+    def _depth(self, patient: WaitingPatient):
+        return metrics.gauge(
+            "waiting_room_depth", clinic=patient.clinic, priority=patient.priority_level
+        )
+
+    def admit(
+        self,
+        patient_id: str,
+        priority_level: str,
+        *,
+        clinic: str = "main",
+        specialty: str = "general",
+        doctor: Optional[str] = None,
+        arrived_at: Optional[float] = None,
+    ) -> WaitingPatient:
+        """Add a patient, or re-triage one already waiting (keeps arrival time)."""
+
+        with self._lock:
+            existing = self._patients.get(patient_id)
+            if existing is not None:
+                self._remove_locked(patient_id)
+                arrived_at = existing.arrived_at
+            patient = WaitingPatient(
+                patient_id=patient_id,
+                priority_level=priority_level,
+                arrived_at=time.time() if arrived_at is None else arrived_at,
+                clinic=clinic,
+                specialty=specialty,
+                doctor=doctor,
+            )
+            self._patients[patient_id] = patient
+            self._pools.setdefault(self._pool_key(patient), IndexedHeap()).push(
+                patient_id, self._key(patient)
+            )
+            self._depth(patient).inc()
+        log_event("waiting_room", f"queued priority={priority_level} clinic={clinic}", patient_id)
+        return patient
+
+    def update_priority(self, patient_id: str, priority_level: str) -> WaitingPatient:
+        """Reprioritize in place (e.g. triage upgraded Urgent -> Critical)."""
+
+        with self._lock:
+            patient = self._patients[patient_id]
+            self._depth(patient).dec()
+            patient.priority_level = priority_level
+            self._pools[self._pool_key(patient)].update(patient_id, self._key(patient))
+            self._depth(patient).inc()
+        return patient
+
+    def remove(self, patient_id: str) -> Optional[WaitingPatient]:
+        """Drop a patient who left or was seen elsewhere."""
+
+        with self._lock:
+            return self._remove_locked(patient_id)
+
+    def end_session(self, state: Mapping[str, Any]) -> Optional[WaitingPatient]:
+        """Drop the patient of a session that ended before they were seen."""
+
+        from .accounting import patient_id_from_state
+
+        patient_id = patient_id_from_state(state)
+        patient = self.remove(patient_id) if patient_id else None
+        if patient is not None:
+            log_event("waiting_room", "left: session ended", patient_id)
+        return patient
+
+    def _remove_locked(self, patient_id: str) -> Optional[WaitingPatient]:
+        patient = self._patients.pop(patient_id, None)
+        if patient is None:
+            return None
+        pool_key = self._pool_key(patient)
+        pool = self._pools[pool_key]
+        pool.remove(patient_id)
+        if not pool:
+            del self._pools[pool_key]
+        self._depth(patient).dec()
+        return patient
+
+    def _candidate_pools(self, doctor: str, clinic: str) -> List[IndexedHeap]:
+        keys = [(clinic, "doctor", doctor)]
+        keys += [
+            (clinic, "specialty", specialty.lower())
+            for specialty in self.doctor_specialties.get(doctor, ("general",))
+        ]
+        return [self._pools[key] for key in keys if key in self._pools]
+
+    def peek_next_for_doctor(self, doctor: str, clinic: str = "main") -> Optional[WaitingPatient]:
+        """Best waiting patient doctor X could see, without removing them."""
+
+        with self._lock:
+            heads = [pool.peek() for pool in self._candidate_pools(doctor, clinic)]
+            heads = [head for head in heads if head is not None]
+            return self._patients[min(heads)[1]] if heads else None
+
+    def next_for_doctor(self, doctor: str, clinic: str = "main") -> Optional[WaitingPatient]:
+        """Pop the best patient for doctor X: their own queue or their specialties."""
+
+        with self._lock:
+            heads = [pool.peek() for pool in self._candidate_pools(doctor, clinic)]
+            heads = [head for head in heads if head is not None]
+            if not heads:
+                return None
+            patient = self._remove_locked(min(heads)[1])
+        metrics.histogram("waiting_room_wait_seconds", priority=patient.priority_level).observe(
+            time.time() - patient.arrived_at
+        )
+        log_event("waiting_room", f"called in by {doctor}", patient.patient_id)
+        return patient
+
+    def get(self, patient_id: str) -> Optional[WaitingPatient]:
+        return self._patients.get(patient_id)
+
+    def waiting(self, clinic: Optional[str] = None) -> List[WaitingPatient]:
+        """Snapshot of everyone waiting (optionally in one clinic), by arrival."""
+
+        with self._lock:
+            patients = [
+                patient for patient in self._patients.values()
+                if clinic is None or patient.clinic == clinic
+            ]
+        return sorted(patients, key=lambda patient: patient.arrived_at)
+
+
+def _doctor_specialties() -> Dict[str, List[str]]:
+    from .tools import DOCTOR_DIRECTORY
+
+    mapping: Dict[str, List[str]] = {}
+    for specialty, doctors in DOCTOR_DIRECTORY.items():
+        for doctor in doctors:
+            mapping.setdefault(doctor, []).append(specialty)
+    return mapping
+
+
+waiting_room = WaitingRoom(doctor_specialties=_doctor_specialties())
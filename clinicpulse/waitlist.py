@@ -0,0 +1,359 @@
+"""Appointment ledger with a waitlist that backfills cancelled slots."""
+
+import functools
+import heapq
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .admission import PRIORITY_RANKS
+from .config import config
+from .logging_utils import log_event
+from .metrics import metrics
+
+SLOT_FORMAT = "%Y-%m-%d %H:%M"
+
+
+def parse_slot(value: str) -> Optional[datetime]:
+    """``YYYY-MM-DD HH:MM`` (or ISO ``T``-separated) -> datetime; None otherwise."""
+
+    try:
+        return datetime.strptime(value.strip().replace("T", " ")[:16], SLOT_FORMAT)
+    except (AttributeError, ValueError):
+        return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _day(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+
+def _appointment_id() -> str:
+    """Collision-free across processes and ``Waitlist`` instances sharing the ledger."""
+
+    return f"APT-{uuid.uuid4().hex[:16].upper()}"
+
+
+def _slot_key(doctor: str, when: str) -> Tuple[str, str]:
+    """Doctor and slot in one spelling, so "Dr. X"/"dr. x" and "T"/" " collide."""
+
+    slot = parse_slot(when)
+    return " ".join(doctor.lower().split()), slot.strftime(SLOT_FORMAT) if slot else when.strip()
+
+
+class SlotTakenError(ValueError):
+    """The requested doctor and time already hold a confirmed appointment."""
+
+    def __init__(self, doctor: str, when: str, appointment_id: str) -> None:
+        super().__init__(f"{doctor} at {when} is already booked ({appointment_id})")
+        self.appointment_id = appointment_id
+
+
+def _rank(urgency_level: str) -> int:
+    return PRIORITY_RANKS.get(urgency_level.strip().capitalize(), PRIORITY_RANKS["untriaged"])
+
+
+@dataclass
+class Appointment:
+    appointment_id: str
+    patient_id: str
+    doctor: str
+    datetime: str
+    specialty: str = "general"
+    urgency_level: str = "routine"
+    status: str = "confirmed"  # confirmed | cancelled | rebooked
+    booked_at: float = 0.0
+    rebooked_from: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+@dataclass
+class WaitlistEntry:
+    appointment_id: str
+    patient_id: str
+    specialty: str
+    urgency_level: str
+    earliest: date
+    latest: date
+    joined_at: float
+
+
+class Waitlist:
+    """Booked appointments plus patients waiting to move to an earlier slot.
+
+    A waiting appointment is pushed into one heap per (specialty, day) of
+    its acceptable window, ordered by urgency and then time on the list.
+    The window always ends the day before the held appointment, so any slot
+    found in a heap is an improvement. When an appointment is cancelled, the
+    head of the heap for its specialty and day takes the slot in O(log n).
+    The patient's old, later slot is then freed and offered down the chain
+    in the same critical section. Slots nobody wants are kept as open slots
+    for ``check_doctor_availability``. Confirmations for rebooked patients
+    are queued in an outbox. A doctor's slot holds at most one confirmed
+    appointment; booking a taken one raises ``SlotTakenError``.
+
+    Leaving the list only forgets the entry; its copies in other day heaps
+    are skipped when they surface, and all heaps are rebuilt once stale
+    copies outnumber live ones.
+
+    State lives in this process only. Under ``clinicpulse.runner_pool`` each
+    worker has its own ledger and waitlist, so an appointment can only be
+    cancelled (and its slot backfilled) by the worker that booked it.
+    """
+
+    def __init__(
+        self,
+        window_days: Optional[int] = None,
+        min_notice_s: Optional[float] = None,
+    ) -> None:
+        self.window_days = config.waitlist_window_days if window_days is None else window_days
+        self.min_notice_s = config.waitlist_min_notice_s if min_notice_s is None else min_notice_s
+        self._appointments: Dict[str, Appointment] = {}
+        self._entries: Dict[str, WaitlistEntry] = {}
+        self._heaps: Dict[Tuple[str, str], List[Tuple[int, float, str]]] = {}
+        self._live_items = 0
+        self._heap_items = 0
+        self._open: Dict[str, Dict[Tuple[str, str], None]] = {}
+        self._taken: Dict[Tuple[str, str], str] = {}
+        self._outbox: Deque[Appointment] = deque()
+        self._swept: Optional[date] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, appointment_id: str) -> Optional[Appointment]:
+        return self._appointments.get(appointment_id)
+
+    @staticmethod
+    def _days(entry: WaitlistEntry) -> List[str]:
+        start = entry.earliest.toordinal()
+        return [_day(ordinal) for ordinal in range(start, entry.latest.toordinal() + 1)]
+
+    def book(
+        self,
+        patient_id: str,
+        doctor: str,
+        when: str,
+        specialty: str = "general",
+        urgency_level: str = "routine",
+    ) -> Appointment:
+        """Record a booking, claiming the slot if it was an open (freed) one.
+
+        Raises ``SlotTakenError`` if the doctor already has a confirmed
+        appointment at ``when``.
+        """
+
+        now = time.time()
+        specialty = specialty.lower()
+        appointment = Appointment(
+            appointment_id=_appointment_id(),
+            patient_id=patient_id,
+            doctor=doctor,
+            datetime=when,
+            specialty=specialty,
+            urgency_level=urgency_level.lower(),
+            booked_at=now,
+        )
+        slot_key = _slot_key(doctor, when)
+        with self._lock:
+            holder = self._taken.get(slot_key)
+            if holder is not None:
+                metrics.counter("appointment_slot_conflicts_total", specialty=specialty).inc()
+                raise SlotTakenError(doctor, when, holder)
+            self._open.get(specialty, {}).pop((doctor, when), None)
+            self._appointments[appointment.appointment_id] = appointment
+            self._taken[slot_key] = appointment.appointment_id
+        return appointment
+
+    def join(
+        self,
+        appointment_id: str,
+        earliest: Optional[date] = None,
+        latest: Optional[date] = None,
+    ) -> Optional[WaitlistEntry]:
+        """Wait for an earlier slot than ``appointment_id``.
+
+        The window defaults to today through the day before the appointment,
+        capped at ``window_days``. Returns None when there is no earlier day
+        to wait for.
+        """
+
+        with self._lock:
+            appointment = self._appointments[appointment_id]
+            slot = parse_slot(appointment.datetime)
+            if appointment.status != "confirmed" or slot is None:
+                return None
+            earliest = max(earliest or date.today(), date.today())
+            latest = min(
+                latest or slot.date(),
+                slot.date() - timedelta(days=1),
+                earliest + timedelta(days=self.window_days - 1),
+            )
+            if latest < earliest:
+                return None
+            self._leave_locked(appointment_id)
+            entry = WaitlistEntry(
+                appointment_id=appointment_id,
+                patient_id=appointment.patient_id,
+                specialty=appointment.specialty,
+                urgency_level=appointment.urgency_level,
+                earliest=earliest,
+                latest=latest,
+                joined_at=time.time(),
+            )
+            self._entries[appointment_id] = entry
+            self._push_locked(entry)
+            metrics.gauge("waitlist_depth", specialty=entry.specialty).inc()
+        log_event(
+            "waitlist",
+            f"waiting for {entry.specialty} {earliest}..{latest} instead of {appointment.datetime}",
+            entry.patient_id,
+        )
+        return entry
+
+    def leave(self, appointment_id: str) -> Optional[WaitlistEntry]:
+        with self._lock:
+            return self._leave_locked(appointment_id)
+
+    def _push_locked(self, entry: WaitlistEntry) -> None:
+        key = (_rank(entry.urgency_level), entry.joined_at, entry.appointment_id)
+        days = self._days(entry)
+        for day in days:
+            heapq.heappush(self._heaps.setdefault((entry.specialty, day), []), key)
+        self._live_items += len(days)
+        self._heap_items += len(days)
+
+    def _leave_locked(self, appointment_id: str) -> Optional[WaitlistEntry]:
+        entry = self._entries.pop(appointment_id, None)
+        if entry is None:
+            return None
+        self._live_items -= (entry.latest - entry.earliest).days + 1
+        metrics.gauge("waitlist_depth", specialty=entry.specialty).dec()
+        if self._heap_items > 2 * self._live_items + 1024:
+            self._rebuild_locked()
+        return entry
+
+    def _rebuild_locked(self) -> None:
+        self._heaps, self._live_items, self._heap_items = {}, 0, 0
+        for entry in self._entries.values():
+            self._push_locked(entry)
+
+    def _head_locked(self, specialty: str, day: str) -> Optional[WaitlistEntry]:
+        """Best live entry waiting for ``day``, discarding stale heads."""
+
+        heap = self._heaps.get((specialty, day))
+        while heap:
+            _, joined_at, appointment_id = heap[0]
+            entry = self._entries.get(appointment_id)
+            if (
+                entry is not None
+                and entry.joined_at == joined_at
+                and entry.earliest.isoformat() <= day <= entry.latest.isoformat()
+            ):
+                return entry
+            heapq.heappop(heap)
+            self._heap_items -= 1
+        self._heaps.pop((specialty, day), None)
+        return None
+
+    def _sweep_locked(self, today: date) -> None:
+        """Once a day, drop heaps for past days and entries whose window ended."""
+
+        if self._swept == today:
+            return
+        self._swept = today
+        for key in [key for key in self._heaps if key[1] < today.isoformat()]:
+            self._heap_items -= len(self._heaps.pop(key))
+        for appointment_id, entry in list(self._entries.items()):
+            if entry.latest < today:
+                self._leave_locked(appointment_id)
+            elif entry.earliest < today:
+                self._live_items -= (today - entry.earliest).days
+                entry.earliest = today
+        for slots in self._open.values():
+            for slot in [slot for slot in slots if slot[1] < today.isoformat()]:
+                del slots[slot]
+
+    def cancel(self, appointment_id: str, now: Optional[float] = None) -> List[Appointment]:
+        """Cancel and backfill; returns the appointments created by rebooking.
+
+        Raises ``KeyError`` for unknown appointments; cancelling one that is
+        no longer confirmed is a no-op.
+        """
+
+        started = time.perf_counter()
+        now = time.time() if now is None else now
+        rebooked: List[Appointment] = []
+        with self._lock:
+            appointment = self._appointments[appointment_id]
+            if appointment.status != "confirmed":
+                return rebooked
+            self._sweep_locked(datetime.fromtimestamp(now).date())
+            appointment.status = "cancelled"
+            self._leave_locked(appointment_id)
+            freed = appointment
+            while True:
+                self._taken.pop(_slot_key(freed.doctor, freed.datetime), None)
+                slot = parse_slot(freed.datetime)
+                if slot is None or slot.timestamp() < now + self.min_notice_s:
+                    break
+                head = self._head_locked(freed.specialty, slot.date().isoformat())
+                if head is None:
+                    self._open.setdefault(freed.specialty, {})[(freed.doctor, freed.datetime)] = None
+                    break
+                held = self._appointments[head.appointment_id]
+                self._leave_locked(held.appointment_id)
+                held.status = "rebooked"
+                moved = Appointment(
+                    appointment_id=_appointment_id(),
+                    patient_id=held.patient_id,
+                    doctor=freed.doctor,
+                    datetime=freed.datetime,
+                    specialty=freed.specialty,
+                    urgency_level=held.urgency_level,
+                    booked_at=now,
+                    rebooked_from=held.appointment_id,
+                )
+                self._appointments[moved.appointment_id] = moved
+                self._taken[_slot_key(moved.doctor, moved.datetime)] = moved.appointment_id
+                self._outbox.append(moved)
+                rebooked.append(moved)
+                freed = held
+        metrics.counter("appointment_cancellations_total", specialty=appointment.specialty).inc()
+        metrics.counter("waitlist_rebooked_total", specialty=appointment.specialty).inc(len(rebooked))
+        metrics.histogram("waitlist_cancel_seconds").observe(time.perf_counter() - started)
+        for moved in rebooked:
+            log_event("waitlist", f"rebooked {moved.rebooked_from} -> {moved.datetime}", moved.patient_id)
+        return rebooked
+
+    def is_taken(self, doctor: str, when: str) -> bool:
+        return _slot_key(doctor, when) in self._taken
+
+    def open_slots(self, specialty: str, now: Optional[float] = None) -> List[Dict[str, str]]:
+        """Freed slots nobody on the waitlist could take, soonest first."""
+
+        cutoff = (time.time() if now is None else now) + self.min_notice_s
+        with self._lock:
+            slots = sorted(self._open.get(specialty.lower(), {}), key=lambda slot: slot[1])
+        return [
+            {"doctor": doctor, "datetime": when}
+            for doctor, when in slots
+            if parse_slot(when) is not None and parse_slot(when).timestamp() >= cutoff
+        ]
+
+    def drain_confirmations(self) -> List[Appointment]:
+        """Take the queued confirmations for rebooked appointments."""
+
+        with self._lock:
+            pending, self._outbox = list(self._outbox), deque()
+        return pending
+
+
+waitlist = Waitlist()
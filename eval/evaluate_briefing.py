@@ -3,9 +3,21 @@
 from __future__ import annotations
 
 import argparse
+import glob
+import hashlib
 import json
+import math
+import multiprocessing
+import os
 import pathlib
-from dataclasses import dataclass, asdict
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, asdict, field
+from typing import Dict, Iterable, Iterator, Optional, Set, TextIO
+
+from .keyword_scanner import KeywordScanner, load_vocabularies
+from .score_cache import ScoreCache, content_hash, open_cache
 
 
 REQUIRED_HEADINGS = [
@@ -34,19 +46,62 @@ class RubricScores:
         return data
 
 
-def score_structure(text: str) -> int:
-    lower = text.lower()
-    hits = sum(1 for heading in REQUIRED_HEADINGS if heading in lower)
-    if hits == len(REQUIRED_HEADINGS):
+RUBRIC_VOCABULARIES = {
+    "structure": REQUIRED_HEADINGS,
+    "clinical": CLINICAL_KEYWORDS,
+    "safety": SAFETY_KEYWORDS,
+}
+
+# Bump a dimension's rule version when its thresholds change; vocabulary
+# changes are picked up from the scanner automatically.
+SCORING_RULES_VERSION = {
+    "structure_clarity": 1,
+    "clinical_completeness": 1,
+    "safety_awareness": 1,
+}
+DIMENSION_VOCABULARY = {
+    "structure_clarity": "structure",
+    "clinical_completeness": "clinical",
+    "safety_awareness": "safety",
+}
+
+_SCANNER: Optional[KeywordScanner] = None
+
+
+def configure_rubric(config_path: Optional[str] = None) -> KeywordScanner:
+    """Rebuild the scanner, extending the vocabularies from a JSON file."""
+
+    global _SCANNER
+    _SCANNER = KeywordScanner(load_vocabularies(RUBRIC_VOCABULARIES, config_path))
+    return _SCANNER
+
+
+def rubric_scanner() -> KeywordScanner:
+    return _SCANNER or configure_rubric()
+
+
+def rubric_versions() -> Dict[str, str]:
+    """Version of each scored dimension: its rules plus its active vocabulary."""
+
+    vocabularies = rubric_scanner().vocabularies
+    versions = {}
+    for dimension, vocabulary in DIMENSION_VOCABULARY.items():
+        spec = json.dumps(
+            {"rules": SCORING_RULES_VERSION[dimension], "terms": sorted(vocabularies[vocabulary])}
+        )
+        versions[dimension] = hashlib.sha256(spec.encode("utf-8")).hexdigest()[:16]
+    return versions
+
+
+def _structure_score(hits: int, required: int) -> int:
+    if hits == required:
         return 5
     if hits >= 2:
         return 3
     return 1
 
 
-def score_completeness(text: str) -> int:
-    lower = text.lower()
-    hits = sum(1 for keyword in CLINICAL_KEYWORDS if keyword in lower)
+def _completeness_score(hits: int) -> int:
     if hits >= 5:
         return 5
     if hits >= 3:
@@ -54,9 +109,7 @@ def score_completeness(text: str) -> int:
     return 1
 
 
-def score_safety(text: str) -> int:
-    lower = text.lower()
-    hits = sum(1 for keyword in SAFETY_KEYWORDS if keyword in lower)
+def _safety_score(hits: int) -> int:
     if hits >= 3:
         return 5
     if hits >= 1:
@@ -64,27 +117,276 @@ def score_safety(text: str) -> int:
     return 0
 
 
-def evaluate_briefing(text: str) -> RubricScores:
+def score_structure(text: str) -> int:
+    scanner = rubric_scanner()
+    hits = len(scanner.scan(text)["structure"])
+    return _structure_score(hits, len(scanner.vocabularies["structure"]))
+
+
+def score_completeness(text: str) -> int:
+    return _completeness_score(len(rubric_scanner().scan(text)["clinical"]))
+
+
+def score_safety(text: str) -> int:
+    return _safety_score(len(rubric_scanner().scan(text)["safety"]))
+
+
+def scores_from_hits(hits: Dict[str, Set[str]]) -> RubricScores:
+    """Rubric scores from one scanner pass (terms found per dimension)."""
+
+    required = len(rubric_scanner().vocabularies["structure"])
     return RubricScores(
-        structure_clarity=score_structure(text),
-        clinical_completeness=score_completeness(text),
-        safety_awareness=score_safety(text),
+        structure_clarity=_structure_score(len(hits["structure"]), required),
+        clinical_completeness=_completeness_score(len(hits["clinical"])),
+        safety_awareness=_safety_score(len(hits["safety"])),
+    )
+
+
+def evaluate_briefing(text: str) -> RubricScores:
+    return scores_from_hits(rubric_scanner().scan(text))
+
+
+def evaluate_briefing_file(path: str) -> RubricScores:
+    """Score a file in place through ``mmap`` (no read into memory)."""
+
+    return scores_from_hits(rubric_scanner().scan_file(path))
+
+
+# ==================== CORPUS MODE ====================
+
+DIMENSIONS = ["structure_clarity", "clinical_completeness", "safety_awareness", "total"]
+
+
+def iter_corpus(patterns: Iterable[str], suffix: str = ".md") -> Iterator[str]:
+    """Yield briefing paths from files, directories (recursive), and globs."""
+
+    seen = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = (
+                str(path) for path in sorted(pathlib.Path(pattern).rglob(f"*{suffix}"))
+            )
+        elif glob.has_magic(pattern):
+            matches = glob.iglob(pattern, recursive=True)
+        else:
+            matches = iter([pattern])
+        for path in matches:
+            if path not in seen and not os.path.isdir(path):
+                seen.add(path)
+                yield path
+
+
+_CACHE: Optional[ScoreCache] = None
+
+
+def _init_worker(rubric_config: Optional[str], cache_path: Optional[str]) -> None:
+    global _CACHE
+    configure_rubric(rubric_config)
+    _CACHE = open_cache(cache_path, readonly=True)
+
+
+def score_file(path: str) -> dict:
+    """Score one briefing file; errors are reported in the row, not raised.
+
+    With a score cache, the file is hashed first and only dimensions with
+    no entry for the current rubric version are recomputed. The row then
+    records the hash, the cache outcome, and which dimensions were scored.
+    """
+
+    try:
+        if _CACHE is None:
+            return {"file": path, **evaluate_briefing_file(path).as_dict()}
+        digest = content_hash(path)
+        versions = rubric_versions()
+        cached = _CACHE.lookup(digest, versions)
+        recomputed = [dimension for dimension in versions if dimension not in cached]
+        if recomputed:
+            cached = {**evaluate_briefing_file(path).as_dict(), **cached}
+    except OSError as exc:
+        return {"file": path, "error": f"{type(exc).__name__}: {exc}"}
+    scores = RubricScores(**{dimension: cached[dimension] for dimension in versions})
+    outcome = "miss" if len(recomputed) == len(versions) else "partial" if recomputed else "hit"
+    return {
+        "file": path,
+        **scores.as_dict(),
+        "content_hash": digest,
+        "cache": outcome,
+        "recomputed": recomputed,
+    }
+
+
+@dataclass
+class CorpusStats:
+    """Streaming aggregate of rubric scores.
+
+    Scores are small integers, so each dimension keeps an exact histogram;
+    mean, percentiles and distribution come from it in O(distinct scores).
+    """
+
+    files: int = 0
+    errors: int = 0
+    histograms: Dict[str, Counter] = field(
+        default_factory=lambda: {dimension: Counter() for dimension in DIMENSIONS}
     )
+    cache: Counter = field(default_factory=Counter)
+    recomputed: Counter = field(default_factory=Counter)
+
+    def add(self, row: dict) -> None:
+        self.files += 1
+        if "error" in row:
+            self.errors += 1
+            return
+        for dimension in DIMENSIONS:
+            self.histograms[dimension][row[dimension]] += 1
+        if "cache" in row:
+            self.cache[row["cache"]] += 1
+            self.recomputed.update(row["recomputed"])
+
+    @staticmethod
+    def _percentile(histogram: Counter, q: float) -> Optional[int]:
+        count = sum(histogram.values())
+        if not count:
+            return None
+        rank = max(1, math.ceil(q / 100 * count))
+        seen = 0
+        for value in sorted(histogram):
+            seen += histogram[value]
+            if seen >= rank:
+                return value
+        return None
+
+    def summary(self) -> dict:
+        dimensions = {}
+        for dimension, histogram in self.histograms.items():
+            count = sum(histogram.values())
+            dimensions[dimension] = {
+                "mean": round(sum(v * n for v, n in histogram.items()) / count, 3) if count else None,
+                "p50": self._percentile(histogram, 50),
+                "p90": self._percentile(histogram, 90),
+                "p99": self._percentile(histogram, 99),
+                "distribution": {str(value): histogram[value] for value in sorted(histogram)},
+            }
+        summary = {"files": self.files, "errors": self.errors, "dimensions": dimensions}
+        if self.cache:
+            summary["cache"] = {
+                "hits": self.cache["hit"],
+                "partial": self.cache["partial"],
+                "misses": self.cache["miss"],
+                "recomputed": dict(sorted(self.recomputed.items())),
+            }
+        return summary
+
+
+def evaluate_corpus(
+    paths: Iterable[str],
+    output: TextIO,
+    workers: Optional[int] = None,
+    chunksize: int = 64,
+    rubric_config: Optional[str] = None,
+    cache_path: Optional[str] = None,
+) -> CorpusStats:
+    """Score ``paths`` across a process pool, streaming one JSONL row per file.
+
+    Rows are written as workers finish (unordered); files are read inside
+    the workers so the parent only handles small result dicts. With
+    ``cache_path``, workers look scores up read-only and the parent writes
+    back what they recomputed.
+    """
+
+    global _CACHE
+    stats = CorpusStats()
+    workers = workers or os.cpu_count() or 1
+    configure_rubric(rubric_config)
+    versions = rubric_versions()
+    cache = open_cache(cache_path)
+    pool = (
+        multiprocessing.Pool(
+            workers, initializer=_init_worker, initargs=(rubric_config, cache_path)
+        )
+        if workers > 1
+        else None
+    )
+    _CACHE = cache
+    try:
+        rows = (
+            pool.imap_unordered(score_file, paths, chunksize=chunksize)
+            if pool is not None
+            else map(score_file, paths)
+        )
+        for row in rows:
+            stats.add(row)
+            if cache is not None and row.get("recomputed"):
+                cache.store(
+                    row["content_hash"],
+                    versions,
+                    {dimension: row[dimension] for dimension in row["recomputed"]},
+                )
+            output.write(json.dumps(row) + "\n")
+    finally:
+        _CACHE = None
+        if pool is not None:
+            pool.close()
+            pool.join()
+        if cache is not None:
+            cache.close()
+    return stats
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Evaluate ClinicPulse AI briefings.")
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
         "--file",
         type=pathlib.Path,
-        required=True,
         help="Path to the Markdown briefing file",
     )
+    source.add_argument(
+        "--corpus",
+        nargs="+",
+        metavar="PATH",
+        help="Files, directories (searched recursively for *.md), or glob patterns",
+    )
+    parser.add_argument("--output", default="-", help="Corpus JSONL rows ('-' for stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=64, help="Files per worker task")
+    parser.add_argument(
+        "--rubric-config",
+        default=None,
+        help="JSON file of extra terms per dimension (structure, clinical, safety)",
+    )
+    parser.add_argument(
+        "--cache",
+        default=".clinicpulse/briefing_scores.sqlite3",
+        help="Corpus score cache keyed by content hash and rubric version",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Rescore every file")
     args = parser.parse_args()
 
-    text = args.file.read_text(encoding="utf-8")
-    scores = evaluate_briefing(text)
-    print(json.dumps(scores.as_dict(), indent=2))
+    configure_rubric(args.rubric_config)
+    if args.file is not None:
+        scores = evaluate_briefing_file(str(args.file))
+        print(json.dumps(scores.as_dict(), indent=2))
+        return
+
+    started = time.perf_counter()
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        stats = evaluate_corpus(
+            iter_corpus(args.corpus),
+            output,
+            workers=args.workers,
+            chunksize=args.chunksize,
+            rubric_config=args.rubric_config,
+            cache_path=None if args.no_cache else args.cache,
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    summary = stats.summary()
+    elapsed = time.perf_counter() - started
+    summary["elapsed_s"] = round(elapsed, 3)
+    summary["files_per_s"] = round(stats.files / elapsed, 1) if elapsed else None
+    print(json.dumps(summary, indent=2), file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,139 @@
+"""Single-pass multi-keyword scanner for the briefing rubric."""
+
+from __future__ import annotations
+
+import json
+import mmap
+import re
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple, Union
+
+Buffer = Union[str, bytes, bytearray, memoryview, mmap.mmap]
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """Regex source for ``terms`` with shared prefixes factored into a trie.
+
+    At each text position the regex engine walks at most one branch per
+    character, so the cost per position is bounded by the longest term,
+    not the vocabulary size. Optional suffixes are greedy, so the longest
+    term starting at a position wins.
+    """
+
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: Dict[str, dict]) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            return "(?:" + body + ")?"
+        return body
+
+    return render(trie)
+
+
+class KeywordScanner:
+    """Finds which vocabulary terms occur in a text, per dimension, in one pass.
+
+    All dimensions share one compiled pattern. A zero-width lookahead makes
+    ``finditer`` try every position, so overlapping terms ("vital" inside
+    "vitals", "risk" inside "risk flags") are all found; the shorter terms
+    that are prefixes of a match are credited from a precomputed table.
+    Text and terms are both normalized with ``str.lower()`` before
+    matching, so a term is found exactly when the original rubric's
+    ``term in text.lower()`` would find it. Bytes-like buffers such as
+    ``mmap`` objects are decoded as UTF-8 first.
+    """
+
+    def __init__(self, vocabularies: Mapping[str, Iterable[str]]) -> None:
+        self.vocabularies = {
+            dimension: tuple(dict.fromkeys(term.lower() for term in terms))
+            for dimension, terms in vocabularies.items()
+        }
+        self._dimensions_of: Dict[str, Set[str]] = {}
+        for dimension, terms in self.vocabularies.items():
+            for term in terms:
+                self._dimensions_of.setdefault(term, set()).add(dimension)
+        vocabulary = sorted(self._dimensions_of)
+        # For each term, every vocabulary term that is a prefix of it.
+        self._credited: Dict[str, Tuple[str, ...]] = {
+            term: tuple(other for other in vocabulary if term.startswith(other))
+            for term in vocabulary
+        }
+        self._pattern = re.compile("(?=(" + _trie_pattern(vocabulary) + "))")
+
+    def terms_in(self, buffer: Buffer, start: int = 0, end: Optional[int] = None) -> Set[str]:
+        """Distinct vocabulary terms present in ``buffer[start:end]``."""
+
+        end = len(buffer) if end is None else end
+        if isinstance(buffer, str):
+            text = buffer[start:end].lower()
+        else:
+            text = bytes(buffer[start:end]).decode("utf-8").lower()
+        found: Set[str] = set()
+        for term in {match.group(1) for match in self._pattern.finditer(text)}:
+            found.update(self._credited[term])
+        return found
+
+    def scan(self, buffer: Buffer, start: int = 0, end: Optional[int] = None) -> Dict[str, Set[str]]:
+        """Terms found per dimension."""
+
+        hits: Dict[str, Set[str]] = {dimension: set() for dimension in self.vocabularies}
+        for term in self.terms_in(buffer, start, end):
+            for dimension in self._dimensions_of[term]:
+                hits[dimension].add(term)
+        return hits
+
+    def scan_file(self, path: str) -> Dict[str, Set[str]]:
+        """Scan a file through ``mmap`` so large files are never read into memory."""
+
+        with open(path, "rb") as handle:
+            try:
+                view = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty files cannot be mapped.
+                return self.scan(b"")
+            with view:
+                return self.scan(view)
+
+    def scan_documents(
+        self, buffer: Buffer, separator: Union[str, bytes]
+    ) -> Iterator[Tuple[int, int, Dict[str, Set[str]]]]:
+        """Scan a concatenated corpus document by document.
+
+        Yields ``(start, end, hits)`` per document; matches never cross a
+        separator because each scan only decodes its own document.
+        """
+
+        start = 0
+        while start <= len(buffer):
+            end = buffer.find(separator, start)
+            if end == -1:
+                end = len(buffer)
+            if end > start:
+                yield start, end, self.scan(buffer, start, end)
+            start = end + len(separator)
+
+
+def load_vocabularies(
+    defaults: Mapping[str, List[str]], config_path: Optional[str] = None
+) -> Dict[str, List[str]]:
+    """Defaults extended with extra terms from a JSON file ``{dimension: [terms]}``."""
+
+    vocabularies = {dimension: list(terms) for dimension, terms in defaults.items()}
+    if config_path:
+        with open(config_path, encoding="utf-8") as handle:
+            extra = json.load(handle)
+        for dimension, terms in extra.items():
+            if dimension not in vocabularies:
+                raise ValueError(
+                    f"unknown rubric dimension {dimension!r}; expected one of {sorted(vocabularies)}"
+                )
+            vocabularies[dimension].extend(terms)
+    return vocabularies
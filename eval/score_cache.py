@@ -0,0 +1,90 @@
+"""Persistent rubric score cache keyed by briefing content hash and rubric version."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+from typing import Dict, List, Mapping, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    content_hash TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    version TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    PRIMARY KEY (content_hash, dimension)
+) WITHOUT ROWID;
+"""
+
+
+def content_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes, read in chunks."""
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ScoreCache:
+    """SQLite cache of one score per (content hash, rubric dimension).
+
+    Each entry carries the version of the dimension it was scored under, so
+    a rubric change only invalidates the dimensions it touches. Lookups can
+    run from read-only connections in pool workers while the parent writes
+    (WAL mode); writes are buffered and committed in batches.
+    """
+
+    def __init__(self, path: str, readonly: bool = False, flush_rows: int = 512) -> None:
+        self.path = path
+        self.readonly = readonly
+        self.flush_rows = flush_rows
+        self._pending: List[Tuple[str, str, str, int]] = []
+        if readonly:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30)
+        else:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def lookup(self, digest: str, versions: Mapping[str, str]) -> Dict[str, int]:
+        """Cached scores for ``digest`` whose version still matches ``versions``."""
+
+        rows = self._conn.execute(
+            "SELECT dimension, version, score FROM scores WHERE content_hash = ?", (digest,)
+        ).fetchall()
+        return {
+            dimension: score
+            for dimension, version, score in rows
+            if versions.get(dimension) == version
+        }
+
+    def store(self, digest: str, versions: Mapping[str, str], scores: Mapping[str, int]) -> None:
+        self._pending.extend(
+            (digest, dimension, versions[dimension], score) for dimension, score in scores.items()
+        )
+        if len(self._pending) >= self.flush_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        rows, self._pending = self._pending, []
+        if rows:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO scores (content_hash, dimension, version, score) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+
+    def close(self) -> None:
+        if not self.readonly:
+            self.flush()
+        self._conn.close()
+
+
+def open_cache(path: Optional[str], readonly: bool = False) -> Optional[ScoreCache]:
+    return ScoreCache(path, readonly=readonly) if path else None
@@ -0,0 +1,38 @@
+"""Shared fixtures: keep on-disk stores out of the working directory."""
+
+import pytest
+
+from clinicpulse import accounting, identity, ledger, waitlist
+from clinicpulse.config import config
+from clinicpulse.notifications import notifications
+
+
+@pytest.fixture(scope="session")
+def shared_store_dir(tmp_path_factory):
+    """Per-run directory for stores that are costly to rebuild (the guideline index)."""
+
+    return tmp_path_factory.mktemp("clinicpulse")
+
+
+@pytest.fixture(autouse=True)
+def isolated_stores(monkeypatch, tmp_path, shared_store_dir):
+    """Point every ``.clinicpulse`` store at ``tmp_path`` and start from fresh singletons.
+
+    Accounting and the identity snapshot are disabled outright; each test
+    gets an empty waitlist, and pending notifications are dropped after it.
+    """
+
+    root = tmp_path / ".clinicpulse"
+    monkeypatch.setattr(config, "session_spill_dir", str(root / "sessions"))
+    monkeypatch.setattr(config, "checkpoint_dir", str(root / "checkpoints"))
+    monkeypatch.setattr(config, "ledger_db", str(root / "ledger.sqlite3"))
+    monkeypatch.setattr(config, "ledger_snapshot", str(root / "ledger_columns.npz"))
+    monkeypatch.setattr(config, "guideline_index_dir", str(shared_store_dir / "guidelines"))
+    monkeypatch.setattr(config, "accounting_db", "")
+    monkeypatch.setattr(config, "identity_snapshot", "")
+    monkeypatch.setattr(accounting, "_ACCOUNTANT", None)
+    monkeypatch.setattr(ledger, "_LEDGER", None)
+    monkeypatch.setattr(identity, "_INDEX", None)
+    monkeypatch.setattr(waitlist, "waitlist", waitlist.Waitlist())
+    yield
+    notifications.reset()
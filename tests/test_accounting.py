@@ -0,0 +1,80 @@
+"""Tests for per-session token and latency accounting."""
+
+import sqlite3
+import time
+from types import SimpleNamespace
+
+from clinicpulse.accounting import Accountant, AccountingStore, report
+
+
+def _context(agent: str, session_id: str, invocation_id: str, **state) -> SimpleNamespace:
+    session = SimpleNamespace(app_name="clinicpulse", user_id="u1", id=session_id)
+    return SimpleNamespace(
+        agent_name=agent,
+        invocation_id=invocation_id,
+        session=session,
+        state=state,
+        function_call_id=f"{invocation_id}-{agent}-call",
+    )
+
+
+def _turn(accountant: Accountant, context: SimpleNamespace, prompt: int, completion: int) -> None:
+    accountant.model_started(context)
+    accountant.tool_started(context)
+    accountant.tool_finished(context)
+    accountant.model_finished(
+        context, SimpleNamespace(prompt_token_count=prompt, candidates_token_count=completion)
+    )
+    accountant.agent_finished(context)
+
+
+def test_rollups_per_session_and_stage(tmp_path) -> None:
+    """Agent runs roll up into top sessions and average tokens per stage."""
+
+    store = AccountingStore(str(tmp_path / "accounting.sqlite3"), flush_rows=1000)
+    accountant = Accountant(store)
+    intake = {"patient_intake": '{"patient_id": "P-9"}'}
+
+    # Intake loops twice in one invocation of session s1.
+    _turn(accountant, _context("intake_collector", "s1", "inv-1", **intake), 100, 20)
+    _turn(accountant, _context("intake_collector", "s1", "inv-1", **intake), 300, 40)
+    _turn(accountant, _context("triage_coordinator", "s1", "inv-1", **intake), 1000, 200)
+    _turn(accountant, _context("intake_collector", "s2", "inv-2"), 50, 10)
+
+    sessions = report(store, "sessions", limit=10)
+    assert [row["session_id"] for row in sessions] == ["s1", "s2"]
+    assert sessions[0]["total_tokens"] == 1660
+    assert sessions[0]["patient_id"] == "P-9"
+    assert sessions[0]["model_calls"] == 3
+
+    stages = {row["agent"]: row for row in report(store, "stages")}
+    assert stages["intake_collector"]["avg_prompt_tokens"] == 150.0
+    assert stages["intake_collector"]["max_iterations"] == 2
+    assert stages["triage_coordinator"]["runs"] == 1
+
+    assert report(store, "patients")[0]["patient_id"] == "P-9"
+    assert report(store, "days")[0]["sessions"] == 2
+
+
+def test_rows_are_written_off_the_calling_thread(tmp_path) -> None:
+    """``add`` only buffers; the writer thread commits on size and on close."""
+
+    path = str(tmp_path / "accounting.sqlite3")
+    store = AccountingStore(path, flush_rows=2, flush_interval_s=60)
+    accountant = Accountant(store)
+
+    def written() -> int:
+        with sqlite3.connect(path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM agent_runs").fetchone()[0]
+
+    _turn(accountant, _context("intake_collector", "s1", "inv-1"), 10, 1)
+    assert written() == 0
+    _turn(accountant, _context("triage_coordinator", "s1", "inv-1"), 10, 1)
+    deadline = time.monotonic() + 5
+    while written() < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert written() == 2
+
+    _turn(accountant, _context("intake_collector", "s2", "inv-2"), 10, 1)
+    store.close()
+    assert written() == 3 and not store._writer.is_alive()
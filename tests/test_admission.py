@@ -0,0 +1,107 @@
+"""Tests for triage-aware admission control."""
+
+import asyncio
+
+from clinicpulse.admission import (
+    AdmissionController,
+    admission_callback,
+    admission_controller,
+    triage_priority_level,
+)
+from clinicpulse.config import config
+from clinicpulse.metrics import metrics
+
+
+def test_priority_level_parsing() -> None:
+    """Dict, JSON text, and free text triage outputs are understood."""
+
+    assert triage_priority_level({"triage_priority": {"priority_level": "critical"}}) == "Critical"
+    assert (
+        triage_priority_level({"triage_priority": '```json\n{"priority_level": "Urgent"}\n```'})
+        == "Urgent"
+    )
+    assert triage_priority_level({"triage_priority": "Priority: Routine follow-up"}) == "Routine"
+    assert triage_priority_level({}) == "untriaged"
+
+
+def test_critical_calls_jump_the_queue() -> None:
+    """Once the bucket is empty, critical waiters are admitted first."""
+
+    async def scenario() -> list:
+        controller = AdmissionController(rate_per_s=50, burst=1, aging_s=60)
+        await controller.acquire("Routine")  # Drain the single burst token.
+        order = []
+
+        async def call(name: str, priority: str) -> None:
+            await controller.acquire(priority)
+            order.append(name)
+
+        routine = [asyncio.create_task(call(f"routine-{i}", "Routine")) for i in range(3)]
+        await asyncio.sleep(0)
+        critical = asyncio.create_task(call("critical", "Critical"))
+        await asyncio.gather(*routine, critical)
+        return order
+
+    metrics.reset()
+    order = asyncio.run(scenario())
+    assert order[0] == "critical"
+    assert metrics.snapshot()["admission_wait_seconds_count{priority=Critical}"] == 1
+
+
+def test_aging_prevents_starvation() -> None:
+    """A routine call that has waited long enough beats a fresh urgent one."""
+
+    async def scenario() -> list:
+        controller = AdmissionController(rate_per_s=20, burst=1, aging_s=0.01)
+        await controller.acquire("Routine")
+        order = []
+
+        async def call(name: str, priority: str) -> None:
+            await controller.acquire(priority)
+            order.append(name)
+
+        routine = asyncio.create_task(call("routine", "Routine"))
+        await asyncio.sleep(0.03)
+        urgent = asyncio.create_task(call("urgent", "Urgent"))
+        await asyncio.gather(routine, urgent)
+        return order
+
+    assert asyncio.run(scenario()) == ["routine", "urgent"]
+
+
+def test_cancelled_admitted_waiter_hands_its_token_on() -> None:
+    """A call cancelled between admission and running does not burn quota."""
+
+    async def scenario() -> None:
+        controller = AdmissionController(rate_per_s=0.1, burst=1, aging_s=60)
+        await controller.acquire("Routine")
+        first = asyncio.create_task(controller.acquire("Urgent"))
+        second = asyncio.create_task(controller.acquire("Routine"))
+        await asyncio.sleep(0)
+        controller.bucket._tokens = 1  # Refill exactly one token for ``first``.
+        controller._dispatch()
+        first.cancel()
+        await asyncio.wait_for(second, timeout=1)
+        assert first.cancelled() and controller.pending() == 0
+
+    asyncio.run(scenario())
+
+
+def test_disabled_by_default_and_enabled_by_rate(monkeypatch) -> None:
+    """A zero rate (the default) skips admission entirely."""
+
+    class Context:
+        agent_name = "triage_coordinator"
+        state = {}
+
+    admission_controller.cache_clear()
+    try:
+        assert config.admission_rate_per_s == 0
+        assert admission_controller() is None
+        assert asyncio.run(admission_callback(Context(), None)) is None
+
+        admission_controller.cache_clear()
+        monkeypatch.setattr(config, "admission_rate_per_s", 5.0)
+        assert admission_controller().bucket.rate == 5.0
+    finally:
+        admission_controller.cache_clear()
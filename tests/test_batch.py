@@ -0,0 +1,110 @@
+"""Tests for batch replay of scripted conversations."""
+
+import asyncio
+import io
+import json
+from types import SimpleNamespace
+
+from google.adk.sessions import InMemorySessionService
+
+from clinicpulse.batch import read_conversations, run_batch
+
+
+class EchoRunner:
+    """Stands in for ``Runner``: replies with the message after ``sleep:<s>`` seconds."""
+
+    def __init__(self) -> None:
+        self.started = []
+
+    async def run_async(self, *, user_id, session_id, new_message):
+        text = new_message.parts[0].text
+        if text == "boom":
+            raise RuntimeError("model exploded")
+        self.started.append(session_id)
+        delay = float(text.split(":", 1)[1]) if text.startswith("sleep:") else 0.0
+        await asyncio.sleep(delay)
+        yield SimpleNamespace(
+            is_final_response=lambda: True,
+            content=SimpleNamespace(parts=[SimpleNamespace(text=f"echo {text}")]),
+        )
+
+
+def _replay(lines, concurrency=4, timeout_s=5):
+    output = io.StringIO()
+    runner = EchoRunner()
+    summary = asyncio.run(
+        run_batch(
+            read_conversations(lines),
+            output,
+            concurrency=concurrency,
+            session_timeout_s=timeout_s,
+            runner=runner,
+            session_service=InMemorySessionService(),
+        )
+    )
+    return summary, [json.loads(row) for row in output.getvalue().splitlines()], runner
+
+
+def test_malformed_lines_become_error_rows_and_the_batch_continues() -> None:
+    lines = [
+        json.dumps({"session_id": "good-1", "messages": ["hi"]}),
+        "{not json",
+        json.dumps({"session_id": "bad-messages", "messages": "hi"}),
+        json.dumps(["not", "an", "object"]),
+        "",
+        json.dumps({"session_id": "crash", "messages": ["boom"]}),
+        json.dumps({"session_id": "good-2", "messages": ["a", "b"]}),
+    ]
+    summary, rows, _ = _replay(lines, concurrency=1)
+    by_line = {row["line"]: row for row in rows}
+    assert summary.as_dict()["sessions"] == 6 and summary.ok == 2 and summary.errors == 4
+    assert sorted(by_line) == [1, 2, 3, 4, 6, 7]
+    assert by_line[2]["status"] == "error" and "invalid JSON" in by_line[2]["error"]
+    assert by_line[3]["session_id"] == "bad-messages" and "list of strings" in by_line[3]["error"]
+    assert "JSON object" in by_line[4]["error"]
+    assert by_line[6]["error"] == "RuntimeError: model exploded"
+    assert [turn["reply"] for turn in by_line[7]["turns"]] == ["echo a", "echo b"]
+
+
+def test_empty_input_writes_nothing() -> None:
+    summary, rows, _ = _replay(["", "   \n"])
+    assert rows == [] and summary.as_dict()["sessions"] == 0
+    assert list(read_conversations([])) == []
+
+
+def test_sessions_start_in_input_order_and_rows_follow_completion() -> None:
+    lines = [
+        json.dumps({"session_id": f"s{i}", "messages": [f"sleep:{delay}"]})
+        for i, delay in enumerate([0.2, 0.0, 0.1])
+    ]
+    _, rows, runner = _replay(lines, concurrency=3)
+    assert runner.started == ["s0", "s1", "s2"]
+    assert [row["session_id"] for row in rows] == ["s1", "s2", "s0"]
+    assert [row["line"] for row in rows] == [2, 3, 1]
+
+
+def test_duplicate_session_ids_are_rejected_without_touching_the_first() -> None:
+    lines = [
+        json.dumps({"session_id": "shared", "messages": ["sleep:0.1"]}),
+        json.dumps({"session_id": "shared", "messages": ["hi"]}),
+        json.dumps({"messages": ["hi"]}),
+    ]
+    summary, rows, runner = _replay(lines, concurrency=2)
+    by_line = {row["line"]: row for row in rows}
+    assert summary.ok == 2 and summary.errors == 1
+    assert "duplicate session_id 'shared'" in by_line[2]["error"]
+    assert by_line[1]["status"] == "ok" and by_line[1]["turns"][0]["reply"] == "echo sleep:0.1"
+    assert runner.started.count("shared") == 1
+
+
+def test_slow_sessions_time_out_and_the_rest_finish() -> None:
+    lines = [
+        json.dumps({"session_id": "slow", "messages": ["hi", "sleep:5"]}),
+        json.dumps({"session_id": "fast", "messages": ["hi"]}),
+    ]
+    summary, rows, _ = _replay(lines, concurrency=2, timeout_s=0.2)
+    by_id = {row["session_id"]: row for row in rows}
+    assert summary.timeouts == 1 and summary.ok == 1
+    assert by_id["slow"]["status"] == "timeout" and "exceeded 0.2s" in by_id["slow"]["error"]
+    assert [turn["reply"] for turn in by_id["slow"]["turns"]] == ["echo hi"]
+    assert [row["session_id"] for row in rows] == ["fast", "slow"]
@@ -0,0 +1,86 @@
+"""Tests for the hybrid templated/narrative clinician briefing."""
+
+from clinicpulse.briefing_renderer import (
+    FactsCache,
+    narrative_sections,
+    render_briefing,
+    render_facts,
+)
+from eval.evaluate_briefing import evaluate_briefing
+
+RECORD = {
+    "patient_id": "P-12345",
+    "last_visit": "2024-10-01",
+    "known_conditions": ["hypertension"],
+    "recent_vitals": {"bp": "128/80", "hr": 72, "temp_c": 37.1},
+}
+
+STATE = {
+    "patient_intake": (
+        '```json\n{"patient_id": "P-12345", "symptoms": "chest tightness", '
+        '"duration": "2 hours", "history": "hypertension"}\n```'
+    ),
+    "triage_priority": {"priority_level": "Urgent", "rationale": "possible ACS"},
+    "lab_results": {"lab_summary": "troponin pending"},
+}
+
+
+def test_facts_render_from_state_and_record() -> None:
+    facts = render_facts(STATE, RECORD)
+    assert facts.startswith("## Overview\n")
+    assert "chest tightness (duration: 2 hours)" in facts
+    assert "Urgent — possible ACS" in facts and "troponin pending" in facts
+    assert "BP 128/80, HR 72" in facts
+    assert "NEWS2:** not scored — missing respiratory_rate, spo2, confused" in facts
+    assert "low risk" not in facts
+    assert "Missing intake information" not in facts
+
+    sparse = render_facts({"patient_intake": "walk-in, no details"}, {"status": "degraded"})
+    assert "walk-in, no details" in sparse and "not yet triaged" in sparse
+    assert "EHR:** unavailable" in sparse
+    assert "Missing intake information:** patient_id, symptoms, duration, history" in sparse
+
+
+def test_narrative_keeps_only_model_sections() -> None:
+    text = (
+        "## Overview\nmodel's own overview\n"
+        "### Risk flags\nEscalate if ST changes.\n"
+        "## Next steps\n- Repeat ECG\n- Ask about radiation of pain"
+    )
+    assert narrative_sections(text) == {
+        "Risk Flags": "Escalate if ST changes.",
+        "Next Steps": "- Repeat ECG\n- Ask about radiation of pain",
+    }
+    assert narrative_sections("Escalate now.") == {"Risk Flags": "Escalate now."}
+
+    briefing = render_briefing(render_facts(STATE, RECORD), text)
+    assert "model's own overview" not in briefing
+    assert briefing.count("## Overview") == 1
+    assert render_briefing("## Overview\n-", "")[-len("_Not provided._"):] == "_Not provided._"
+
+
+def test_briefing_keeps_rubric_shape_with_shorter_model_output() -> None:
+    narrative = (
+        "## Risk Flags\nPossible ACS; escalate if pain worsens.\n"
+        "## Next Steps\nRepeat ECG, chase troponin, ask about radiation."
+    )
+    briefing = render_briefing(render_facts(STATE, RECORD), narrative)
+    assert evaluate_briefing(briefing).structure_clarity == 5
+    assert len(narrative) < len(briefing) / 2
+
+
+def test_facts_cache_renders_once_per_invocation_and_state() -> None:
+    class Context:
+        invocation_id = "inv-1"
+        agent_name = "clinician_briefing"
+        state = {"patient_intake": {"symptoms": "cough"}}
+
+    cache = FactsCache(max_entries=2)
+    first = cache.get(Context())
+    Context.state = {"patient_intake": {"symptoms": "cough"}, "unrelated": 1}
+    assert cache.get(Context()) is first
+    Context.state = {"patient_intake": {"symptoms": "changed"}}
+    assert "changed" in cache.get(Context())
+    Context.invocation_id = "inv-2"
+    assert "changed" in cache.get(Context())
+    assert len(cache._entries) == 2
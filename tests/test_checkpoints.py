@@ -0,0 +1,138 @@
+"""Tests for lab-wait suspend/resume checkpoints."""
+
+import asyncio
+
+from google.adk.agents import BaseAgent
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types as genai_types
+
+from clinicpulse.checkpoints import (
+    Checkpoint,
+    CheckpointedLoopAgent,
+    CheckpointStore,
+    PipelinePosition,
+    resume_message,
+    resume_patient,
+    suspend_if_waiting,
+)
+from clinicpulse.validation import LabResultsValidationChecker
+
+
+def test_suspend_and_resume_round_trip(tmp_path) -> None:
+    """A parked session is dropped from memory and restored with lab results."""
+
+    async def scenario() -> None:
+        service = InMemorySessionService()
+        store = CheckpointStore(str(tmp_path))
+        session = await service.create_session(
+            app_name="clinicpulse",
+            user_id="u",
+            session_id="s",
+            state={
+                "patient_intake": {"patient_id": "P12345", "symptoms": "cough"},
+                "triage_priority": {"patient_id": "P12345", "priority_level": "Urgent"},
+                "pipeline_position": {"stage": "lab_wait_loop", "iteration": 2},
+            },
+        )
+
+        checkpoint = await suspend_if_waiting(service, session, store)
+        assert checkpoint is not None
+        assert checkpoint.position.iteration == 2
+        assert await service.get_session(app_name="clinicpulse", user_id="u", session_id="s") is None
+
+        resumed = await resume_patient(service, store, "P12345", {"lab_summary": "CBC normal"})
+        assert resumed is not None
+        restored, restored_checkpoint = resumed
+        assert restored.id == "s"
+        assert restored.state["triage_priority"]["priority_level"] == "Urgent"
+        assert restored.state["lab_results"] == {"lab_summary": "CBC normal"}
+        assert restored.state["pipeline_position"]["resumed"] is True
+        assert "lab_wait_loop" in resume_message(restored_checkpoint)
+        assert store.find_by_patient("P12345") is None
+
+    asyncio.run(scenario())
+
+
+def test_sessions_not_waiting_are_left_alone(tmp_path) -> None:
+    """Sessions outside the lab wait, or with results, are not suspended."""
+
+    async def scenario() -> None:
+        service = InMemorySessionService()
+        store = CheckpointStore(str(tmp_path))
+        session = await service.create_session(
+            app_name="clinicpulse",
+            user_id="u",
+            state={
+                "pipeline_position": {"stage": "lab_wait_loop", "iteration": 1},
+                "lab_results": {"lab_summary": "done"},
+            },
+        )
+        assert await suspend_if_waiting(service, session, store) is None
+        assert list(store.parked()) == []
+
+    asyncio.run(scenario())
+
+
+def test_deleting_an_old_checkpoint_keeps_the_newer_patient_pointer(tmp_path) -> None:
+    store = CheckpointStore(str(tmp_path))
+    older, newer = (
+        Checkpoint("clinicpulse", "u", session_id, PipelinePosition("lab_wait_loop"), patient_id="P7")
+        for session_id in ("old", "new")
+    )
+    store.save(older)
+    store.save(newer)
+    store.delete(older)
+    assert store.find_by_patient("P7") == ("clinicpulse", "u", "new")
+    store.delete(newer)
+    assert store.find_by_patient("P7") is None
+
+
+class CountingAgent(BaseAgent):
+    runs: int = 0
+
+    async def _run_async_impl(self, context):
+        self.runs += 1
+        return
+        yield
+
+
+def test_lab_loop_counts_per_invocation_and_resumes_its_count() -> None:
+    """A resumed loop only spends what is left of ``max_iterations``."""
+
+    async def scenario() -> None:
+        requester = CountingAgent(name="lab_requester")
+        loop = CheckpointedLoopAgent(
+            name="lab_wait_loop",
+            sub_agents=[requester, LabResultsValidationChecker(name="lab_results_validator")],
+            max_iterations=3,
+        )
+        service = InMemorySessionService()
+        runner = Runner(agent=loop, app_name="clinicpulse", session_service=service)
+
+        async def turn(session_id: str) -> dict:
+            message = genai_types.Content(role="user", parts=[genai_types.Part.from_text(text="hi")])
+            async for _ in runner.run_async(user_id="u", session_id=session_id, new_message=message):
+                pass
+            session = await service.get_session(app_name="clinicpulse", user_id="u", session_id=session_id)
+            return session.state["pipeline_position"]
+
+        await service.create_session(app_name="clinicpulse", user_id="u", session_id="fresh")
+        first = await turn("fresh")
+        second = await turn("fresh")
+        assert first["iteration"] == second["iteration"] == 3
+        assert first["invocation_id"] != second["invocation_id"]
+        assert requester.runs == 6
+
+        await service.create_session(
+            app_name="clinicpulse",
+            user_id="u",
+            session_id="resumed",
+            state={"pipeline_position": {"stage": "lab_wait_loop", "iteration": 2, "resumed": True}},
+        )
+        requester.runs = 0
+        position = await turn("resumed")
+        assert position["iteration"] == 3 and "resumed" not in position
+        assert requester.runs == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,115 @@
+"""Tests for the per-tool circuit breakers."""
+
+from clinicpulse.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    breaker_for,
+    circuit_breaker,
+)
+from clinicpulse.config import CircuitBreakerPolicy
+from clinicpulse.metrics import metrics
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_trips_on_error_rate_and_recovers_via_half_open() -> None:
+    """Open after enough failures, probe after open_s, close on a good probe."""
+
+    clock = FakeClock()
+    policy = CircuitBreakerPolicy(window=10, min_calls=4, failure_rate_threshold=0.5, open_s=10)
+    breaker = CircuitBreaker("flaky", policy, clock=clock)
+
+    for success in (True, False, True, False):
+        assert breaker.allow()
+        breaker.record(success, 0.01)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    clock.now = 10.0
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # Only one probe at a time.
+    breaker.record(True, 0.01)
+    assert breaker.state == CLOSED
+
+
+def test_trips_on_slow_calls_and_failed_probe_reopens() -> None:
+    """Slow successes count towards tripping; a slow probe re-opens."""
+
+    clock = FakeClock()
+    policy = CircuitBreakerPolicy(
+        window=5, min_calls=3, slow_call_s=1.0, slow_rate_threshold=0.6, open_s=5
+    )
+    breaker = CircuitBreaker("slow", policy, clock=clock)
+    for _ in range(3):
+        breaker.allow()
+        breaker.record(True, 2.0)
+    assert breaker.state == OPEN
+
+    clock.now = 5.0
+    assert breaker.allow()
+    breaker.record(True, 2.0)
+    assert breaker.state == OPEN
+    assert breaker.retry_after_s() == 5.0
+
+
+def test_decorated_tool_degrades_instead_of_raising() -> None:
+    """Exceptions and open circuits become a structured degraded result."""
+
+    @circuit_breaker
+    def broken_lookup(patient_id: str) -> dict:
+        """Always fails."""
+        raise ConnectionError("EHR unreachable")
+
+    metrics.reset()
+    breaker = breaker_for("broken_lookup")
+    result = broken_lookup("P-1")
+    assert result["status"] == "degraded"
+    assert result["tool"] == "broken_lookup"
+    assert broken_lookup.__doc__ == "Always fails."
+
+    for _ in range(breaker.policy.min_calls):
+        broken_lookup("P-1")
+    assert breaker.state == OPEN
+    assert broken_lookup("P-1")["reason"] == "circuit open"
+    snapshot = metrics.snapshot()
+    assert snapshot["circuit_breaker_transitions_total{to=open,tool=broken_lookup}"] == 1
+
+
+def test_argument_errors_do_not_trip() -> None:
+    """Bad arguments come back as invalid_arguments and leave the breaker closed."""
+
+    @circuit_breaker
+    def strict_lookup(patient_id: str) -> dict:
+        raise KeyError(patient_id)
+
+    breaker = breaker_for("strict_lookup")
+    for _ in range(breaker.policy.min_calls * 2):
+        result = strict_lookup("nobody")
+        assert result["status"] == "invalid_arguments"
+        assert result["reason"] == "KeyError: 'nobody'"
+    assert breaker.state == CLOSED and not breaker._outcomes
+
+
+def test_missing_files_do_not_trip_but_connection_errors_do() -> None:
+    @circuit_breaker
+    def read_report(path: str) -> dict:
+        if path == "offline":
+            raise ConnectionResetError("peer reset")
+        raise FileNotFoundError(path)
+
+    breaker = breaker_for("read_report")
+    for _ in range(breaker.policy.min_calls * 2):
+        assert read_report("missing.pdf")["status"] == "degraded"
+    assert breaker.state == CLOSED and not breaker._outcomes
+    for _ in range(breaker.policy.min_calls):
+        read_report("offline")
+    assert breaker.state == OPEN
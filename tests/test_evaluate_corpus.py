@@ -0,0 +1,74 @@
+"""Tests for corpus mode of the briefing evaluator."""
+
+import io
+import json
+
+from eval.evaluate_briefing import evaluate_corpus, iter_corpus
+
+GOOD = "## Overview\nsymptom vital triage history follow\n## Vitals\n## Risk\nred flag, urgent\n## Next Steps\n"
+
+
+def test_corpus_streams_rows_and_aggregates(tmp_path) -> None:
+    """Directories and globs expand once each; stats cover every dimension."""
+
+    (tmp_path / "day1").mkdir()
+    for i in range(5):
+        (tmp_path / "day1" / f"b{i}.md").write_text(GOOD, encoding="utf-8")
+    (tmp_path / "thin.md").write_text("Overview only", encoding="utf-8")
+
+    paths = list(iter_corpus([str(tmp_path / "day1"), str(tmp_path / "**" / "*.md")]))
+    assert len(paths) == 6
+
+    output = io.StringIO()
+    stats = evaluate_corpus(paths, output, workers=2, chunksize=2)
+    rows = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert sorted(row["file"] for row in rows) == sorted(paths)
+
+    summary = stats.summary()
+    assert summary["files"] == 6 and summary["errors"] == 0
+    structure = summary["dimensions"]["structure_clarity"]
+    assert structure["distribution"] == {"1": 1, "5": 5}
+    assert structure["p50"] == 5
+    assert summary["dimensions"]["total"]["mean"] == round((15 * 5 + 2) / 6, 3)
+
+
+def test_score_cache_recomputes_only_changed_files_and_dimensions(tmp_path) -> None:
+    """Unchanged content hits; edits miss; a rubric change reruns only its dimension."""
+
+    from eval.evaluate_briefing import configure_rubric
+
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    for i in range(4):
+        (corpus / f"b{i}.md").write_text(GOOD + f"\n{i}", encoding="utf-8")
+    cache = str(tmp_path / "scores.sqlite3")
+
+    def run(workers: int, rubric_config=None) -> dict:
+        output = io.StringIO()
+        stats = evaluate_corpus(
+            iter_corpus([str(corpus)]),
+            output,
+            workers=workers,
+            rubric_config=rubric_config,
+            cache_path=cache,
+        )
+        return stats.summary()
+
+    try:
+        assert run(2)["cache"] == {
+            "hits": 0,
+            "partial": 0,
+            "misses": 4,
+            "recomputed": {"clinical_completeness": 4, "safety_awareness": 4, "structure_clarity": 4},
+        }
+        (corpus / "b0.md").write_text("Overview only", encoding="utf-8")
+        summary = run(1)
+        assert (summary["cache"]["hits"], summary["cache"]["misses"]) == (3, 1)
+        assert summary["dimensions"]["structure_clarity"]["distribution"] == {"1": 1, "5": 3}
+
+        extra = tmp_path / "rubric.json"
+        extra.write_text(json.dumps({"safety": ["escalation"]}), encoding="utf-8")
+        summary = run(2, str(extra))["cache"]
+        assert (summary["partial"], summary["recomputed"]) == (4, {"safety_awareness": 4})
+    finally:
+        configure_rubric(None)
@@ -0,0 +1,80 @@
+"""Tests for the offline guideline index."""
+
+import os
+import threading
+
+from clinicpulse.config import config
+from clinicpulse.guidelines import GuidelineIndex, GuidelineIndexer, guideline_index, tokenize
+
+CHEST = "# Chest pain\n\n## Priority\nOngoing chest pain with sweating is Critical.\n"
+ASTHMA = "# Asthma\n\n## Priority\nSilent chest or low oxygen saturation is Critical.\n\n## Follow-up\nReview inhaler technique.\n"
+
+
+def test_tokenize_drops_stopwords_and_folds_plurals() -> None:
+    assert tokenize("The patients with Chest pains") == ["patient", "chest", "pain"]
+
+
+def test_search_ranks_passages_and_updates_incrementally(tmp_path) -> None:
+    """Only changed files are re-read; readers reopen onto the new generation."""
+
+    corpus, index_dir = tmp_path / "corpus", str(tmp_path / "index")
+    corpus.mkdir()
+    (corpus / "chest.md").write_text(CHEST, encoding="utf-8")
+    (corpus / "asthma.md").write_text(ASTHMA, encoding="utf-8")
+    indexer = GuidelineIndexer(index_dir)
+    assert indexer.update(str(corpus)) == {
+        "added": 2, "changed": 0, "removed": 0, "unchanged": 0, "passages": 3
+    }
+
+    index = GuidelineIndex(index_dir)
+    results = index.search("chest pain and sweating", top_k=2)
+    assert [r["title"] for r in results] == ["Chest pain — Priority", "Asthma — Priority"]
+    assert results[0]["text"] == "Ongoing chest pain with sweating is Critical."
+    assert index.search("inhaler")[0]["source"] == "asthma.md"
+    assert index.search("unknown words") == []
+
+    first = index.generation
+    assert indexer.update(str(corpus))["unchanged"] == 2
+    assert GuidelineIndex(index_dir).generation == first
+
+    (corpus / "chest.md").write_text(CHEST.replace("sweating", "diaphoresis"), encoding="utf-8")
+    os.remove(corpus / "asthma.md")
+    assert indexer.update(str(corpus)) == {
+        "added": 0, "changed": 1, "removed": 1, "unchanged": 0, "passages": 1
+    }
+    assert index.search("inhaler")[0]["source"] == "asthma.md"  # old mapping still valid
+    index.close()
+    updated = GuidelineIndex(index_dir)
+    assert updated.search("inhaler") == []
+    assert updated.search("diaphoresis")[0]["source"] == "chest.md"
+    updated.close()
+
+
+def test_concurrent_first_builds_write_one_generation(tmp_path) -> None:
+    corpus, index_dir = tmp_path / "corpus", str(tmp_path / "index")
+    corpus.mkdir()
+    (corpus / "chest.md").write_text(CHEST, encoding="utf-8")
+    (corpus / "asthma.md").write_text(ASTHMA, encoding="utf-8")
+    stats = []
+
+    def build() -> None:
+        stats.append(GuidelineIndexer(index_dir).update(str(corpus)))
+
+    builders = [threading.Thread(target=build) for _ in range(4)]
+    for builder in builders:
+        builder.start()
+    for builder in builders:
+        builder.join()
+
+    assert sorted(s["added"] for s in stats) == [0, 0, 0, 2]
+    assert sorted(s["unchanged"] for s in stats) == [0, 2, 2, 2]
+    index = GuidelineIndex(index_dir)
+    assert [name for name in os.listdir(index_dir) if name.startswith("gen-")] == [index.generation]
+    index.close()
+    assert not [name for name in os.listdir(index_dir) if name.endswith(".tmp")]
+
+
+def test_process_index_builds_sample_corpus_on_first_use(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(config, "guideline_index_dir", str(tmp_path / "index"))
+    results = guideline_index().search("facial droop arm weakness", top_k=1)
+    assert results[0]["source"] == "stroke.md"
@@ -0,0 +1,119 @@
+"""Tests for hedged model calls, adaptive timeouts, and retries."""
+
+import asyncio
+from typing import AsyncGenerator, List
+
+import pytest
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+from clinicpulse import hedging
+from clinicpulse.config import ModelCallPolicy, config
+from clinicpulse.hedging import hedged_model
+from clinicpulse.metrics import metrics
+
+AGENT = "hedge_test_agent"
+
+
+class ScriptedLlm(BaseLlm):
+    """Fake backend: each call takes the next (delay_s, error) step of ``script``."""
+
+    script: List[tuple] = []
+    calls: int = 0
+    cancelled: int = 0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        delay, error = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if error is not None:
+            raise error
+        yield LlmResponse(custom_metadata={"call": self.calls})
+
+
+@pytest.fixture
+def scripted(monkeypatch):
+    def install(model: str, script: List[tuple], **policy) -> ScriptedLlm:
+        llm = ScriptedLlm(model=model, script=script)
+        monkeypatch.setitem(hedging._INNER_LLMS, model, llm)
+        monkeypatch.setitem(config.model_call_policies, AGENT, ModelCallPolicy(**policy))
+        return llm
+
+    metrics.reset()
+    return install
+
+
+def _run(model: str) -> List[LlmResponse]:
+    async def call() -> List[LlmResponse]:
+        llm = hedged_model(AGENT, model)
+        request = LlmRequest(model=model)
+        return [response async for response in llm.generate_content_async(request)]
+
+    return asyncio.run(call())
+
+
+def _warm(model: str, latency_s: float, samples: int = 20) -> None:
+    for _ in range(samples):
+        metrics.histogram("model_call_latency_seconds", agent=AGENT, model=model).observe(latency_s)
+
+
+def test_hedge_fires_after_p95_and_cancels_the_loser(scripted) -> None:
+    """A slow primary gets a duplicate at the observed p95; the winner cancels it."""
+
+    llm = scripted("fake-slow-primary", [(5.0, None), (0.01, None)], hedge=True)
+    _warm("fake-slow-primary", 0.02)
+    (response,) = _run("fake-slow-primary")
+    assert response.custom_metadata == {"call": 2}
+    assert llm.calls == 2 and llm.cancelled == 1
+    snapshot = metrics.snapshot()
+    assert snapshot[f"model_hedges_fired_total{{agent={AGENT}}}"] == 1
+    assert snapshot[f"model_hedges_won_total{{agent={AGENT}}}"] == 1
+
+
+def test_no_hedge_until_enough_samples_for_this_model(scripted) -> None:
+    """Latency on one model does not arm hedging (or timeouts) for another."""
+
+    llm = scripted("fake-standard", [(0.05, None)], hedge=True)
+    _warm("fake-fast", 0.001)
+    _run("fake-standard")
+    assert llm.calls == 1
+    assert f"model_hedges_fired_total{{agent={AGENT}}}" not in metrics.snapshot()
+    assert hedging.hedge_delay_s(AGENT, config.model_call_policy(AGENT), "fake-standard") is None
+
+
+def test_timeouts_retry_then_give_up(scripted) -> None:
+    """Each attempt is cut off at the timeout; retries stop at max_retries."""
+
+    llm = scripted(
+        "fake-hung", [(5.0, None)], initial_timeout_s=0.05, max_retries=1, backoff_base_s=0.001
+    )
+    with pytest.raises(asyncio.TimeoutError):
+        _run("fake-hung")
+    assert llm.calls == 2 and llm.cancelled == 2
+    snapshot = metrics.snapshot()
+    assert snapshot[f"model_call_timeouts_total{{agent={AGENT}}}"] == 2
+    assert snapshot[f"model_call_retries_total{{agent={AGENT}}}"] == 1
+
+
+def test_retryable_errors_recover_and_others_fail_fast(scripted) -> None:
+    flaky = scripted(
+        "fake-flaky", [(0, ConnectionError("reset")), (0, None)], max_retries=2, backoff_base_s=0.001
+    )
+    assert len(_run("fake-flaky")) == 1 and flaky.calls == 2
+
+    broken = scripted("fake-broken", [(0, ValueError("bad request"))], max_retries=2)
+    with pytest.raises(ValueError):
+        _run("fake-broken")
+    assert broken.calls == 1
+
+    down = scripted(
+        "fake-down", [(0, ConnectionError("refused"))], max_retries=2, backoff_base_s=0.001
+    )
+    with pytest.raises(ConnectionError):
+        _run("fake-down")
+    assert down.calls == 3
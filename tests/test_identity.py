@@ -0,0 +1,95 @@
+"""Tests for fuzzy patient identity resolution."""
+
+from clinicpulse import identity
+from clinicpulse.identity import IdentityIndex, dob_candidates, normalize_name, resolve_or_register
+
+REGISTRY = [
+    {"patient_id": "P12345", "name": "Jon Smith", "dob": "1980-03-12", "aliases": ["MRN-778"]},
+    {"patient_id": "P22222", "name": "John Smith", "dob": "1975-07-01"},
+    {"patient_id": "P33333", "name": "María José Núñez", "dob": "1990-11-30"},
+    {"patient_id": "P44444", "name": "Jon Smith", "dob": "1962-01-05"},
+]
+
+
+def test_normalization() -> None:
+    assert normalize_name("Núñez, María-José") == "jose maria nunez"
+    assert dob_candidates("03/04/1990") == {"1990-04-03", "1990-03-04"}
+    assert dob_candidates("12 March 1980") == {"1980-03-12"}
+    assert dob_candidates("not a date") == set()
+
+
+def test_resolves_ids_names_and_dobs() -> None:
+    """ID variants are exact; a name only matches once the DOB confirms it."""
+
+    index = IdentityIndex.build(REGISTRY)
+    assert index.resolve("p-12 345")["patient_id"] == "P12345"
+    assert index.resolve("12345")["patient_id"] == "P12345"
+    assert index.resolve("mrn 778")["patient_id"] == "P12345"
+
+    ambiguous = index.resolve("Jon Smith")
+    assert ambiguous["status"] == "ambiguous"
+    assert {c["patient_id"] for c in ambiguous["candidates"]} == {"P12345", "P44444"}
+    assert index.resolve("Jon Smith", "12/03/1980")["patient_id"] == "P12345"
+    assert index.resolve("Smith, Johnny", "1975-07-01")["patient_id"] == "P22222"
+    unconfirmed = index.resolve("maria jose nunez")
+    assert unconfirmed["status"] == "needs_confirmation" and "patient_id" not in unconfirmed
+    assert unconfirmed["candidates"][0]["patient_id"] == "P33333"
+    assert index.resolve("maria jose nunez", "1990-11-30")["patient_id"] == "P33333"
+    assert index.resolve("Zebediah Quux")["status"] == "not_found"
+
+
+def test_conflicting_dob_asks_for_confirmation_instead_of_registering(monkeypatch) -> None:
+    index = IdentityIndex.build(REGISTRY)
+    mistyped = index.resolve("Jon Smith", "1999-09-09")
+    assert mistyped["status"] == "needs_confirmation" and mistyped["dob_mismatch"]
+    assert "patient_id" not in mistyped
+    assert {c["patient_id"] for c in mistyped["candidates"]} >= {"P12345", "P44444"}
+    assert index.resolve("Maria Nunez", "1991-01-01")["status"] == "needs_confirmation"
+    # An ID whose recorded DOB contradicts the one given is not accepted either.
+    assert index.resolve("P12345", "1999-09-09").get("patient_id") is None
+
+    monkeypatch.setattr(identity, "_INDEX", index)
+    assert resolve_or_register("Jon Smith", "1999-01-01")["status"] == "needs_confirmation"
+    assert resolve_or_register("Zebediah Quux", "1999-01-01")["status"] == "registered"
+    assert len(index) == len(REGISTRY) + 1
+
+
+def test_registrations_and_snapshot_round_trip(tmp_path) -> None:
+    """Delta rows are searchable before and after compaction and a reload."""
+
+    index = IdentityIndex.build(REGISTRY, compact_every=2)
+    new_id = index.register("Aisha Rahman", "1988-02-29")
+    assert index.resolve("Aisha Rahmen", "29 Feb 1988")["patient_id"] == new_id
+    index.register("Tomas Berg")
+    assert not index._delta_sizes  # compacted at two pending rows
+    assert index.resolve("Tomas Berg")["status"] == "needs_confirmation"
+    assert new_id != index.register("Aisha Rahman", "1988-02-29")
+
+    path = str(tmp_path / "identity.npz")
+    index.save(path)
+    loaded = IdentityIndex.load(path)
+    assert len(loaded) == 7 and not loaded.dirty
+    assert loaded.resolve("mrn-778")["patient_id"] == "P12345"
+    assert loaded.resolve(new_id.lower())["patient_id"] == new_id
+    loaded.add("P99999", "Lena Ortiz")
+    typo = loaded.resolve("Lena Ortis")
+    assert typo["status"] == "ambiguous"  # one typo in a short name: ask for a DOB
+    assert typo["candidates"][0]["patient_id"] == "P99999"
+
+
+def test_workers_saving_one_snapshot_keep_each_others_patients(tmp_path) -> None:
+    """Each worker registers into its own copy; ``sync`` merges instead of overwriting."""
+
+    path = str(tmp_path / "identity.npz")
+    IdentityIndex.build(REGISTRY).save(path)
+    first, second = IdentityIndex.load(path), IdentityIndex.load(path)
+    aisha = first.register("Aisha Rahman", "1988-02-29")
+    tomas = second.register("Tomas Berg", "1970-05-05")
+    first.sync(path)
+    second.sync(path)
+
+    merged = IdentityIndex.load(path)
+    assert len(merged) == len(REGISTRY) + 2
+    assert merged.resolve(aisha)["patient_id"] == aisha
+    assert merged.resolve("Tomas Berg", "1970-05-05")["patient_id"] == tomas
+    assert not list(tmp_path.glob("*.tmp.npz"))
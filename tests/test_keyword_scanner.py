@@ -0,0 +1,82 @@
+"""Tests for the single-pass rubric keyword scanner."""
+
+import json
+import random
+
+from eval.evaluate_briefing import (
+    RUBRIC_VOCABULARIES,
+    configure_rubric,
+    evaluate_briefing,
+    evaluate_briefing_file,
+)
+from eval.keyword_scanner import KeywordScanner, load_vocabularies
+
+
+def test_overlapping_terms_across_dimensions_in_one_pass() -> None:
+    """Prefix terms inside longer matches are credited to every dimension."""
+
+    scanner = KeywordScanner({"structure": ["Vitals", "Risk Flags"], "clinical": ["vital", "risk"]})
+    hits = scanner.scan("VITALS were stable; no RISK FLAGS.")
+    assert hits == {"structure": {"vitals", "risk flags"}, "clinical": {"vital", "risk"}}
+    assert scanner.scan("risky vital")["structure"] == set()
+
+
+def test_matches_agree_with_the_lowercase_substring_scorer() -> None:
+    """Same terms as ``term in text.lower()``, including case-folding edge cases."""
+
+    scanner = KeywordScanner(RUBRIC_VOCABULARIES)
+    # 'ſ' and 'İ' fold to ASCII only under case-insensitive regex; the Kelvin
+    # sign does lower() to 'k'. Each must score as the old scorer did.
+    texts = ["RIS\u212a and WARNING", "riſk, red fla\u0121", "V\u0130TAL signs", "Triage hiſtory"]
+    alphabet = "risk warning vital triage next steps \u212a\u017f\u0130ΣRISK"
+    rng = random.Random(7)
+    texts += ["".join(rng.choice(alphabet) for _ in range(80)) for _ in range(300)]
+    for text in texts:
+        expected = {
+            dimension: {term for term in terms if term in text.lower()}
+            for dimension, terms in scanner.vocabularies.items()
+        }
+        assert scanner.scan(text) == expected, text
+        assert scanner.scan(text.encode("utf-8")) == expected, text
+
+
+def test_bytes_mmap_and_bounded_documents(tmp_path) -> None:
+    """Bytes and mmap buffers match like str; documents never share matches."""
+
+    scanner = KeywordScanner({"safety": ["red flag", "urgent"]})
+    path = tmp_path / "corpus.txt"
+    path.write_bytes(b"Urgent review\x00red \x00flag\x00")
+    assert scanner.scan_file(str(path)) == {"safety": {"urgent"}}
+
+    buffer = path.read_bytes()
+    documents = list(scanner.scan_documents(buffer, b"\x00"))
+    assert [(start, end) for start, end, _ in documents] == [(0, 13), (14, 18), (19, 23)]
+    assert [hits["safety"] for _, _, hits in documents] == [{"urgent"}, set(), set()]
+
+    (tmp_path / "empty.md").write_bytes(b"")
+    assert scanner.scan_file(str(tmp_path / "empty.md")) == {"safety": set()}
+
+
+def test_rubric_config_extends_vocabularies(tmp_path) -> None:
+    """Extra terms change scores; unknown dimensions are rejected."""
+
+    extra = tmp_path / "rubric.json"
+    extra.write_text(json.dumps({"safety": ["sepsis", "stroke", "anaphylaxis"]}), encoding="utf-8")
+    briefing = tmp_path / "b.md"
+    briefing.write_text("Possible sepsis, rule out stroke or anaphylaxis.", encoding="utf-8")
+    try:
+        assert evaluate_briefing_file(str(briefing)).safety_awareness == 0
+        configure_rubric(str(extra))
+        assert evaluate_briefing_file(str(briefing)).safety_awareness == 5
+    finally:
+        configure_rubric(None)
+    assert evaluate_briefing(briefing.read_text()).safety_awareness == 0
+
+    bad = tmp_path / "bad.json"
+    bad.write_text(json.dumps({"tone": ["kind"]}), encoding="utf-8")
+    try:
+        load_vocabularies({"safety": []}, str(bad))
+    except ValueError as exc:
+        assert "tone" in str(exc)
+    else:
+        raise AssertionError("unknown dimension accepted")
@@ -0,0 +1,141 @@
+"""Tests for the booking/triage ledger and capacity analytics."""
+
+import time
+from datetime import datetime
+
+import numpy as np
+
+from clinicpulse.ledger import (
+    ColumnCache,
+    LedgerStore,
+    arrivals,
+    capacity_report,
+    load_history,
+    utilization,
+)
+from clinicpulse.waitlist import Appointment
+
+DAY = 86400.0
+START = datetime(2030, 3, 4).timestamp()  # local midnight
+
+
+def _appointment(i: int, doctor: str, specialty: str, urgency: str, booked_h: float,
+                 lead_h: float, status: str = "confirmed") -> Appointment:
+    slot = datetime.fromtimestamp(START + (booked_h + lead_h) * 3600)
+    return Appointment(
+        appointment_id=f"APT-{i}", patient_id=f"P-{i}", doctor=doctor,
+        datetime=slot.strftime("%Y-%m-%d %H:%M"), specialty=specialty,
+        urgency_level=urgency, status=status, booked_at=START + booked_h * 3600,
+    )
+
+
+def _store(tmp_path) -> LedgerStore:
+    store = LedgerStore(str(tmp_path / "ledger.sqlite3"), flush_rows=1000)
+    store.record_booking(_appointment(1, "Dr. Heart", "cardiology", "urgent", 9, 24))
+    store.record_booking(_appointment(2, "Dr. Heart", "cardiology", "routine", 9.5, 24 * 8))
+    store.record_booking(_appointment(3, "Dr. Smith", "general", "routine", 10, 24 * 7))
+    store.record_booking(_appointment(4, "Dr. Smith", "general", "routine", 34, 48, "cancelled"))
+    # Re-recording an appointment replaces its status.
+    store.record_booking(_appointment(3, "Dr. Smith", "general", "routine", 10, 24 * 7, "rebooked"))
+    store.record_booking(_appointment(5, "Dr. Smith", "general", "routine", 30, 25))
+    for hour, level, specialty in ((9, "Urgent", "cardiology"), (9, "Routine", "cardiology"),
+                                   (10, "Routine", "general"), (33, "Critical", "general")):
+        store.record_triage(f"P-{hour}", level, specialty, START + hour * 3600)
+    return store
+
+
+def test_history_columns_and_arrivals(tmp_path) -> None:
+    store = _store(tmp_path)
+    history = load_history(store, snapshot="")
+    assert len(history.booked_at) == 5 and len(history.triage_at) == 4
+    assert history.urgencies == ["critical", "urgent", "routine"]
+    assert history.statuses == ["confirmed", "cancelled", "rebooked"]
+    assert history.span_days == 2
+
+    offset = datetime.fromtimestamp(START).astimezone().utcoffset().total_seconds()
+    per_day = arrivals(history, utc_offset_s=offset)
+    cardio = history.specialties.index("cardiology")
+    assert per_day.shape == (24, 2, 3)
+    assert per_day[9, cardio].tolist() == [0.0, 0.5, 0.5]
+    assert per_day.sum() == 2.0  # four decisions over two days
+
+    since = load_history(store, since=START + 24 * 3600, snapshot="")
+    assert len(since.booked_at) == 2 and len(since.triage_at) == 1
+
+
+def test_utilization_and_lead_times(tmp_path) -> None:
+    history = load_history(_store(tmp_path), snapshot="")
+    rows = {row["doctor"]: row for row in utilization(history, hours_per_day=1)}
+    # Only bookings that still hold their slot count: two 30-minute visits on
+    # two different days for Dr. Heart, one for Dr. Smith.
+    assert rows["Dr. Heart"]["bookings"] == 2 and rows["Dr. Heart"]["clinic_days"] == 2
+    assert rows["Dr. Heart"]["utilization"] == 0.5
+    assert rows["Dr. Smith"]["bookings"] == 1 and rows["Dr. Smith"]["utilization"] == 0.5
+
+    report = capacity_report(history, hours_per_day=1)
+    lead = {row["urgency"]: row for row in report["lead_time_by_urgency"]}
+    assert lead["urgent"]["p50_hours"] == 24.0
+    assert lead["routine"]["bookings"] == 2 and lead["routine"]["p95_hours"] > 100
+    assert "critical" not in lead
+    assert {row["specialty"] for row in report["arrivals_by_specialty"]} == {"cardiology", "general"}
+
+
+def test_empty_ledger(tmp_path) -> None:
+    history = load_history(LedgerStore(str(tmp_path / "empty.sqlite3")), snapshot="")
+    report = capacity_report(history)
+    assert all(rows == [] for rows in report.values())
+    assert np.asarray(arrivals(history)).size == 0
+
+
+def test_snapshot_refresh_is_incremental(tmp_path) -> None:
+    store = _store(tmp_path)
+    path = str(tmp_path / "columns.npz")
+    assert ColumnCache(store, path).refresh()
+    cache = ColumnCache(store, path)
+    assert len(cache.bookings["id"]) == 5 and len(cache.triage["id"]) == 4
+
+    store.record_booking(_appointment(1, "Dr. Heart", "cardiology", "urgent", 9, 24, "cancelled"))
+    store.record_booking(_appointment(6, "Dr. Derm", "dermatology", "routine", 40, 72))
+    store.record_triage("P-40", "Routine", "dermatology", START + 40 * 3600)
+    assert cache.refresh()
+    history = ColumnCache(store, path).history()
+    assert len(history.booked_at) == 6 and len(history.triage_at) == 5
+    assert history.statuses[history.status[0]] == "cancelled"
+    assert history.doctors[history.doctor[-1]] == "Dr. Derm"
+    assert history.specialties[history.triage_specialty[-1]] == "dermatology"
+    assert load_history(store, snapshot=path).booked_at.tolist() == history.booked_at.tolist()
+
+
+def test_rows_buffered_by_an_idle_worker_still_reach_the_snapshot(tmp_path, monkeypatch) -> None:
+    """``seq`` is stamped at write time, so late rows are newer than the watermark."""
+
+    import sqlite3
+
+    from clinicpulse import ledger as ledger_module
+
+    clock = [START * 10**9]
+    monkeypatch.setattr(ledger_module.time, "time_ns", lambda: clock[0])
+    db = str(tmp_path / "shared.sqlite3")
+    busy, idle = LedgerStore(db), LedgerStore(db, flush_interval_s=3600)
+    idle.record_booking(_appointment(1, "Dr. Heart", "cardiology", "urgent", 9, 24))
+
+    clock[0] += 600 * 10**9
+    busy.record_booking(_appointment(2, "Dr. Smith", "general", "routine", 10, 24))
+    cache = ColumnCache(busy, str(tmp_path / "columns.npz"))
+    cache.refresh()
+    clock[0] += 600 * 10**9
+    idle.flush()
+    cache.refresh()
+    assert len(cache.bookings["id"]) == 2
+
+    timed = LedgerStore(db, flush_rows=1000, flush_interval_s=0.05)
+    timed.record_triage("P-1", "Urgent", "cardiology", START)
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        with sqlite3.connect(db) as conn:
+            if conn.execute("SELECT COUNT(*) FROM triage").fetchone()[0]:
+                break
+        time.sleep(0.01)
+    else:
+        raise AssertionError("flusher thread never wrote the buffered row")
+    timed.close()
@@ -0,0 +1,44 @@
+"""Tests for per-call model tier routing."""
+
+from types import SimpleNamespace
+
+from clinicpulse.config import config
+from clinicpulse.metrics import metrics
+from clinicpulse.model_routing import escalation_rate, model_routing_callback
+
+FAST = config.model_routing.tiers["fast"]
+STANDARD = config.model_routing.tiers["standard"]
+
+
+def _call(agent_name: str, text: str, state=None, invocation_id: str = "inv-1") -> str:
+    content = SimpleNamespace(role="user", parts=[SimpleNamespace(text=text)])
+    request = SimpleNamespace(model=config.worker_model, contents=[content])
+    context = SimpleNamespace(
+        agent_name=agent_name, state=state or {}, invocation_id=invocation_id
+    )
+    model_routing_callback(context, request)
+    return request.model
+
+
+def test_trivial_intake_turns_use_fast_tier() -> None:
+    """Short, benign intake turns go to the small model; others are untouched."""
+
+    metrics.reset()
+    assert _call("intake_collector", "My name is Ana, patient P-7") == FAST
+    assert _call("triage_coordinator", "My name is Ana") == STANDARD
+    assert escalation_rate("intake_collector") == 0.0
+
+
+def test_red_flags_priority_and_validator_failures_escalate() -> None:
+    """Each escalation signal moves the call to the larger tier."""
+
+    metrics.reset()
+    assert _call("intake_collector", "I have crushing chest pain") == STANDARD
+    urgent = {"triage_priority": {"priority_level": "Urgent"}}
+    assert _call("appointment_scheduler", "book me in", state=urgent) == STANDARD
+
+    failed = {"validation_failures": {"intake_collector": {"invocation_id": "inv-1", "count": 1}}}
+    assert _call("intake_collector", "ok", state=failed) == STANDARD
+    # Failures from an earlier turn do not escalate this one.
+    assert _call("intake_collector", "ok", state=failed, invocation_id="inv-2") == FAST
+    assert escalation_rate("intake_collector") == 2 / 3
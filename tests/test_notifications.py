@@ -0,0 +1,110 @@
+"""Tests for per-patient notification digests."""
+
+import time
+
+from clinicpulse.metrics import metrics
+from clinicpulse.notifications import NotificationAggregator, notifications
+from clinicpulse.tools import send_appointment_confirmation
+
+
+def _aggregator(sent):
+    return NotificationAggregator(
+        window_s=60, channels=("email", "sms"), transport=sent.append, autostart=False
+    )
+
+
+def test_events_within_window_become_one_digest_per_channel() -> None:
+    sent = []
+    hub = _aggregator(sent)
+    receipt = hub.submit("P-1", "confirmation", "Booked Mon 10:00", key="apt:1", now=1000)
+    hub.submit("P-1", "reminder", "Bring your ID", now=1010)
+    hub.submit("P-1", "reminder", "Bring your ID", now=1020)
+    hub.submit("P-2", "lab_ready", "Labs are in", channels=("sms",), now=1030)
+    assert receipt == {"channels": ["email", "sms"], "queued_at": 1000, "digest_due_at": 1060}
+
+    assert hub.flush_due(now=1059) == []
+    digests = hub.flush_due(now=1060)
+    assert [(d["patient_id"], d["channel"], d["count"]) for d in digests] == [
+        ("P-1", "email", 2), ("P-1", "sms", 2)
+    ]
+    assert digests[0]["messages"] == ["Booked Mon 10:00", "Bring your ID"]
+    assert hub.flush_due(now=1089) == [] and len(hub) == 1
+    assert [d["patient_id"] for d in hub.flush_due(now=1090)] == ["P-2"]
+    assert sent == digests + [sent[-1]] and len(hub) == 0
+
+
+def test_rebooking_supersedes_pending_confirmation() -> None:
+    sent = []
+    hub = _aggregator(sent)
+    hub.submit("P-3", "confirmation", "Booked day 9", key="appointment:A", channels=("email",), now=0)
+    hub.submit("P-3", "rebooking", "Moved to day 2", key="appointment:B",
+               supersedes="appointment:A", channels=("email",), now=30)
+    hub.submit("P-3", "rebooking", "Moved to day 1", key="appointment:C",
+               supersedes="appointment:B", channels=("email",), now=40)
+    (digest,) = hub.flush_due(now=60)
+    assert digest["messages"] == ["Moved to day 1"] and digest["kinds"] == ["rebooking"]
+    # Latency is measured from the first event the digest replaced.
+    assert metrics.histogram("notification_delivery_seconds", kind="rebooking").percentile(100) >= 60
+
+
+def test_confirmation_tool_keeps_payload_shape() -> None:
+    saved = metrics.counter("notification_messages_saved_total", channel="email")
+    before = saved.value
+    details = {"appointment_id": "APT-N1", "doctor": "Dr. Heart", "datetime": "2030-01-02 09:00"}
+    result = send_appointment_confirmation("P-N1", details)
+    assert {"patient_id", "confirmation_sent", "channels", "message", "sent_at"} <= set(result)
+    assert result["status"] == "queued" and result["confirmation_sent"] is False
+    assert result["sent_at"] is None and result["channels"] == ["email", "sms"]
+    assert result["message"] == "Appointment confirmed with Dr. Heart on 2030-01-02 09:00"
+
+    moved = send_appointment_confirmation(
+        "P-N1", {**details, "appointment_id": "APT-N2", "rebooked_from": "APT-N1"}
+    )
+    assert moved["message"].startswith("Appointment moved earlier")
+    (email, sms) = notifications.flush("P-N1")
+    assert email["count"] == sms["count"] == 1
+    assert notifications.delivery("P-N1", "appointment:APT-N2")["status"] == "sent"
+    assert notifications.delivery("P-N1", "appointment:APT-N1")["status"] == "unknown"
+    send_appointment_confirmation("P-N1", details)
+    send_appointment_confirmation("P-N1", {**details, "appointment_id": "APT-N3"})
+    assert notifications.flush("P-N1")[0]["count"] == 2
+    assert saved.value == before + 1
+
+
+def test_first_submit_starts_the_flusher_and_zero_window_sends_at_once() -> None:
+    sent = []
+    hub = NotificationAggregator(window_s=0.05, channels=("sms",), transport=sent.append)
+    hub.submit("P-5", "reminder", "Fasting from midnight", key="r1")
+    assert hub._flusher is not None
+    deadline = time.monotonic() + 5
+    while hub.delivery("P-5", "r1")["status"] == "queued" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert hub.delivery("P-5", "r1")["status"] == "sent" and len(sent) == 1
+    hub.stop()
+    assert hub._flusher is None
+
+    instant = NotificationAggregator(window_s=0, channels=("sms",), transport=sent.append)
+    instant.submit("P-6", "reminder", "See you at 9", key="r2")
+    assert instant.delivery("P-6", "r2")["status"] == "sent" and len(instant) == 0
+
+
+def test_failed_sends_are_requeued_not_lost() -> None:
+    attempts = []
+
+    def flaky(digest):
+        attempts.append(digest["patient_id"])
+        if len(attempts) == 1:
+            raise ConnectionError("smtp down")
+
+    hub = NotificationAggregator(
+        window_s=60, channels=("email",), transport=flaky, autostart=False
+    )
+    for i in range(4):
+        hub.submit(f"P-{i}", "reminder", "Bring your ID", key=f"k{i}", now=i)
+    sent = hub.flush_due(now=100)
+    assert [d["patient_id"] for d in sent] == ["P-1", "P-2", "P-3"]
+    assert hub.delivery("P-0", "k0")["status"] == "queued"
+    hub.submit("P-0", "reminder", "Fasting from midnight", key="k9", now=101)
+    (retry,) = hub.flush_due(now=102)
+    assert retry["messages"] == ["Bring your ID", "Fasting from midnight"]
+    assert hub.delivery("P-0", "k0")["status"] == "sent" and len(hub) == 0
@@ -0,0 +1,96 @@
+"""Tests for byte-stable prompt prefixes."""
+
+import asyncio
+import datetime
+from types import SimpleNamespace
+from typing import AsyncGenerator, List
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types as genai_types
+
+from clinicpulse import hedging, prompts
+from clinicpulse.prompts import prefix_fingerprint, session_context
+from clinicpulse.sub_agents.triage import build_triage_loop
+
+INSTRUCTION = """
+    You are the front-desk intake assistant. Save to `patient_intake` as
+    {"patient_id": "...", "symptoms": "..."}
+    """
+
+
+def _request(system_instruction: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        model="gemini-2.5-flash",
+        config=SimpleNamespace(system_instruction=system_instruction, tools=None),
+    )
+
+
+class RecordingLlm(BaseLlm):
+    """Fake backend that keeps every request it is sent and answers "Routine"."""
+
+    requests: List[LlmRequest] = []
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.requests.append(llm_request.model_copy(deep=True))
+        yield LlmResponse(
+            content=genai_types.Content(role="model", parts=[genai_types.Part.from_text(text="Routine")])
+        )
+
+
+def test_prefix_is_stable_across_calls_sessions_and_days(monkeypatch) -> None:
+    """Real triage requests share one prefix; only the session suffix changes."""
+
+    recorder = RecordingLlm(model="recording", requests=[])
+    monkeypatch.setattr(hedging, "_inner_llm", lambda model: recorder)
+    triage_loop = build_triage_loop()
+
+    async def run(day: datetime.date, state: dict) -> LlmRequest:
+        monkeypatch.setattr(prompts, "_today", lambda: day)
+        service = InMemorySessionService()
+        session = await service.create_session(app_name="clinicpulse", user_id="u", state=state)
+        runner = Runner(agent=triage_loop, app_name="clinicpulse", session_service=service)
+        message = genai_types.Content(role="user", parts=[genai_types.Part.from_text(text="triage")])
+        async for _ in runner.run_async(user_id="u", session_id=session.id, new_message=message):
+            pass
+        return recorder.requests[-1]
+
+    first = asyncio.run(run(datetime.date(2025, 3, 1), {}))
+    second = asyncio.run(
+        run(datetime.date(2025, 3, 2), {"patient_intake": {"patient_id": "P-1", "symptoms": "cough"}})
+    )
+
+    assert first.config.system_instruction and first.config.tools
+    assert prefix_fingerprint(first) == prefix_fingerprint(second)
+    suffixes = [request.contents[-1].parts[0].text for request in (first, second)]
+    assert "Date reference: 2025-03-01" in suffixes[0]
+    assert "Date reference: 2025-03-02" in suffixes[1]
+    assert '"patient_id": "P-1"' in suffixes[1] and "P-1" not in suffixes[0]
+
+
+def test_fingerprint_tracks_model_and_instruction() -> None:
+    """A different model or instruction is a different cacheable prefix."""
+
+    base = prefix_fingerprint(_request(INSTRUCTION))
+    other_model = _request(INSTRUCTION)
+    other_model.model = "gemini-2.5-flash-lite"
+    assert prefix_fingerprint(other_model) != base
+    assert prefix_fingerprint(_request(INSTRUCTION + " ")) != base
+
+
+def test_session_context_is_deterministic() -> None:
+    """Dossier values are serialised with sorted keys in a fixed key order."""
+
+    state = {
+        "triage_priority": {"rationale": "fever", "priority_level": "Urgent"},
+        "patient_intake": "P-2, cough for 3 days",
+    }
+    today = datetime.date(2025, 1, 1)
+    assert session_context(state, today) == session_context(dict(reversed(state.items())), today)
+    assert session_context(state, today).splitlines()[2:] == [
+        "patient_intake: P-2, cough for 3 days",
+        'triage_priority: {"priority_level": "Urgent", "rationale": "fever"}',
+    ]
@@ -0,0 +1,52 @@
+"""Tests for the per-session event recorder."""
+
+from types import SimpleNamespace
+
+from clinicpulse.recorder import SessionRecorder, log_path, read_session_log
+
+
+class FakeContent:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def model_dump(self, **kwargs) -> dict:
+        return {"role": "user", "parts": [{"text": self.text}]}
+
+
+def _context(agent: str, invocation_id: str, state: dict) -> SimpleNamespace:
+    return SimpleNamespace(
+        agent_name=agent,
+        invocation_id=invocation_id,
+        state=state,
+        session=SimpleNamespace(app_name="clinicpulse", user_id="u/1", id="s1"),
+        user_content=FakeContent(f"message for {invocation_id}"),
+        function_call_id="call-1",
+    )
+
+
+def test_round_trip_of_a_two_turn_session(tmp_path) -> None:
+    """Turns, per-agent responses, tool calls and state deltas read back in order."""
+
+    recorder = SessionRecorder(str(tmp_path))
+    state = {"seed": 1}
+    for turn, invocation_id in enumerate(("inv-1", "inv-2")):
+        context = _context("intake_collector", invocation_id, state)
+        request = SimpleNamespace(model="gemini-2.5-flash-lite", contents=[object()])
+        recorder.model_request(context, request)
+        recorder.model_response(context, {"content": {"parts": [{"text": f"reply {turn}"}]}})
+        recorder.tool_call("fetch_patient_records", {"patient_id": "P-1"}, context, {"ok": turn})
+        state["patient_intake"] = {"turn": turn}
+        recorder.agent_finished(context)
+
+    path = log_path(str(tmp_path), "clinicpulse", "u/1", "s1")
+    assert path.endswith("u_1/s1.jsonl.gz")
+    log = read_session_log(path)
+    assert log.initial_state == {"seed": 1}
+    assert [turn["parts"][0]["text"] for turn in log.user_turns] == [
+        "message for inv-1",
+        "message for inv-2",
+    ]
+    responses = log.responses_by_agent()["intake_collector"]
+    assert [r["content"]["parts"][0]["text"] for r in responses] == ["reply 0", "reply 1"]
+    assert [r["response"] for r in log.of_type("tool")] == [{"ok": 0}, {"ok": 1}]
+    assert log.final_state() == {"seed": 1, "patient_intake": {"turn": 1}}
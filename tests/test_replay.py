@@ -0,0 +1,86 @@
+"""Tests for replaying recorded sessions without a model."""
+
+import asyncio
+from typing import AsyncGenerator, List
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types as genai_types
+
+from clinicpulse import hedging, recorder, tools
+from clinicpulse.config import config
+from clinicpulse.recorder import log_path, read_session_log
+from clinicpulse.replay import install_replay, replay_session
+from clinicpulse.sub_agents.triage import build_triage_loop
+
+RECORD = {"patient_id": "P-7", "blood_pressure": "128/82", "heart_rate": 88, "temperature": 37.1}
+
+
+class TriageLlm(BaseLlm):
+    """Fake backend: asks for the NEWS2 score, then answers with the priority."""
+
+    calls: int = 0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        last = llm_request.contents[-2] if len(llm_request.contents) > 1 else None
+        if last is not None and any(part.function_response for part in last.parts or []):
+            part = genai_types.Part.from_text(text="Urgent")
+        else:
+            part = genai_types.Part.from_function_call(
+                name="compute_early_warning_score",
+                args={"patient_id": "P-7", "respiratory_rate": 22, "spo2": 94},
+            )
+        yield LlmResponse(content=genai_types.Content(role="model", parts=[part]))
+
+
+async def _record(root, message: str) -> str:
+    service = InMemorySessionService()
+    session = await service.create_session(
+        app_name="clinicpulse", user_id="u-1", state={"patient_intake": {"patient_id": "P-7"}}
+    )
+    runner = Runner(agent=root, app_name="clinicpulse", session_service=service)
+    content = genai_types.Content(role="user", parts=[genai_types.Part.from_text(text=message)])
+    async for _ in runner.run_async(user_id="u-1", session_id=session.id, new_message=content):
+        pass
+    return session.id
+
+
+def test_recorded_session_replays_without_the_model_or_tools(monkeypatch, tmp_path) -> None:
+    llm = TriageLlm(model="fake")
+    fetched: List[str] = []
+    live_inner_llm = hedging._inner_llm
+    monkeypatch.setattr(
+        hedging,
+        "_inner_llm",
+        lambda model: live_inner_llm(model) if model.startswith("replay/") else llm,
+    )
+    monkeypatch.setattr(
+        tools, "fetch_patient_records", lambda patient_id: fetched.append(patient_id) or RECORD
+    )
+    monkeypatch.setattr(config, "record_sessions_dir", str(tmp_path / "recordings"))
+    monkeypatch.setattr(recorder, "_RECORDER", None)
+
+    session_id = asyncio.run(_record(build_triage_loop(), "Chest tightness since this morning"))
+    log = read_session_log(log_path(str(tmp_path / "recordings"), "clinicpulse", "u-1", session_id))
+    recorded_calls, recorded_fetches = llm.calls, len(fetched)
+    assert recorded_calls == 2 and recorded_fetches >= 1
+    assert log.final_state()["triage_priority"] == "Urgent"
+
+    tiers = dict(config.model_routing.tiers)
+    root = build_triage_loop()
+    triage_agent = root.sub_agents[0]
+    model, callbacks = triage_agent.model, triage_agent.before_tool_callback
+    with install_replay(log, root) as model_name:
+        assert config.record_sessions_dir == ""
+        report = asyncio.run(replay_session(log, root, model_name))
+
+    assert report.error is None and report.turns == 1
+    assert report.unused_responses == {} and report.missing_state_keys == []
+    assert llm.calls == recorded_calls and len(fetched) == recorded_fetches
+    assert config.record_sessions_dir == str(tmp_path / "recordings")
+    assert config.model_routing.tiers == tiers
+    assert triage_agent.model is model and triage_agent.before_tool_callback is callbacks
@@ -0,0 +1,181 @@
+"""Tests for session placement and worker failure handling in the runner pool."""
+
+import argparse
+import asyncio
+import io
+import json
+import sys
+from collections import Counter
+
+from clinicpulse import runner_pool
+from clinicpulse.runner_pool import HashRing, RunnerPool
+
+KEYS = [f"session-{i}" for i in range(20_000)]
+
+
+def test_hash_ring_spreads_keys_evenly() -> None:
+    ring = HashRing(virtual_nodes=64)
+    for node in ("w0", "w1", "w2", "w3"):
+        ring.add(node)
+    counts = Counter(ring.owner(key) for key in KEYS)
+    assert set(counts) == {"w0", "w1", "w2", "w3"}
+    assert max(counts.values()) < 1.35 * len(KEYS) / 4
+    assert min(counts.values()) > 0.65 * len(KEYS) / 4
+
+
+def test_hash_ring_only_moves_keys_of_the_changed_node() -> None:
+    """Placement is deterministic; adding or removing a node remaps ~1/N keys."""
+
+    ring, same = HashRing(), HashRing()
+    for node in ("w0", "w1", "w2"):
+        ring.add(node)
+        same.add(node)
+    before = {key: ring.owner(key) for key in KEYS}
+    assert before == {key: same.owner(key) for key in KEYS}
+
+    ring.add("w3")
+    grown = {key: ring.owner(key) for key in KEYS}
+    moved = [key for key in KEYS if grown[key] != before[key]]
+    assert all(grown[key] == "w3" for key in moved)
+    assert 0.15 < len(moved) / len(KEYS) < 0.35
+
+    ring.remove("w3")
+    assert {key: ring.owner(key) for key in KEYS} == before
+    ring.remove("w1")
+    assert all(ring.owner(key) == owner for key, owner in before.items() if owner != "w1")
+
+
+class FakeProcess:
+    def __init__(self) -> None:
+        self.exitcode = None
+
+    def is_alive(self) -> bool:
+        return self.exitcode is None
+
+    def join(self) -> None:
+        pass
+
+
+class FakeInbox(list):
+    put = list.append
+
+
+def _pool(monkeypatch, workers: int) -> RunnerPool:
+    """A pool whose workers are fakes we can kill; nothing is spawned."""
+
+    pool = RunnerPool(workers)
+
+    def spawn() -> str:
+        worker_id = f"w{next(pool._worker_ids)}"
+        pool._workers[worker_id] = (FakeProcess(), FakeInbox())
+        pool.ring.add(worker_id)
+        return worker_id
+
+    monkeypatch.setattr(pool, "_spawn", spawn)
+    for _ in range(workers):
+        pool._spawn()
+    return pool
+
+
+def test_dead_worker_fails_its_requests_and_is_replaced(monkeypatch) -> None:
+    async def scenario() -> None:
+        pool = _pool(monkeypatch, 2)
+        pool._loop = asyncio.get_running_loop()
+        request = asyncio.create_task(pool.send("u", "s1", "hello"))
+        await asyncio.sleep(0)
+        owner = pool._pinned["s1"]
+        (message,) = pool._workers[owner][1]
+        assert pool.check_workers() == []
+
+        pool._workers[owner][0].exitcode = -9
+        assert pool.check_workers() == [owner]
+        result = await asyncio.wait_for(request, timeout=1)
+        assert result["error"].startswith("WorkerDied") and result["session_id"] == "s1"
+        assert owner not in pool.workers and len(pool.workers) == 2
+        assert not pool._pending and "s1" not in pool._pinned
+
+        retry = asyncio.create_task(pool.send("u", "s1", "hello again"))
+        await asyncio.sleep(0)
+        new_owner = pool._pinned["s1"]
+        (message,) = pool._workers[new_owner][1]
+        pool._dispatch(("result", message["request_id"], {"reply": "hi", "latency_s": 0.01}))
+        assert (await retry)["reply"] == "hi"
+
+    asyncio.run(scenario())
+
+
+def test_worker_dying_while_draining_does_not_hang_resize(monkeypatch) -> None:
+    async def scenario() -> None:
+        pool = _pool(monkeypatch, 2)
+        pool._loop = asyncio.get_running_loop()
+        shrinking = asyncio.create_task(pool.resize(1))
+        await asyncio.sleep(0)
+        (victim,) = pool._draining
+        pool._workers[victim][0].exitcode = 1
+        assert pool.check_workers() == [victim]
+        await asyncio.wait_for(shrinking, timeout=1)
+        assert pool.workers == ["w0"] and victim not in pool._workers
+
+    asyncio.run(scenario())
+
+
+def test_ending_a_session_unpins_it(monkeypatch) -> None:
+    async def scenario() -> None:
+        pool = _pool(monkeypatch, 2)
+        pool._loop = asyncio.get_running_loop()
+        ending = asyncio.create_task(pool.end("u", "s1"))
+        await asyncio.sleep(0)
+        (message,) = pool._workers[pool._pinned["s1"]][1]
+        assert message["op"] == "end"
+        pool._dispatch(("result", message["request_id"], {"ended": True, "latency_s": 0.0}))
+        assert (await ending)["ended"] and "s1" not in pool._pinned
+
+    asyncio.run(scenario())
+
+
+def test_spilled_sessions_are_unpinned_once_idle(monkeypatch) -> None:
+    async def scenario() -> None:
+        pool = _pool(monkeypatch, 2)
+        pool._loop = asyncio.get_running_loop()
+        s1, s2 = [key for key in KEYS if pool.ring.owner(key) == "w0"][:2]
+        first = asyncio.create_task(pool.send("u", s1, "hello"))
+        second = asyncio.create_task(pool.send("u", s2, "hello"))
+        await asyncio.sleep(0)
+        message = next(m for m in pool._workers["w0"][1] if m["session_id"] == s1)
+        pool._dispatch(("result", message["request_id"], {"latency_s": 0.0, "spilled": [s1, s2]}))
+        assert "spilled" not in await first
+        # s2 still has a request queued on w0, so it keeps its pin.
+        assert pool._pinned == {s2: "w0"} and pool._active == {s2: 1}
+        second.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_malformed_stdio_lines_get_error_results(monkeypatch, capsys) -> None:
+    class EchoPool:
+        def __init__(self, workers, bootstrap=None) -> None:
+            pass
+
+        async def start(self) -> None:
+            pass
+
+        async def send(self, user_id, session_id, text):
+            return {"session_id": session_id, "reply": text}
+
+        async def close(self) -> None:
+            pass
+
+    lines = [
+        "{not json",
+        "[1, 2]",
+        json.dumps({"user_id": "u"}),
+        json.dumps({"user_id": "u", "session_id": "s1", "text": "hi"}),
+    ]
+    monkeypatch.setattr(runner_pool, "RunnerPool", EchoPool)
+    monkeypatch.setattr(sys, "stdin", io.StringIO("\n".join(lines) + "\n"))
+    asyncio.run(runner_pool._serve_stdio(argparse.Namespace(workers=1, bootstrap=None)))
+    results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert results[0]["error"].startswith("invalid JSON")
+    assert results[1]["error"] == "expected a JSON object"
+    assert {"session_id": None, "error": "missing field 'session_id'"} in results
+    assert {"session_id": "s1", "reply": "hi"} in results
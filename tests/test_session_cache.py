@@ -0,0 +1,113 @@
+"""Tests for the spill-to-disk session cache."""
+
+import asyncio
+
+from google.adk.events import Event, EventActions
+from google.genai import types as genai_types
+
+from clinicpulse.metrics import metrics
+from clinicpulse.session_cache import SpillingSessionService
+
+
+def _event(text: str, **state_delta) -> Event:
+    return Event(
+        author="user",
+        invocation_id="inv",
+        content=genai_types.Content(
+            role="user", parts=[genai_types.Part.from_text(text=text)]
+        ),
+        actions=EventActions(state_delta=state_delta),
+    )
+
+
+def test_idle_sessions_spill_and_rehydrate(tmp_path) -> None:
+    """Sessions over budget go to disk and come back with their history."""
+
+    async def scenario() -> None:
+        service = SpillingSessionService(max_resident_bytes=4096, spill_dir=str(tmp_path))
+        for index in range(5):
+            session = await service.create_session(
+                app_name="clinicpulse", user_id="u", session_id=f"s{index}"
+            )
+            for turn in range(3):
+                await service.append_event(
+                    session, _event("x" * 400, patient_intake={"turn": turn})
+                )
+
+        assert service.resident_bytes <= 4096
+        assert list(tmp_path.rglob("*.json.z"))
+
+        restored = await service.get_session(
+            app_name="clinicpulse", user_id="u", session_id="s0"
+        )
+        assert restored is not None
+        assert len(restored.events) == 3
+        assert restored.state["patient_intake"] == {"turn": 2}
+
+        listed = await service.list_sessions(app_name="clinicpulse", user_id="u")
+        assert {s.id for s in listed.sessions} == {f"s{i}" for i in range(5)}
+
+    metrics.reset()
+    asyncio.run(scenario())
+    snapshot = metrics.snapshot()
+    assert snapshot["session_cache_evictions_total"] >= 1
+    assert snapshot["session_cache_rehydrations_total"] >= 1
+
+
+def test_delete_removes_spilled_copy(tmp_path) -> None:
+    """Deleting a spilled session also removes its file."""
+
+    async def scenario() -> None:
+        service = SpillingSessionService(spill_dir=str(tmp_path))
+        await service.create_session(app_name="clinicpulse", user_id="u", session_id="s")
+        assert service.evict("clinicpulse", "u", "s")
+        assert list(tmp_path.rglob("*.json.z"))
+        await service.delete_session(app_name="clinicpulse", user_id="u", session_id="s")
+        assert not list(tmp_path.rglob("*.json.z"))
+        assert service.resident_bytes == 0
+
+    asyncio.run(scenario())
+
+
+def test_oversized_and_idle_sessions_spill(tmp_path) -> None:
+    """A session bigger than the budget is spilled after its append; idle ones age out."""
+
+    async def scenario() -> None:
+        now = [0.0]
+        service = SpillingSessionService(
+            max_resident_bytes=1024, spill_dir=str(tmp_path), idle_s=60, clock=lambda: now[0]
+        )
+        big = await service.create_session(app_name="clinicpulse", user_id="u", session_id="big")
+        await service.append_event(big, _event("x" * 4000))
+        assert service.resident_bytes == 0
+        await service.append_event(big, _event("y", patient_intake={"turn": 1}))
+        restored = await service.get_session(app_name="clinicpulse", user_id="u", session_id="big")
+        assert len(restored.events) == 2
+
+        await service.create_session(app_name="clinicpulse", user_id="u", session_id="idle")
+        now[0] = 61.0
+        await service.create_session(app_name="clinicpulse", user_id="u", session_id="fresh")
+        assert service.evict_idle() == 0
+        assert {key[2] for key in service._lru} == {"fresh"}
+
+    asyncio.run(scenario())
+
+
+def test_fetched_session_stays_resident(tmp_path) -> None:
+    """Fetching a session over budget keeps it in memory for the next append."""
+
+    async def scenario() -> None:
+        service = SpillingSessionService(max_resident_bytes=1024, spill_dir=str(tmp_path))
+        big = await service.create_session(app_name="clinicpulse", user_id="u", session_id="big")
+        await service.append_event(big, _event("x" * 4000))
+        assert service.resident_bytes == 0
+        for _ in range(2):
+            fetched = await service.get_session(
+                app_name="clinicpulse", user_id="u", session_id="big"
+            )
+            assert ("clinicpulse", "u", "big") in service._lru
+        await service.append_event(fetched, _event("y"))
+
+    metrics.reset()
+    asyncio.run(scenario())
+    assert metrics.snapshot()["session_cache_rehydrations_total"] == 1
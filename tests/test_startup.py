@@ -0,0 +1,48 @@
+"""Import-time budget checks for ClinicPulse AI."""
+
+import json
+import pathlib
+import subprocess
+import sys
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+# Importing the package must stay cheap: no ADK, no credential discovery,
+# no agent graph. Generous enough for slow CI machines.
+IMPORT_BUDGET_S = 0.5
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import clinicpulse
+import clinicpulse.config
+import clinicpulse.sub_agents
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "elapsed": elapsed,
+    "loaded": sorted(m for m in ("google.auth", "google.adk", "clinicpulse.agent") if m in sys.modules),
+}))
+"""
+
+
+def _probe() -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout)
+
+
+def test_package_import_is_lazy() -> None:
+    """`import clinicpulse` must not load ADK, google.auth, or build agents."""
+
+    assert _probe()["loaded"] == []
+
+
+def test_package_import_within_budget() -> None:
+    """Cold import of the package stays under the import-time budget."""
+
+    assert _probe()["elapsed"] < IMPORT_BUDGET_S
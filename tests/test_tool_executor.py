@@ -0,0 +1,76 @@
+"""Tests for running blocking tools off the event loop."""
+
+import asyncio
+import contextvars
+import inspect
+import time
+
+from clinicpulse.tool_executor import offload
+from clinicpulse.tools import fetch_patient_records
+
+REQUEST_ID = contextvars.ContextVar("request_id", default=None)
+
+
+def blocking_lookup(patient_id: str, tool_context=None) -> dict:
+    """Simulates slow EHR I/O."""
+
+    time.sleep(0.2)
+    return {"patient_id": patient_id, "request_id": REQUEST_ID.get()}
+
+
+def test_loop_stays_responsive_under_tool_load() -> None:
+    """Eight 200ms blocking tools never stall a 10ms ticker on the loop."""
+
+    tool = offload(blocking_lookup)
+
+    async def scenario() -> tuple:
+        REQUEST_ID.set("req-1")
+        gaps = []
+        stop = asyncio.Event()
+
+        async def ticker() -> None:
+            last = time.perf_counter()
+            while not stop.is_set():
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        ticking = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        results = await asyncio.gather(*(tool(f"P-{i}") for i in range(8)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await ticking
+        return results, max(gaps), elapsed
+
+    results, worst_gap, elapsed = asyncio.run(scenario())
+    assert [r["patient_id"] for r in results] == [f"P-{i}" for i in range(8)]
+    assert all(r["request_id"] == "req-1" for r in results)
+    assert worst_gap < 0.1
+    assert elapsed < 0.2 * 8 / 2  # Ran concurrently, not back to back.
+
+
+def test_signature_preserved_and_async_tools_untouched() -> None:
+    """FunctionTool still sees the original parameters; coroutines pass through."""
+
+    async def native(patient_id: str) -> dict:
+        return {"patient_id": patient_id}
+
+    assert offload(native) is native
+    wrapped = offload(blocking_lookup)
+    assert inspect.iscoroutinefunction(wrapped)
+    assert list(inspect.signature(wrapped).parameters) == ["patient_id", "tool_context"]
+
+
+def test_patient_records_do_not_touch_global_random() -> None:
+    """Mock EHR data is deterministic per patient without reseeding ``random``."""
+
+    import random
+
+    random.seed(1234)
+    expected = random.random()
+    random.seed(1234)
+    first = fetch_patient_records("P-42")
+    assert random.random() == expected
+    assert fetch_patient_records("P-42") == first
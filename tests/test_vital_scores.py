@@ -0,0 +1,86 @@
+"""Tests for NEWS2 early-warning scoring."""
+
+from clinicpulse import tools, vital_scores
+from clinicpulse.circuit_breaker import degraded_result
+from clinicpulse.tools import compute_early_warning_score, score_waiting_room
+from clinicpulse.vital_scores import news2, observations_from_record, score_rows
+from clinicpulse.waiting_room import waiting_room
+
+
+def test_band_edges_and_risk_levels() -> None:
+    """Each band boundary lands on the right side; red parameters lift low scores."""
+
+    rows = score_rows([
+        {"respiratory_rate": 8, "spo2": 96, "systolic_bp": 111, "heart_rate": 90, "temp_c": 38.0},
+        {"respiratory_rate": 9, "spo2": 95, "systolic_bp": 110, "heart_rate": 91, "temp_c": 38.1},
+        {"respiratory_rate": 25, "spo2": 91, "systolic_bp": 220, "heart_rate": 131, "temp_c": 35.0,
+         "on_oxygen": True, "confused": True},
+        {"respiratory_rate": 21, "spo2": 93, "heart_rate": 111},
+    ])
+    assert [(row["score"], row["risk"]) for row in rows] == [
+        (3, "low-medium"), (5, "medium"), (20, "high"), (6, "medium")
+    ]
+    assert rows[0]["components"]["respiratory_rate"] == 3
+    assert rows[3]["missing"] == ["systolic_bp", "temp_c", "on_oxygen", "confused"]
+    assert news2([])["total"].shape == (0,)
+
+
+def test_record_mapping_and_tools() -> None:
+    assert observations_from_record({"recent_vitals": {"bp": "128/80", "hr": 72, "temp_c": 37.1}}) == {
+        "systolic_bp": 128.0, "heart_rate": 72, "temp_c": 37.1
+    }
+    result = compute_early_warning_score("P-45", respiratory_rate=30, spo2=90, confused=False)
+    assert result["status"] == "ok" and result["risk"] in {"medium", "high"}
+    assert result["components"]["respiratory_rate"] == 3
+
+    for patient_id in ("P-W1", "P-W2"):
+        waiting_room.admit(patient_id, "Routine", clinic="news2-test")
+    try:
+        # The EHR only has BP, HR and temperature: nobody gets a partial score.
+        result = score_waiting_room("news2-test")
+        assert result["patients"] == []
+        assert {row["patient_id"] for row in result["unscored"]} == {"P-W1", "P-W2"}
+        assert all(row["status"] == "insufficient_data" for row in result["unscored"])
+        assert result["unscored"][0]["missing"] == ["respiratory_rate", "spo2", "confused"]
+    finally:
+        for patient_id in ("P-W1", "P-W2"):
+            waiting_room.remove(patient_id)
+
+
+def test_waiting_room_ranks_complete_observations(monkeypatch) -> None:
+    full = {"respiratory_rate": 18, "spo2": 97, "confused": 0}
+    monkeypatch.setattr(
+        vital_scores,
+        "observations_from_record",
+        lambda record: {
+            "systolic_bp": 120, "heart_rate": record["recent_vitals"]["hr"], "temp_c": 37.0, **full
+        },
+    )
+    monkeypatch.setattr(
+        tools,
+        "fetch_patient_records",
+        lambda patient_id: {"recent_vitals": {"hr": 135 if patient_id == "P-W4" else 70}},
+    )
+    for patient_id in ("P-W3", "P-W4"):
+        waiting_room.admit(patient_id, "Routine", clinic="news2-rank")
+    try:
+        result = score_waiting_room("news2-rank")
+        assert [row["patient_id"] for row in result["patients"]] == ["P-W4", "P-W3"]
+        assert result["unscored"] == []
+    finally:
+        for patient_id in ("P-W3", "P-W4"):
+            waiting_room.remove(patient_id)
+
+
+def test_no_score_without_the_record_or_core_vitals(monkeypatch) -> None:
+    partial = compute_early_warning_score("P-45", respiratory_rate=18)
+    assert partial["status"] == "insufficient_data" and "score" not in partial
+    assert partial["missing"] == ["spo2", "confused"]
+
+    monkeypatch.setattr(
+        tools,
+        "fetch_patient_records",
+        lambda patient_id: degraded_result("fetch_patient_records", "circuit open"),
+    )
+    degraded = compute_early_warning_score("P-45", respiratory_rate=18, spo2=97, confused=False)
+    assert degraded["status"] == "degraded" and "score" not in degraded and "risk" not in degraded
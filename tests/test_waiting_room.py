@@ -0,0 +1,101 @@
+"""Tests for the clinic-wide waiting-room queue."""
+
+import random
+
+from clinicpulse.waiting_room import IndexedHeap, WaitingRoom
+
+
+def _room() -> WaitingRoom:
+    return WaitingRoom(
+        doctor_specialties={"Dr. Heart": ["cardiology"], "Dr. Smith": ["general"]},
+        aging_s=600,
+    )
+
+
+def test_indexed_heap_matches_sorted_order() -> None:
+    """Random pushes, updates and removals keep heap order correct."""
+
+    rng = random.Random(3)
+    heap, keys = IndexedHeap(), {}
+    for step in range(2000):
+        item = rng.randrange(300)
+        action = rng.random()
+        if item in keys and action < 0.3:
+            heap.remove(item)
+            del keys[item]
+        else:
+            keys[item] = (rng.random(), step)
+            heap.push(item, keys[item])
+    popped = [heap.pop()[1] for _ in range(len(heap))]
+    assert popped == sorted(keys, key=keys.get)
+
+
+def test_priority_then_arrival_order() -> None:
+    """Critical beats Routine; equal priority is first come, first served."""
+
+    room = _room()
+    room.admit("routine-early", "Routine", arrived_at=0)
+    room.admit("urgent", "Urgent", arrived_at=100)
+    room.admit("routine-late", "Routine", arrived_at=50)
+    room.admit("critical", "Critical", arrived_at=200)
+    order = [room.next_for_doctor("Dr. Smith").patient_id for _ in range(4)]
+    assert order == ["critical", "urgent", "routine-early", "routine-late"]
+
+
+def test_upgrade_and_leave() -> None:
+    """Re-triage moves a patient up; a departed patient is never called."""
+
+    room = _room()
+    room.admit("a", "Routine", arrived_at=0)
+    room.admit("b", "Routine", arrived_at=10)
+    room.admit("c", "Routine", arrived_at=20)
+    room.update_priority("c", "Critical")
+    room.remove("a")
+    assert room.next_for_doctor("Dr. Smith").patient_id == "c"
+    assert room.next_for_doctor("Dr. Smith").patient_id == "b"
+    assert room.next_for_doctor("Dr. Smith") is None
+
+
+def test_aging_lets_long_waiters_through() -> None:
+    """A routine patient waiting over two aging periods beats a new critical one."""
+
+    room = _room()
+    room.admit("old-routine", "Routine", arrived_at=0)
+    room.admit("new-critical", "Critical", arrived_at=1300)
+    assert room.next_for_doctor("Dr. Smith").patient_id == "old-routine"
+
+
+def test_next_patient_respects_doctor_and_specialty() -> None:
+    """Doctors see their own assigned patients and their specialty pool only."""
+
+    room = _room()
+    room.admit("cardiac", "Urgent", specialty="cardiology", arrived_at=0)
+    room.admit("assigned", "Routine", doctor="Dr. Heart", arrived_at=5)
+    room.admit("general", "Critical", specialty="general", arrived_at=10)
+    assert room.peek_next_for_doctor("Dr. Heart").patient_id == "cardiac"
+    assert room.next_for_doctor("Dr. Heart").patient_id == "cardiac"
+    assert room.next_for_doctor("Dr. Heart").patient_id == "assigned"
+    assert room.next_for_doctor("Dr. Heart") is None
+    assert room.next_for_doctor("Dr. Smith").patient_id == "general"
+
+
+def test_booking_and_session_end_take_patients_out() -> None:
+    """The shared room does not keep patients who booked or whose session ended."""
+
+    from clinicpulse.tools import book_appointment, record_triage_decision
+    from clinicpulse.waiting_room import waiting_room
+
+    for patient_id in ("P-WR1", "P-WR2", "P-WR3"):
+        record_triage_decision(patient_id, "routine")
+    before = len(waiting_room)
+
+    booked = book_appointment("P-WR1", "Dr. Smith", "2031-03-04 10:00")
+    assert booked["status"] == "confirmed" and waiting_room.get("P-WR1") is None
+
+    ended = waiting_room.end_session(
+        {"patient_intake": '```json\n{"patient_id": "P-WR2", "symptoms": "cough"}\n```'}
+    )
+    assert ended.patient_id == "P-WR2" and waiting_room.get("P-WR2") is None
+    assert waiting_room.end_session({"patient_intake": "no details yet"}) is None
+    assert len(waiting_room) == before - 2
+    waiting_room.remove("P-WR3")
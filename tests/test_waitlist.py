@@ -0,0 +1,118 @@
+"""Tests for the appointment waitlist and automatic rebooking."""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from clinicpulse import notifications as notifications_module
+from clinicpulse.notifications import NotificationAggregator
+from clinicpulse.tools import book_appointment, cancel_appointment, check_doctor_availability
+from clinicpulse.waitlist import SlotTakenError, Waitlist
+
+
+def _slot(days: int, hour: int = 10) -> str:
+    day = date.today() + timedelta(days=days)
+    return datetime(day.year, day.month, day.day, hour).strftime("%Y-%m-%d %H:%M")
+
+
+def test_cancellation_goes_to_most_urgent_then_longest_waiting() -> None:
+    book = Waitlist(window_days=14, min_notice_s=0)
+    early = book.book("P-A", "Dr. Heart", _slot(2), "cardiology")
+    routine = book.book("P-B", "Dr. Heart", _slot(9), "cardiology", "routine")
+    urgent = book.book("P-C", "Dr. Pulse", _slot(10), "cardiology", "urgent")
+    other = book.book("P-D", "Dr. Skin", _slot(8), "dermatology")
+    for appointment in (routine, urgent, other):
+        assert book.join(appointment.appointment_id) is not None
+    assert book.join(early.appointment_id).latest == date.today() + timedelta(days=1)
+
+    rebooked = book.cancel(early.appointment_id)
+    # P-C takes the day-2 slot; their day-10 slot is outside P-B's window
+    # (P-B already holds day 9), so the chain stops and day 10 opens up.
+    assert [(a.patient_id, a.datetime) for a in rebooked] == [("P-C", _slot(2))]
+    assert book.get(urgent.appointment_id).status == "rebooked"
+    assert book.get(early.appointment_id).status == "cancelled"
+    assert book.open_slots("cardiology") == [{"doctor": "Dr. Pulse", "datetime": _slot(10)}]
+    assert [a.patient_id for a in book.drain_confirmations()] == ["P-C"]
+    assert book.drain_confirmations() == []
+    assert len(book) == 2 and book.cancel(early.appointment_id) == []
+
+
+def test_rebooking_cascades_and_respects_windows() -> None:
+    book = Waitlist(window_days=14, min_notice_s=0)
+    first = book.book("P-1", "Dr. Bones", _slot(3), "orthopedics")
+    second = book.book("P-2", "Dr. Bones", _slot(6), "orthopedics")
+    third = book.book("P-3", "Dr. Joint", _slot(12), "orthopedics")
+    book.join(second.appointment_id)
+    book.join(third.appointment_id, earliest=date.today() + timedelta(days=5))
+
+    rebooked = book.cancel(first.appointment_id)
+    # P-2 moves to day 3; P-3 only accepts day 5+, so P-2's day-6 slot goes to P-3.
+    assert [(a.patient_id, a.datetime) for a in rebooked] == [("P-2", _slot(3)), ("P-3", _slot(6))]
+    assert rebooked[1].rebooked_from == third.appointment_id
+    assert book.open_slots("orthopedics") == [{"doctor": "Dr. Joint", "datetime": _slot(12)}]
+    assert len(book) == 0
+
+
+def test_short_notice_and_booking_open_slot() -> None:
+    book = Waitlist(window_days=14, min_notice_s=3 * 86400)
+    soon = book.book("P-X", "Dr. Smith", _slot(1))
+    later = book.book("P-Y", "Dr. Smith", _slot(9))
+    book.join(later.appointment_id)
+    assert book.cancel(soon.appointment_id) == []
+    assert book.open_slots("general") == []
+
+    book.min_notice_s = 0
+    book.book("P-Z", "Dr. Smith", _slot(4))
+    book.cancel(book.book("P-W", "Dr. Jones", _slot(20)).appointment_id)
+    assert book.open_slots("general") == [{"doctor": "Dr. Jones", "datetime": _slot(20)}]
+    book.book("P-V", "Dr. Jones", _slot(20))
+    assert book.open_slots("general") == []
+
+
+def test_taken_slots_are_rejected_until_freed() -> None:
+    book = Waitlist(window_days=14, min_notice_s=0)
+    first = book.book("P-1", "Dr. Heart", _slot(5), "cardiology")
+    with pytest.raises(SlotTakenError) as taken:
+        book.book("P-2", "dr.  heart", _slot(5).replace(" ", "T"), "cardiology")
+    assert taken.value.appointment_id == first.appointment_id
+
+    later = book.book("P-3", "Dr. Heart", _slot(9), "cardiology")
+    book.join(later.appointment_id)
+    book.cancel(first.appointment_id)
+    # P-3 moved into day 5, so it is still taken; their day-9 slot is free.
+    with pytest.raises(SlotTakenError):
+        book.book("P-2", "Dr. Heart", _slot(5), "cardiology")
+    assert book.book("P-2", "Dr. Heart", _slot(9), "cardiology").patient_id == "P-2"
+
+
+def test_tools_book_waitlist_and_cancel(monkeypatch) -> None:
+    # conftest gives every test an empty process-wide waitlist.
+    notifications = NotificationAggregator(window_s=60, autostart=False)
+    monkeypatch.setattr(notifications_module, "notifications", notifications)
+    held = book_appointment("P-T1", "Dr. Kids", _slot(11), specialty="pediatrics")
+    critical = book_appointment("P-T2", "Dr. Child", _slot(12), specialty="pediatrics",
+                                urgency_level="critical")
+    assert held["waitlisted"] and not critical["waitlisted"]
+    assert held["status"] == "confirmed" and held["appointment_id"] != critical["appointment_id"]
+    assert book_appointment("P-T9", "Dr. Kids", _slot(11), specialty="pediatrics")["status"] == "slot_taken"
+
+    freed = book_appointment("P-T3", "Dr. Child", _slot(4, 9), specialty="pediatrics")
+    result = cancel_appointment(freed["appointment_id"], reason="feeling better")
+    assert result["status"] == "cancelled"
+    assert [row["patient_id"] for row in result["rebooked"]] == ["P-T1"]
+    assert result["confirmations"][0]["status"] == "queued"
+    assert notifications.flush("P-T1")[0]["kinds"] == ["rebooking"]
+    assert check_doctor_availability("pediatrics", "routine")["available_slots"][0]["datetime"] == _slot(11)
+    assert cancel_appointment("APT-missing")["status"] == "not_found"
+
+
+def test_appointment_ids_are_unique_across_waitlists() -> None:
+    """Workers each hold a ``Waitlist`` but share the ledger keyed by appointment_id."""
+
+    first, second = Waitlist(), Waitlist()
+    ids = {
+        book.book(f"P-{i}", f"Dr. {i}", _slot(3, 9 + i % 8)).appointment_id
+        for i in range(50)
+        for book in (first, second)
+    }
+    assert len(ids) == 100